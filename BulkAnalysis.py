@@ -0,0 +1,150 @@
+import argparse
+import csv
+import json
+import sys
+import time
+
+from GessGame import BOARD_SIZE
+from GessEngine import get_engine
+from GameReplay import SQUARES, chunked, map_chunks, parse_record, read_records, replay_game
+from Perft import parse_position
+from RecordFile import GAME_MAGIC, POSITION_MAGIC, GameRecordReader, PositionReader, game_from_position
+
+
+FIELDS = ("id", "side", "state", "valid", "error", "black_stones", "white_stones", "black_rings", "white_rings",
+          "black_moves", "white_moves", "hash", "depth", "score", "best_move")
+
+NAMES = {square: name for name, square in SQUARES.items()}
+
+
+def read_items(path):
+    """Yields the items to analyze in a file one at a time, so an input of any size is read with flat memory. An
+    item is ("position", id, (black, white, player)) for a position file from RecordFile, ("game", id, moves) for a
+    game record file, or ("text", number, line) for a text file of Perft position lines or GameReplay records"""
+    with open(path, "rb") as file:
+        magic = file.read(len(POSITION_MAGIC))
+    if magic == POSITION_MAGIC:
+        reader = PositionReader(path)
+        try:
+            for number, position in enumerate(reader, 1):
+                yield "position", number, position
+        finally:
+            reader.close()
+    elif magic == GAME_MAGIC:
+        reader = GameRecordReader(path)
+        try:
+            for number, (moves, result) in enumerate(reader, 1):
+                yield "game", number, [(NAMES[origin], NAMES[target]) for origin, target in moves]
+        finally:
+            reader.close()
+    else:
+        for number, line in enumerate(read_records(path), 1):
+            yield "text", number, line
+
+
+def _is_position_line(line):
+    """Returns True if a text line is a Perft position, 20 columns separated by '/', rather than a game record"""
+    return line.split(None, 1)[0].count("/") == BOARD_SIZE - 1
+
+
+def analyze_game(game, depth=0):
+    """Computes the statistics of a GessGame's position: stones, rings and legal moves for each side, the game
+    state and hash, and with a depth above 0 the engine's score for the side to move and its best move"""
+    board = game.get_board()
+    black, white = board.get_planes()
+    result = {"side": game.get_player_turn(), "state": game.get_game_state(),
+              "black_stones": black.bit_count(), "white_stones": white.bit_count(),
+              "black_rings": board.get_ring_centers("B").bit_count(),
+              "white_rings": board.get_ring_centers("W").bit_count(),
+              "black_moves": sum(1 for move in game.legal_move_squares("B")),
+              "white_moves": sum(1 for move in game.legal_move_squares("W")),
+              "hash": "%016x" % game.get_position_hash()}
+    if depth > 0 and result["state"] == "UNFINISHED":
+        engine = get_engine(depth)
+        move = engine.search(game)
+        result["depth"] = engine.get_depth()
+        result["score"] = engine.get_score()
+        if move is not None:
+            result["best_move"] = move[0] + "-" + move[1]
+    return result
+
+
+def analyze_item(item, depth=0):
+    """Analyzes one item from read_items and returns its result as a dictionary. Game records are replayed and
+    checked move by move, and an invalid one is reported with its error at the last valid position"""
+    kind, item_id, data = item
+    if kind == "text":
+        if _is_position_line(data):
+            kind = "position"
+            try:
+                game, expected = parse_position(data)
+            except ValueError as error:
+                return {"id": item_id, "valid": False, "error": str(error)}
+            data = game.get_board().get_planes() + (game.get_player_turn(),)
+        else:
+            kind = "game"
+            item_id, data = parse_record(data, item_id)
+    if kind == "position":
+        result = {"id": item_id, "valid": True, "error": None}
+        result.update(analyze_game(game_from_position(*data), depth))
+        return result
+    replay = replay_game(item_id, data)
+    result = {"id": item_id, "valid": replay["valid"], "error": replay["error"]}
+    result.update(analyze_game(game_from_position(*replay["position"]), depth))
+    result["state"] = replay["state"]
+    return result
+
+
+def analyze_chunk(chunk, depth):
+    """Analyzes a list of items in a worker process"""
+    return [analyze_item(item, depth) for item in chunk]
+
+
+def analyze(items, depth=0, workers=None, chunk_size=64):
+    """Analyzes items from any iterable, such as read_items, and yields one result per item in input order. Chunks
+    of items are spread over worker processes by GameReplay.map_chunks, so memory stays flat. workers=1 analyzes in
+    this process"""
+    return map_chunks(analyze_chunk, chunked(items, chunk_size), workers, (depth,))
+
+
+def write_results(results, output, output_format="jsonl"):
+    """Writes results to a text stream as they arrive, one JSON object per line or as CSV rows with a header, and
+    returns how many were written"""
+    count = 0
+    if output_format == "csv":
+        writer = csv.DictWriter(output, FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for result in results:
+            writer.writerow(result)
+            count += 1
+        return count
+    for result in results:
+        output.write(json.dumps(result) + "\n")
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze Gess positions or game records in bulk")
+    parser.add_argument("input", help="position file, game record file, or text file of positions or records")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    parser.add_argument("--output", default=None, help="file to write to, defaults to standard output")
+    parser.add_argument("--depth", type=int, default=0, help="engine search depth, 0 for no engine evaluation")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, defaults to the CPU count")
+    parser.add_argument("--chunk-size", type=int, default=64, help="items sent to a worker at a time")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = analyze(read_items(args.input), args.depth, args.workers, args.chunk_size)
+    if args.output is None:
+        count = write_results(results, sys.stdout, args.format)
+    else:
+        with open(args.output, "w", newline="") as output:
+            count = write_results(results, output, args.format)
+    elapsed = time.perf_counter() - start
+    print("%d items in %.2fs (%.1f items/s)" % (count, elapsed, count / elapsed if elapsed > 0 else 0.0),
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+from GessGame import BOARD_SIZE, DIRECTION_BITS, DIRECTION_STEPS, INTERIOR_MASK, REACH_REGIONS, dilate, \
+    extract_pattern, ring_centers
+
+
+STONE_VALUE = 10
+RING_VALUE = 50
+MOBILITY_VALUE = 2
+CENTER_VALUE = 1
+THREAT_VALUE = 3
+
+# When more squares than this changed since the last update, recomputing everything is as quick
+FULL_UPDATE_SQUARES = 64
+
+TERMS = ("material", "rings", "mobility", "center", "threats")
+
+
+def _build_open_bits():
+    """For every square, the footprint pattern bits of the directions whose first step stays in the interior. It
+    is worked out from the coordinates rather than the ray table, so importing the evaluator doesn't load the rays"""
+    open_bits = []
+    for square in range(BOARD_SIZE * BOARD_SIZE):
+        x, y = divmod(square, BOARD_SIZE)
+        bits = 0
+        if 1 <= x <= BOARD_SIZE - 2 and 1 <= y <= BOARD_SIZE - 2:
+            for direction, (name, x_step, y_step) in enumerate(DIRECTION_STEPS):
+                if 1 <= x + x_step <= BOARD_SIZE - 2 and 1 <= y + y_step <= BOARD_SIZE - 2:
+                    bits |= DIRECTION_BITS[direction]
+        open_bits.append(bits)
+    return tuple(open_bits)
+
+
+def _build_center_planes():
+    """Splits each square's center weight, 9 in the middle falling to 0 on the edge, into bit planes, so the
+    weights of every stone in a plane are summed with one bit count per plane"""
+    planes = [0, 0, 0, 0]
+    for x in range(BOARD_SIZE):
+        for y in range(BOARD_SIZE):
+            weight = 9 - max(abs(2 * x - 19), abs(2 * y - 19)) // 2
+            for bit in range(4):
+                if weight >> bit & 1:
+                    planes[bit] |= 1 << (x * BOARD_SIZE + y)
+    return tuple(planes)
+
+
+OPEN_BITS = _build_open_bits()
+CENTER_PLANES = _build_center_planes()
+
+
+def center_control(plane):
+    """Sums the center weights of the stones in a plane"""
+    return sum((plane & CENTER_PLANES[bit]).bit_count() << bit for bit in range(4))
+
+
+def footprint_mobility(black, white, square):
+    """Counts the directions the footprint centered on square can move in, positive if it belongs to Black and
+    negative if it belongs to White. Empty and mixed footprints count 0, and the ring rule is not applied"""
+    black_pattern = extract_pattern(black, square)
+    white_pattern = extract_pattern(white, square)
+    if black_pattern and not white_pattern:
+        return (black_pattern & OPEN_BITS[square]).bit_count()
+    if white_pattern and not black_pattern:
+        return -(white_pattern & OPEN_BITS[square]).bit_count()
+    return 0
+
+
+def ring_threat(black, white, black_rings, white_rings, square):
+    """Counts the enemy stones within reach of a ring centered on square, the stones whose footprints could land on
+    it, positive if the ring is White's and negative if it is Black's"""
+    if black_rings >> square & 1:
+        return -(white & REACH_REGIONS[square]).bit_count()
+    if white_rings >> square & 1:
+        return (black & REACH_REGIONS[square]).bit_count()
+    return 0
+
+
+def _squares(mask):
+    """Yields the square number of every bit set in mask"""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+def compute_terms(black, white):
+    """Computes every evaluation term of a pair of bitboards from scratch, each from Black's side:
+
+    material: stones
+    rings: ring centers
+    mobility: open directions of every single-color footprint
+    center: stones weighted by closeness to the middle of the board
+    threats: enemy stones within reach of each ring"""
+    occupied = black | white
+    black_rings = ring_centers(black, occupied)
+    white_rings = ring_centers(white, occupied)
+    mobility = 0
+    for square in _squares(INTERIOR_MASK):
+        mobility += footprint_mobility(black, white, square)
+    threats = 0
+    for square in _squares(black_rings | white_rings):
+        threats += ring_threat(black, white, black_rings, white_rings, square)
+    return {"material": black.bit_count() - white.bit_count(),
+            "rings": black_rings.bit_count() - white_rings.bit_count(),
+            "mobility": mobility,
+            "center": center_control(black) - center_control(white),
+            "threats": threats}
+
+
+def score_terms(terms, player):
+    """Weighs the terms into one score from player's side"""
+    score = (terms["material"] * STONE_VALUE + terms["rings"] * RING_VALUE + terms["mobility"] * MOBILITY_VALUE +
+             terms["center"] * CENTER_VALUE + terms["threats"] * THREAT_VALUE)
+    if player == "W":
+        return -score
+    return score
+
+
+def evaluate(board, player):
+    """Scores a Board or BitBoard from player's side, computing every term from scratch"""
+    return score_terms(compute_terms(*board.get_planes()), player)
+
+
+class Evaluator:
+    """Keeps the evaluation of a board up to date as it changes. It remembers the bitboards it last saw, and each
+    update works out the squares changed since then, as Board.update_board or restore_footprints left them, and
+    recomputes only what those squares touch: material and center weight of the changed squares themselves, the
+    mobility of footprints overlapping them and the threats on rings within reach of them. Because it compares
+    against the last position it saw, it can be updated after any number of moves and take-backs, which lets a
+    search update it only at the positions it evaluates"""
+
+    def __init__(self, board=None):
+        """Initializes the evaluator, from board if one is given"""
+        self._black = 0
+        self._white = 0
+        self._black_rings = 0
+        self._white_rings = 0
+        self._mobility = [0] * (BOARD_SIZE * BOARD_SIZE)
+        self._mobile = 0
+        self._terms = dict.fromkeys(TERMS, 0)
+        if board is not None:
+            self.reset(board)
+
+    def reset(self, board):
+        """Recomputes every term for board"""
+        black, white = board.get_planes()
+        self._black = black
+        self._white = white
+        self._black_rings = board.get_ring_centers("B")
+        self._white_rings = board.get_ring_centers("W")
+        self._mobility = [0] * (BOARD_SIZE * BOARD_SIZE)
+        self._mobile = 0
+        self._terms = compute_terms(black, white)
+        self._terms["mobility"] = 0
+        self._update_mobility(INTERIOR_MASK)
+
+    def update(self, board):
+        """Brings the terms up to date with board"""
+        black, white = board.get_planes()
+        changed = (black ^ self._black) | (white ^ self._white)
+        if not changed:
+            return
+        if changed.bit_count() > FULL_UPDATE_SQUARES:
+            self.reset(board)
+            return
+        terms = self._terms
+        previous_black = self._black
+        previous_white = self._white
+        old_black = previous_black & changed
+        old_white = previous_white & changed
+        new_black = black & changed
+        new_white = white & changed
+        terms["material"] += (new_black.bit_count() - old_black.bit_count() -
+                              new_white.bit_count() + old_white.bit_count())
+        terms["center"] += (center_control(new_black) - center_control(old_black) -
+                            center_control(new_white) + center_control(old_white))
+        self._black = black
+        self._white = white
+
+        black_rings = board.get_ring_centers("B")
+        white_rings = board.get_ring_centers("W")
+        terms["rings"] = black_rings.bit_count() - white_rings.bit_count()
+        near = dilate(changed)
+        self._update_mobility(near & INTERIOR_MASK)
+
+        # a ring's threat changes if enemy stones moved within reach of it, or if the ring came or went
+        within_reach = dilate(near) & (black_rings | white_rings | self._black_rings | self._white_rings)
+        old_threats = 0
+        for square in _squares(within_reach):
+            old_threats += ring_threat(previous_black, previous_white, self._black_rings, self._white_rings, square)
+        new_threats = 0
+        for square in _squares(within_reach):
+            new_threats += ring_threat(black, white, black_rings, white_rings, square)
+        terms["threats"] += new_threats - old_threats
+        self._black_rings = black_rings
+        self._white_rings = white_rings
+
+    def _update_mobility(self, region):
+        """Recomputes the mobility of the footprints centered in region"""
+        black = self._black
+        white = self._white
+        mobility = self._mobility
+        total = self._terms["mobility"]
+        mobile = self._mobile
+        for square in _squares(region & (dilate(black | white) | mobile)):
+            value = footprint_mobility(black, white, square)
+            total += value - mobility[square]
+            mobility[square] = value
+            if value:
+                mobile |= 1 << square
+            else:
+                mobile &= ~(1 << square)
+        self._terms["mobility"] = total
+        self._mobile = mobile
+
+    def get_terms(self):
+        """Gets a copy of the terms, each from Black's side"""
+        return dict(self._terms)
+
+    def get_score(self, player):
+        """Gets the score from player's side"""
+        return score_terms(self._terms, player)
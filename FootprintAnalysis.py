@@ -0,0 +1,115 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from GessGame import BOARD_SIZE, DIRECTION_STEPS
+
+
+INTERIOR = slice(1, BOARD_SIZE - 1)
+
+
+def _require_numpy():
+    """Raises a clear error if NumPy is not installed, as it is only needed for this module"""
+    if numpy is None:
+        raise ImportError("FootprintAnalysis needs NumPy, install it with 'pip install numpy'")
+
+
+def planes_to_array(black, white):
+    """Converts a pair of 400-bit bitboards to a (20, 20) int8 array indexed [x][y] like Board._game_board, holding
+    1 for black stones, -1 for white stones and 0 for empty squares"""
+    _require_numpy()
+    black_bits = numpy.unpackbits(numpy.frombuffer(black.to_bytes(50, "little"), numpy.uint8), bitorder="little")
+    white_bits = numpy.unpackbits(numpy.frombuffer(white.to_bytes(50, "little"), numpy.uint8), bitorder="little")
+    cells = black_bits[:BOARD_SIZE * BOARD_SIZE].astype(numpy.int8) - white_bits[:BOARD_SIZE * BOARD_SIZE]
+    return cells.reshape(BOARD_SIZE, BOARD_SIZE)
+
+
+def _shift(cells, x_offset, y_offset):
+    """Returns an array the shape of cells where [..., x, y] holds cells[..., x + x_offset, y + y_offset], and
+    zero where that falls off the board"""
+    shifted = numpy.zeros_like(cells)
+    source_x = slice(max(0, x_offset), BOARD_SIZE + min(0, x_offset))
+    source_y = slice(max(0, y_offset), BOARD_SIZE + min(0, y_offset))
+    target_x = slice(max(0, -x_offset), BOARD_SIZE + min(0, -x_offset))
+    target_y = slice(max(0, -y_offset), BOARD_SIZE + min(0, -y_offset))
+    shifted[..., target_x, target_y] = cells[..., source_x, source_y]
+    return shifted
+
+
+def _window_sum(cells):
+    """Sums every 3x3 window, giving the count for the footprint centered on each square"""
+    total = numpy.zeros(cells.shape, numpy.int16)
+    for x_offset in (-1, 0, 1):
+        for y_offset in (-1, 0, 1):
+            total += _shift(cells, x_offset, y_offset)
+    return total
+
+
+def analyze_positions(positions):
+    """Computes footprint statistics for all 324 centers of every position in a (N, 20, 20) stack of arrays from
+    planes_to_array, or a single (20, 20) array. Returns a dictionary of arrays over the 18x18 interior centers:
+
+    black_count, white_count: stones of each color in the footprint
+    owner: 1 if the footprint holds only black stones, -1 if only white, 0 if it is empty or mixed
+    open: (..., 18, 18, 8) whether the owner can move the footprint at least one step in each direction of
+        DIRECTION_STEPS, because it has a stone on that side and the first step stays on the board
+    max_length: the furthest the footprint can slide in any open direction before a stone stops it, limited to 3
+        when its center is empty
+
+    The ring rule is not applied, so these are pseudo-legal moves"""
+    _require_numpy()
+    positions = numpy.asarray(positions, numpy.int8)
+    black = (positions == 1).astype(numpy.int8)
+    white = (positions == -1).astype(numpy.int8)
+    occupied = (positions != 0).astype(numpy.int8)
+    black_count = _window_sum(black)
+    white_count = _window_sum(white)
+    owner = numpy.where((black_count > 0) & (white_count == 0), 1, 0)
+    owner = numpy.where((white_count > 0) & (black_count == 0), -1, owner).astype(numpy.int8)
+
+    x_index = numpy.arange(BOARD_SIZE).reshape(BOARD_SIZE, 1)
+    y_index = numpy.arange(BOARD_SIZE).reshape(1, BOARD_SIZE)
+    interior = (x_index >= 1) & (x_index <= BOARD_SIZE - 2) & (y_index >= 1) & (y_index <= BOARD_SIZE - 2)
+    limit = numpy.where(occupied != 0, BOARD_SIZE, 3)
+
+    open_directions = []
+    max_length = numpy.zeros(positions.shape, numpy.int16)
+    for name, x_step, y_step in DIRECTION_STEPS:
+        # the owner needs a stone on this side of the footprint
+        side = _shift(positions, x_step, y_step)
+        is_open = (owner != 0) & (side == owner) & _shift(interior.astype(numpy.int8), x_step, y_step).astype(bool)
+        open_directions.append(is_open)
+
+        # a footprint centered here is stopped by any stone on its leading edge
+        edge_cells = set()
+        for i in (-1, 0, 1):
+            if y_step:
+                edge_cells.add((i, y_step))
+            if x_step:
+                edge_cells.add((x_step, i))
+        blocked = numpy.zeros(positions.shape, bool)
+        for x_offset, y_offset in edge_cells:
+            blocked |= _shift(occupied, x_offset, y_offset).astype(bool)
+
+        # slide every footprint at once, one step per pass
+        sliding = is_open.copy()
+        length = numpy.zeros(positions.shape, numpy.int16)
+        for step in range(1, BOARD_SIZE - 2):
+            inside = _shift(interior.astype(numpy.int8), x_step * step, y_step * step).astype(bool)
+            sliding &= inside & (step <= limit)
+            length += sliding
+            sliding &= ~_shift(blocked.astype(numpy.int8), x_step * step, y_step * step).astype(bool)
+            if not sliding.any():
+                break
+        max_length = numpy.maximum(max_length, length)
+
+    open_directions = numpy.stack(open_directions, axis=-1)
+    return {"black_count": black_count[..., INTERIOR, INTERIOR], "white_count": white_count[..., INTERIOR, INTERIOR],
+            "owner": owner[..., INTERIOR, INTERIOR], "open": open_directions[..., INTERIOR, INTERIOR, :],
+            "max_length": max_length[..., INTERIOR, INTERIOR]}
+
+
+def analyze_board(board):
+    """Computes the footprint statistics of analyze_positions for a single Board or BitBoard"""
+    return analyze_positions(board.to_array())
@@ -0,0 +1,59 @@
+import argparse
+import copy
+import time
+import tracemalloc
+
+from GessGame import GessGame, BitBoard
+
+
+def _starting_game(backend):
+    """Builds a game at the starting position on a Board or BitBoard"""
+    if backend == "list":
+        return GessGame()
+    board = BitBoard()
+    board.make_board()
+    return GessGame(board)
+
+
+def measure(game, make_copy, count):
+    """Makes count copies of game with make_copy, then plays one move on each copy. Returns the seconds and bytes
+    of memory taken by the copies, before and after the move"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    copies = [make_copy(game) for number in range(count)]
+    copy_seconds = time.perf_counter() - start
+    copy_bytes = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    for variation in copies:
+        variation.make_move("c3", "c6")
+    move_seconds = time.perf_counter() - start
+    move_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return copy_seconds, copy_bytes, move_seconds, move_bytes
+
+
+def benchmark(count=10000, out=print):
+    """Compares copy.deepcopy with GessGame.fork for count copies of the starting position on each board backend,
+    printing the time and memory per copy before and after each copy plays a move"""
+    out("%-6s %-9s %12s %12s %12s %12s" % ("board", "method", "copy us", "copy bytes", "+move us", "+move bytes"))
+    results = {}
+    for backend in ("list", "bit"):
+        game = _starting_game(backend)
+        for name, make_copy in (("deepcopy", copy.deepcopy), ("fork", GessGame.fork)):
+            copy_seconds, copy_bytes, move_seconds, move_bytes = measure(game, make_copy, count)
+            results[(backend, name)] = (copy_seconds, copy_bytes, move_seconds, move_bytes)
+            out("%-6s %-9s %12.2f %12.0f %12.2f %12.0f" % (
+                backend, name, copy_seconds / count * 1e6, copy_bytes / count, move_seconds / count * 1e6,
+                move_bytes / count))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare GessGame.fork with copy.deepcopy")
+    parser.add_argument("--count", type=int, default=10000, help="copies to make")
+    args = parser.parse_args()
+    benchmark(args.count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from GessGame import BitBoard, BOARD_SIZE, apply_move, check_move, ring_centers
+from RecordFile import game_from_position
+
+
+def _build_squares():
+    """Maps every square's notation, such as "c3", straight to its square number"""
+    squares = {}
+    for x in range(BOARD_SIZE):
+        for y in range(BOARD_SIZE):
+            squares["abcdefghijklmnopqrst"[x] + str(y + 1)] = x * BOARD_SIZE + y
+    return squares
+
+
+SQUARES = _build_squares()
+
+
+def _start_position():
+    """Gets the bitboards of the make_board starting position"""
+    board = BitBoard()
+    board.make_board()
+    return board.get_planes()
+
+
+START_POSITION = _start_position()
+
+
+def read_records(path):
+    """Yields the game records in a file one line at a time, skipping blank lines and # comments, so an archive of
+    any size is read with flat memory. A record is a list of moves such as "c3-c6 r18-r15", optionally starting with
+    a game id in square brackets, such as "[game42] c3-c6 r18-r15\""""
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+def parse_record(record, number):
+    """Splits a record into its game id and list of (center, destination) strings. A record that is already a
+    sequence of pairs is used as it is, with number as its id"""
+    if not isinstance(record, str):
+        return number, list(record)
+    game_id = number
+    tokens = record.split()
+    if tokens and tokens[0].startswith("[") and tokens[0].endswith("]"):
+        game_id = tokens[0][1:-1]
+        tokens = tokens[1:]
+    moves = []
+    for token in tokens:
+        center, separator, destination = token.partition("-")
+        moves.append((center, destination))
+    return game_id, moves
+
+
+def replay_game(game_id, moves):
+    """Replays one game from the starting position, validating each move straight on the bitboards. Returns a
+    dictionary with the game id, how many moves were valid, the first error if any, the game state and the final
+    position as (black, white, side to move)"""
+    black, white = START_POSITION
+    player = "B"
+    state = "UNFINISHED"
+    error = None
+    played = 0
+    for center, destination in moves:
+        origin = SQUARES.get(center)
+        target = SQUARES.get(destination)
+        if state != "UNFINISHED":
+            error = "move %d played after the game ended: %s-%s" % (played + 1, center, destination)
+            break
+        if origin is None or target is None or not check_move(black, white, player, origin, target):
+            error = "illegal move %d: %s-%s" % (played + 1, center, destination)
+            break
+        black, white = apply_move(black, white, origin, target)
+        played += 1
+        if player == "B":
+            player = "W"
+            if not ring_centers(white, black | white):
+                state = "BLACK_WON"
+        else:
+            player = "B"
+            if not ring_centers(black, black | white):
+                state = "WHITE_WON"
+    return {"game": game_id, "moves": played, "valid": error is None, "error": error, "state": state,
+            "position": (black, white, player)}
+
+
+def replay_chunk(chunk):
+    """Replays a list of (number, record) pairs in a worker process"""
+    return [replay_game(*parse_record(record, number)) for number, record in chunk]
+
+
+def chunked(items, chunk_size):
+    """Groups items into lists of chunk_size, reading the items lazily"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def map_chunks(function, chunks, workers=None, args=()):
+    """Calls function(chunk, *args) on every chunk and yields the items of the lists it returns, in input order.
+    Chunks are spread over worker processes, and only a few chunks per worker are in flight at once, so memory stays
+    flat however many chunks there are. workers=1 runs every chunk in this process"""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        for chunk in chunks:
+            for result in function(chunk, *args):
+                yield result
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(function, chunk, *args))
+            if len(pending) >= workers * 2:
+                for result in pending.popleft().result():
+                    yield result
+        while pending:
+            for result in pending.popleft().result():
+                yield result
+
+
+def replay(records, workers=None, chunk_size=256):
+    """Replays game records from any iterable, such as read_records, and yields one result per game in input order.
+    Chunks of records are spread over worker processes by map_chunks, so memory stays flat however big the archive
+    is. workers=1 replays in this process"""
+    return map_chunks(replay_chunk, chunked(enumerate(records, 1), chunk_size), workers)
+
+
+def to_game(result):
+    """Builds a BitBoard-backed GessGame at a replay result's final position"""
+    return game_from_position(*result["position"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay and validate an archive of Gess games")
+    parser.add_argument("archive", help="file of game records, one per line")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, defaults to the CPU count")
+    parser.add_argument("--quiet", action="store_true", help="only print invalid games and the totals")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    games = 0
+    invalid = 0
+    moves = 0
+    for result in replay(read_records(args.archive), args.workers):
+        games += 1
+        moves += result["moves"]
+        if not result["valid"]:
+            invalid += 1
+            print("%s: %s" % (result["game"], result["error"]))
+        elif not args.quiet:
+            print("%s: %d moves, %s" % (result["game"], result["moves"], result["state"]))
+    elapsed = time.perf_counter() - start
+    print("%d games, %d invalid, %d moves in %.2fs (%.0f moves/s)" % (
+        games, invalid, moves, elapsed, moves / elapsed if elapsed > 0 else 0.0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+import time
+
+from GessGame import GessGame, BitBoard, INDEXES, FOOTPRINT_MASK, get_square, place_pattern, place_reach
+from TranspositionTable import TranspositionTable, EXACT, LOWER, UPPER, EVAL, EVAL_KEY, encode_move, decode_move
+from Evaluator import Evaluator
+
+
+MATE_SCORE = 100000
+INFINITY = 1000000
+
+
+# This process's engine for each search depth, made by get_engine
+_engines = {}
+
+
+def get_engine(depth):
+    """Gets this process's engine searching depth moves deep, making it the first time, with its transposition table
+    emptied. Reusing it saves allocating a table for every position in bulk work, and emptying the table means a
+    position's result doesn't depend on which positions the same process searched before it"""
+    engine = _engines.get(depth)
+    if engine is None:
+        engine = GessEngine(max_depth=depth)
+        _engines[depth] = engine
+    else:
+        engine.get_table().clear()
+    return engine
+
+
+class SearchStopped(Exception):
+    """Raised inside the search when the time or node budget runs out, to unwind back to the root"""
+
+
+class GessEngine:
+    """Plays Gess by searching from a GessGame position with negamax alpha-beta and iterative deepening. Moves are
+    tried in order of the transposition table's best move, captures and threats to the opponent's rings, killer
+    moves, then the history table. The search stops at a hard per-move time or node budget and keeps the best move
+    from the deepest iteration it finished"""
+
+    def __init__(self, max_depth=64, time_limit=None, node_limit=None, table=None):
+        """Initializes the search limits. time_limit is in seconds, and either limit may be None for no limit"""
+        self._max_depth = max_depth
+        self._time_limit = time_limit
+        self._node_limit = node_limit
+        self._table = table
+        self._evaluator = Evaluator()
+        self._game = None
+        self._board = None
+        self._nodes = 0
+        self._deadline = None
+        self._depth_reached = 0
+        self._score = 0
+        self._elapsed = 0.0
+        self._principal_variation = []
+        self._iterations = []
+        self._pv_table = []
+        self._killers = []
+        self._history = {}
+        self._root_moves = None
+
+    def get_table(self):
+        """Gets the transposition table shared across searches. Unless one was passed in, it is allocated the first
+        time it is needed, so making an engine that never searches costs nothing"""
+        if self._table is None:
+            self._table = TranspositionTable()
+        return self._table
+
+    def get_nodes(self):
+        """Gets the number of positions visited by the last search"""
+        return self._nodes
+
+    def get_depth(self):
+        """Gets the deepest iteration the last search finished"""
+        return self._depth_reached
+
+    def get_score(self):
+        """Gets the score of the last search from the side to move's point of view"""
+        return self._score
+
+    def get_nodes_per_second(self):
+        """Gets the search speed of the last search"""
+        if self._elapsed <= 0:
+            return 0.0
+        return self._nodes / self._elapsed
+
+    def get_principal_variation(self):
+        """Gets the line of best play found by the last search, as (center, destination) notation pairs"""
+        return self._principal_variation
+
+    def get_iterations(self):
+        """Gets the result of each depth the last search finished, as (depth, score, move) with the move as a
+        (center, destination) notation pair"""
+        return self._iterations
+
+    def get_report(self):
+        """Gets the statistics of the last search as a dictionary, for logging and tuning"""
+        return {"depth": self._depth_reached, "score": self._score, "nodes": self._nodes,
+                "seconds": self._elapsed, "nodes_per_second": self.get_nodes_per_second(),
+                "pv": [center + "-" + destination for center, destination in self._principal_variation]}
+
+    def search(self, game, root_moves=None, generation=None):
+        """Searches the game's position and returns the best move as a (center, destination) pair of strings that
+        GessGame.make_move accepts, or None if the side to move has no legal move. The game is not changed. If
+        root_moves is given, only those (center, destination) pairs are considered at the root, and moves the
+        ordering cannot tell apart are tried in the order they were given. generation is passed on to the
+        transposition table's new_search"""
+        board = BitBoard()
+        board.set_planes(*game.get_board().get_planes())
+        self._board = board
+        self._evaluator.reset(board)
+        self._game = GessGame(board)
+        self._game.set_player_turn(game.get_player_turn())
+        self._root_moves = None
+        if root_moves is not None:
+            self._root_moves = {}
+            for center, destination in root_moves:
+                move = encode_move(get_square(board.convert_to_index(center)),
+                                   get_square(board.convert_to_index(destination)))
+                self._root_moves[move] = len(root_moves) - len(self._root_moves)
+        return self._iterative_deepening(generation)
+
+    def _iterative_deepening(self, generation=None):
+        """Runs deeper and deeper searches until the depth limit or the budget is reached"""
+        start = time.perf_counter()
+        self._deadline = None
+        if self._time_limit is not None:
+            self._deadline = start + self._time_limit
+        self._nodes = 0
+        self._depth_reached = 0
+        self._score = 0
+        self._principal_variation = []
+        self._iterations = []
+        self._killers = [[0, 0] for ply in range(self._max_depth + 1)]
+        self._history = {}
+        self.get_table().new_search(generation)
+
+        best_line = []
+        for depth in range(1, self._max_depth + 1):
+            self._pv_table = [[] for ply in range(depth + 1)]
+            try:
+                score = self._negamax(depth, -INFINITY, INFINITY, 0)
+            except SearchStopped:
+                break
+            self._depth_reached = depth
+            self._score = score
+            best_line = self._pv_table[0]
+            if best_line:
+                origin, target = best_line[0]
+                self._iterations.append((depth, score, (self._notation(origin), self._notation(target))))
+            if abs(score) >= MATE_SCORE - self._max_depth:
+                break
+        self._elapsed = time.perf_counter() - start
+
+        self._principal_variation = []
+        for origin, target in best_line:
+            self._principal_variation.append((self._notation(origin), self._notation(target)))
+        if self._principal_variation:
+            return self._principal_variation[0]
+        # the budget ran out before depth 1 finished, so fall back to the first legal move
+        for move, center, destination in self._ordered_moves(self._game.get_player_turn(), 0, 0):
+            return self._board.convert_to_string(center), self._board.convert_to_string(destination)
+        return None
+
+    def _notation(self, square):
+        """Converts a square to its string notation"""
+        return self._board.convert_to_string(INDEXES[square])
+
+    def _check_limits(self):
+        """Stops the search if the node or time budget has run out"""
+        if self._node_limit is not None and self._nodes >= self._node_limit:
+            raise SearchStopped()
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise SearchStopped()
+
+    def _negamax(self, depth, alpha, beta, ply):
+        """Returns the score of the position for the side to move, searching depth more moves"""
+        self._nodes += 1
+        if self._nodes & 31 == 0:
+            self._check_limits()
+        game = self._game
+        player = game.get_player_turn()
+        self._pv_table[ply] = []
+        if not self._board.has_ring(player):
+            return -MATE_SCORE + ply
+        key = game.get_position_hash()
+        if depth == 0:
+            # leaves reached again by another move order reuse their evaluation from the table
+            entry = self._table.probe(key ^ EVAL_KEY)
+            if entry is not None and entry[1] == EVAL:
+                return entry[2]
+            self._evaluator.update(self._board)
+            score = self._evaluator.get_score(player)
+            self._table.store(key ^ EVAL_KEY, 0, EVAL, score)
+            return score
+
+        entry = self._table.probe(key)
+        hash_move = 0
+        if entry is not None:
+            entry_depth, flag, score, hash_move = entry
+            score = self._score_from_table(score, ply)
+            if ply > 0 and entry_depth >= depth:
+                if flag == EXACT:
+                    return score
+                if flag == LOWER and score >= beta:
+                    return score
+                if flag == UPPER and score <= alpha:
+                    return score
+
+        moves = self._ordered_moves(player, ply, hash_move)
+        if not moves:
+            return 0
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = 0
+        for move, center, destination in moves:
+            game.push_move(center, destination)
+            try:
+                score = -self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.unmake_move()
+            if score > best_score:
+                best_score = score
+                best_move = move
+                self._pv_table[ply] = [decode_move(move)] + self._pv_table[ply + 1]
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self._remember_cutoff(move, ply, depth)
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self._table.store(key, depth, flag, self._score_to_table(best_score, ply), best_move)
+        return best_score
+
+    def _score_to_table(self, score, ply):
+        """Makes a mate score relative to the position being stored rather than the root"""
+        if score >= MATE_SCORE - 1000:
+            return score + ply
+        if score <= -MATE_SCORE + 1000:
+            return score - ply
+        return score
+
+    def _score_from_table(self, score, ply):
+        """Makes a mate score from the table relative to the root again"""
+        if score >= MATE_SCORE - 1000:
+            return score - ply
+        if score <= -MATE_SCORE + 1000:
+            return score + ply
+        return score
+
+    def _remember_cutoff(self, move, ply, depth):
+        """Records a move that caused a beta cutoff as a killer at this ply and in the history table"""
+        killers = self._killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self._history[move] = self._history.get(move, 0) + depth * depth
+
+    def _ordered_moves(self, player, ply, hash_move):
+        """Returns the legal moves as (move, center, destination), best candidates first"""
+        black, white = self._board.get_planes()
+        if player == "B":
+            opposing = white
+            opposing_rings = self._board.get_ring_centers("W")
+        else:
+            opposing = black
+            opposing_rings = self._board.get_ring_centers("B")
+        killers = self._killers[ply]
+
+        scored = []
+        for origin, target in self._game.legal_move_squares(player):
+            move = encode_move(origin, target)
+            tie_break = 0
+            if ply == 0 and self._root_moves is not None:
+                if move not in self._root_moves:
+                    continue
+                tie_break = self._root_moves[move]
+            if move == hash_move:
+                priority = 10000000
+            else:
+                captured = opposing & place_pattern(FOOTPRINT_MASK, target)
+                priority = 0
+                if captured:
+                    priority += 1000000 + captured.bit_count() * 1000
+                if opposing_rings & place_reach(target):
+                    priority += 2000000
+                if not priority:
+                    if move == killers[0]:
+                        priority = 900000
+                    elif move == killers[1]:
+                        priority = 800000
+                    else:
+                        priority = min(self._history.get(move, 0), 700000)
+            scored.append((priority, tie_break, move, INDEXES[origin], INDEXES[target]))
+        scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        return [(move, center, destination) for priority, tie_break, move, center, destination in scored]
@@ -1,13 +1,395 @@
+import marshal
+import os
+import random
+import sys
+import zlib
+
+BOARD_SIZE = 20
+
+
+def _build_footprint_mask():
+    """Builds the 3x3 footprint pattern as bits, with the footprint's south-west corner at bit 0"""
+    mask = 0
+    for x in range(3):
+        for y in range(3):
+            mask |= 1 << (x * BOARD_SIZE + y)
+    return mask
+
+
+def _build_edge_mask():
+    """Builds the bits of the outer row and column squares, where stones are removed after every move"""
+    mask = 0
+    for x in range(BOARD_SIZE):
+        for y in range(BOARD_SIZE):
+            if x in (0, BOARD_SIZE - 1) or y in (0, BOARD_SIZE - 1):
+                mask |= 1 << (x * BOARD_SIZE + y)
+    return mask
+
+
+# A square is the single int x * 20 + y, so a footprint centered on square sq covers sq - 21 through sq + 21
+FOOTPRINT_MASK = _build_footprint_mask()
+FOOTPRINT_SHIFT = BOARD_SIZE + 1
+CENTER_BIT = 1 << FOOTPRINT_SHIFT
+RING_MASK = FOOTPRINT_MASK & ~CENTER_BIT
+EDGE_MASK = _build_edge_mask()
+PATTERN_BITS = {"north": 1 << 22, "south": 1 << 20, "east": 1 << 41, "west": 1 << 1, "NW": 1 << 2, "NE": 1 << 42,
+                "SW": 1 << 0, "SE": 1 << 40}
+DIRECTION_STEPS = (("north", 0, 1), ("south", 0, -1), ("east", 1, 0), ("west", -1, 0), ("NW", -1, 1), ("NE", 1, 1),
+                   ("SW", -1, -1), ("SE", 1, -1))
+RING_OFFSETS = tuple(dx * BOARD_SIZE + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy)
+DIRECTION_OFFSETS = {name: dx * BOARD_SIZE + dy for name, dx, dy in DIRECTION_STEPS}
+
+
+def _build_interior_mask():
+    """Builds the bits of the 18x18 squares a footprint center is allowed to occupy"""
+    mask = 0
+    for x in range(1, BOARD_SIZE - 1):
+        for y in range(1, BOARD_SIZE - 1):
+            mask |= 1 << (x * BOARD_SIZE + y)
+    return mask
+
+
+def _build_reach_mask():
+    """Builds a 5x5 block of bits, the centers whose footprints overlap a footprint centered in the middle of it"""
+    mask = 0
+    for x in range(5):
+        for y in range(5):
+            mask |= 1 << (x * BOARD_SIZE + y)
+    return mask
+
+
+INTERIOR_MASK = _build_interior_mask()
+REACH_MASK = _build_reach_mask()
+REACH_SHIFT = 2 * BOARD_SIZE + 2
+
+
+def _build_zobrist_keys():
+    """Builds a random 64-bit key for every square and color, plus one for White to move. The generator is seeded,
+    so a position hashes the same in every process and every run"""
+    generator = random.Random(20201203)
+    keys = {}
+    for player in ("B", "W"):
+        keys[player] = [generator.getrandbits(64) for square in range(BOARD_SIZE * BOARD_SIZE)]
+    return keys, generator.getrandbits(64)
+
+
+ZOBRIST_KEYS, SIDE_KEY = _build_zobrist_keys()
+
+
+def hash_planes(black, white):
+    """Returns the Zobrist hash of the stones in a pair of bitboards. As the hash is an exclusive-or of keys, hashing
+    only the squares that changed gives the value to fold into an existing hash"""
+    position_hash = 0
+    for plane, keys in ((black, ZOBRIST_KEYS["B"]), (white, ZOBRIST_KEYS["W"])):
+        while plane:
+            lowest = plane & -plane
+            position_hash ^= keys[lowest.bit_length() - 1]
+            plane ^= lowest
+    return position_hash
+
+
+def get_square(index):
+    """Converts an Index to its square number on the board"""
+    return index.get_square()
+
+
+def index_at(x, y):
+    """Gets the shared Index for x, y from INDEXES, only making a new one for coordinates off the board"""
+    if 0 <= x < BOARD_SIZE and 0 <= y < BOARD_SIZE:
+        return INDEXES[x * BOARD_SIZE + y]
+    return Index(x, y)
+
+
+def extract_pattern(plane, square):
+    """Returns the 3x3 footprint centered on square from a 400-bit plane, shifted down to bit 0"""
+    shift = square - FOOTPRINT_SHIFT
+    if shift >= 0:
+        return (plane >> shift) & FOOTPRINT_MASK
+    return (plane << -shift) & FOOTPRINT_MASK
+
+
+def place_pattern(pattern, square):
+    """Returns a 3x3 footprint pattern moved up from bit 0 to be centered on square"""
+    shift = square - FOOTPRINT_SHIFT
+    if shift >= 0:
+        return pattern << shift
+    return pattern >> -shift
+
+
+def place_reach(square):
+    """Returns the 5x5 block of centers whose footprints overlap the footprint centered on square"""
+    shift = square - REACH_SHIFT
+    if shift >= 0:
+        return REACH_MASK << shift
+    return REACH_MASK >> -shift
+
+
+def _build_rays():
+    """Builds the ray table. For every square and each direction of DIRECTION_STEPS it holds the steps a footprint
+    centered there takes until it would leave the 18x18 interior. Each step is (target, edge_mask, edge_squares,
+    region, reach): the new center, its leading edge as a bit mask and as squares, the footprint's 3x3 region and
+    the 5x5 block of centers whose footprints overlap it"""
+    rays = []
+    for square in range(BOARD_SIZE * BOARD_SIZE):
+        x, y = divmod(square, BOARD_SIZE)
+        directions = []
+        for name, x_step, y_step in DIRECTION_STEPS:
+            steps = []
+            new_x, new_y = x, y
+            while 1 <= x <= 18 and 1 <= y <= 18:
+                new_x += x_step
+                new_y += y_step
+                if new_x < 1 or new_x > 18 or new_y < 1 or new_y > 18:
+                    break
+                edge_squares = []
+                for i in (-1, 0, 1):
+                    if y_step and (new_x + i) * BOARD_SIZE + new_y + y_step not in edge_squares:
+                        edge_squares.append((new_x + i) * BOARD_SIZE + new_y + y_step)
+                    if x_step and (new_x + x_step) * BOARD_SIZE + new_y + i not in edge_squares:
+                        edge_squares.append((new_x + x_step) * BOARD_SIZE + new_y + i)
+                edge_mask = 0
+                for edge_square in edge_squares:
+                    edge_mask |= 1 << edge_square
+                target = new_x * BOARD_SIZE + new_y
+                steps.append((target, edge_mask, tuple(edge_squares), FOOTPRINT_REGIONS[target], REACH_REGIONS[target]))
+            directions.append(tuple(steps))
+        rays.append(tuple(directions))
+    return tuple(rays)
+
+
+# Built once at import so move checks are table walks: the 3x3 region and the 5x5 reach around every square. The
+# ray of steps from every square in every direction costs far more to build, so it waits for get_rays
+FOOTPRINT_REGIONS = tuple(place_pattern(FOOTPRINT_MASK, square) for square in range(BOARD_SIZE * BOARD_SIZE))
+REACH_REGIONS = tuple(place_reach(square) for square in range(BOARD_SIZE * BOARD_SIZE))
+DIRECTION_INDEX = {name: index for index, (name, x_step, y_step) in enumerate(DIRECTION_STEPS)}
+DIRECTION_BITS = tuple(PATTERN_BITS[name] for name, x_step, y_step in DIRECTION_STEPS)
+STEP_DIRECTIONS = {(x_step, y_step): index for index, (name, x_step, y_step) in enumerate(DIRECTION_STEPS)}
+# The x and y change of each direction, shared by every FootPrint
+FOOTPRINT_DIRECTIONS = {name: (x_step, y_step) for name, x_step, y_step in DIRECTION_STEPS}
+
+# Bumped whenever the layout of the cached tables changes
+TABLE_CACHE_VERSION = 1
+
+_rays = None
+
+
+def get_table_cache_path():
+    """Gets the file the ray table is cached in, or None if caching is off. The GESS_TABLE_CACHE environment variable
+    names the file, or turns the cache off when it is "0"; by default it sits in __pycache__ next to this module"""
+    setting = os.environ.get("GESS_TABLE_CACHE", "")
+    if setting == "0":
+        return None
+    if setting:
+        return setting
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__",
+                        "gess_tables.%s.bin" % sys.implementation.cache_tag)
+
+
+def _table_fingerprint():
+    """Gets the line a cache file must start with to be current. It covers the cache version, the marshal format,
+    the interpreter and a checksum of this module's source, so editing how the tables are built makes old caches
+    stale. Returns None if the source can't be read"""
+    try:
+        with open(os.path.abspath(__file__), "rb") as file:
+            checksum = zlib.crc32(file.read())
+    except OSError:
+        return None
+    return ("gess-tables %d %d %s %08x\n" % (TABLE_CACHE_VERSION, marshal.version, sys.implementation.cache_tag,
+                                             checksum)).encode("ascii")
+
+
+def _read_table_cache(path, fingerprint):
+    """Reads the ray table from a cache file, or returns None if it is missing, stale or unreadable"""
+    try:
+        with open(path, "rb") as file:
+            if file.readline() != fingerprint:
+                return None
+            return marshal.loads(file.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def _write_table_cache(path, fingerprint, rays):
+    """Writes the ray table to a cache file through a temporary file, so a reader never sees half of it. A cache
+    that can't be written, such as in a read-only install, is skipped"""
+    temporary = "%s.%d.tmp" % (path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(temporary, "wb") as file:
+            file.write(fingerprint)
+            file.write(marshal.dumps(rays))
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+
+
+def load_tables():
+    """Loads the ray table if it isn't loaded yet, from the cache file when it is current and otherwise by building
+    it and writing the cache. A long-running process can call this at startup so its first move isn't slowed down"""
+    global _rays
+    if _rays is not None:
+        return
+    path = get_table_cache_path()
+    fingerprint = None
+    if path is not None:
+        fingerprint = _table_fingerprint()
+    if fingerprint is not None:
+        _rays = _read_table_cache(path, fingerprint)
+    if _rays is None:
+        _rays = _build_rays()
+        if fingerprint is not None:
+            _write_table_cache(path, fingerprint, _rays)
+
+
+def get_rays():
+    """Gets the ray table, loading it the first time"""
+    if _rays is None:
+        load_tables()
+    return _rays
+
+
+def __getattr__(name):
+    """Gives other modules the ray table as RAYS, loading it the first time it is asked for"""
+    if name == "RAYS":
+        return get_rays()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def dilate(mask):
+    """Grows a set of squares by one square in every direction, giving every center whose footprint overlaps them"""
+    grown = mask
+    for offset in RING_OFFSETS:
+        if offset > 0:
+            grown |= mask << offset
+        else:
+            grown |= mask >> -offset
+    return grown
+
+
+def ring_centers(own, occupied):
+    """Returns the bits of every empty interior square completely surrounded by the player's own stones, which is
+    the center of one of that player's rings. All 8 neighbours are checked at once across the whole board"""
+    centers = INTERIOR_MASK & ~occupied
+    for offset in RING_OFFSETS:
+        if offset > 0:
+            centers &= own >> offset
+        else:
+            centers &= own << -offset
+    return centers
+
+
+def apply_move(black, white, origin, target):
+    """Returns the black and white bitboards after the footprint on square origin moves to square target, capturing
+    the stones under it and dropping any stones that land on the edge"""
+    black_pattern = extract_pattern(black, origin)
+    white_pattern = extract_pattern(white, origin)
+    changed = place_pattern(FOOTPRINT_MASK, origin) | place_pattern(FOOTPRINT_MASK, target)
+    black = (black & ~changed | place_pattern(black_pattern, target)) & ~EDGE_MASK
+    white = (white & ~changed | place_pattern(white_pattern, target)) & ~EDGE_MASK
+    return black, white
+
+
+def check_move(black, white, player, origin, target):
+    """Determines if player may move the footprint on square origin to square target, by the same rules as
+    GessGame.legal_moves but walking only the one ray, so a single move can be validated without generating all of
+    them or building Index and FootPrint objects"""
+    x, y = divmod(origin, BOARD_SIZE)
+    new_x, new_y = divmod(target, BOARD_SIZE)
+    if not (1 <= x <= 18 and 1 <= y <= 18 and 1 <= new_x <= 18 and 1 <= new_y <= 18):
+        return False
+    x_change = new_x - x
+    y_change = new_y - y
+    length = max(abs(x_change), abs(y_change))
+    if length == 0 or (x_change and y_change and abs(x_change) != abs(y_change)):
+        return False
+    direction = STEP_DIRECTIONS[(x_change > 0) - (x_change < 0), (y_change > 0) - (y_change < 0)]
+    if player == "B":
+        own, opposing = black, white
+    else:
+        own, opposing = white, black
+    own_pattern = extract_pattern(own, origin)
+    if extract_pattern(opposing, origin) or not own_pattern & DIRECTION_BITS[direction]:
+        return False
+    if length > 3 and not own_pattern & CENTER_BIT:
+        return False
+    lifted = (black | white) & ~FOOTPRINT_REGIONS[origin]
+    ray = get_rays()[origin][direction]
+    for i in range(length - 1):
+        if lifted & ray[i][1]:
+            return False
+    black, white = apply_move(black, white, origin, target)
+    if player == "B":
+        return ring_centers(black, black | white) != 0
+    return ring_centers(white, black | white) != 0
+
+
+def footprint_steps(own, opposing, rings, square):
+    """Yields every step the mover's footprint centered on square can slide to, given the mover's and the opposing
+    stones and the mover's ring centers. This holds the movement rules for GessGame.legal_moves and LegalityCache:
+    the footprint must hold ring stones of the mover's and no opposing stones, it slides only in the directions of
+    its ring stones, at most 3 steps unless its center holds a stone, and stops on the first step whose leading edge
+    runs into stones. Each step is (target, edge_mask, reach, safe_rings, legal): safe_rings are the mover's rings
+    out of the move's reach, which keep any landing legal, and legal is True if the mover still has a ring after
+    the move. Squares off the 18x18 interior have no steps"""
+    own_pattern = extract_pattern(own, square)
+    if not own_pattern & RING_MASK or extract_pattern(opposing, square):
+        return
+    if own_pattern & CENTER_BIT:
+        max_length = BOARD_SIZE
+    else:
+        max_length = 3
+    origin = FOOTPRINT_REGIONS[square]
+    lifted_own = own & ~origin
+    lifted_occupied = (own | opposing) & ~origin
+    # rings far enough from the origin are safe wherever the footprint lands
+    distant_rings = rings & ~REACH_REGIONS[square]
+
+    rays = get_rays()[square]
+    for direction in range(8):
+        if not own_pattern & DIRECTION_BITS[direction]:
+            continue
+        for target, edge_mask, edge_squares, region, reach in rays[direction][:max_length]:
+            safe_rings = distant_rings & ~reach
+            if safe_rings:
+                legal = True
+            else:
+                new_own = (lifted_own & ~region | place_pattern(own_pattern, target)) & ~EDGE_MASK
+                new_opposing = opposing & ~region
+                legal = ring_centers(new_own, new_own | new_opposing) != 0
+            yield target, edge_mask, reach, safe_rings, legal
+            # the footprint stops on the first stones its leading edge runs into
+            if lifted_occupied & edge_mask:
+                break
+
+
 class GessGame:
     """Represents a game of Gess. It will communicate with the Board class to make a move and get the game state,
      and the Player class to get the player's turn, as well as the resign game method"""
 
-    def __init__(self):
-        """Initializes the players and board"""
-        self._board = Board()
-        self._board.make_board()
+    def __init__(self, board=None):
+        """Initializes the players and board. A board backend such as BitBoard can be passed in, otherwise a
+        list-backed Board is set up in its starting position"""
+        if board is None:
+            board = Board()
+            board.make_board()
+        self._board = board
         self._player_turn = "B"
         self._not_player_turn = "W"
+        self._undo_stack = []
+        self._game_state = "UNFINISHED"
+
+    def get_board(self):
+        """Gets the board the game is played on"""
+        return self._board
+
+    def get_position_hash(self):
+        """Gets the 64-bit Zobrist hash of the position, with the side to move folded in"""
+        if self._player_turn == "W":
+            return self._board.get_hash() ^ SIDE_KEY
+        return self._board.get_hash()
 
     def get_player_turn(self):
         """Get the current player turn"""
@@ -16,42 +398,49 @@ class GessGame:
     def set_player_turn(self, player_turn):
         """Sets the current player's turn"""
         self._player_turn = player_turn
-
-    def get_game_state(self, footprint):
-        """Returns Black_won, White_won, or Unfinished"""
-        ring_pieces = footprint.get_footprint_coords()
-        if self.get_player_turn == "B":
-            if ring_pieces.values() != "B":
-                return "WHITE_WON"
-        if self.get_player_turn == "W":
-            if ring_pieces.values != "W":
-                return "BLACK_WON"
+        if player_turn == "B":
+            self._not_player_turn = "W"
         else:
-            return "UNFINISHED"
-
-    def resign_game(self):
-        """Allows current player to resign, causing other player to win, updating game state to winner"""
-        if self.get_player_turn == "W":
-            return self.get_game_state == "BLACK_WON"
+            self._not_player_turn = "B"
+
+    def get_game_state(self):
+        """Returns BLACK_WON, WHITE_WON, or UNFINISHED. The board keeps its rings up to date as moves are made, so
+        this only has to look up whether each side still has one"""
+        if self._game_state != "UNFINISHED":
+            return self._game_state
+        if not self._board.has_ring("W"):
+            return "BLACK_WON"
+        if not self._board.has_ring("B"):
+            return "WHITE_WON"
+        return "UNFINISHED"
+
+    def resign_game(self, player=None):
+        """Allows a player to resign, causing other player to win, updating game state to winner. player defaults to
+        the current player, and the turn is left as it is"""
+        if player is None:
+            player = self.get_player_turn()
+        if player == "W":
+            self._game_state = "BLACK_WON"
         else:
-            return self.get_game_state == "WHITE_WON"
+            self._game_state = "WHITE_WON"
+        return self._game_state
 
     def move_allowed(self, destination, footprint, center):
         """Used to scan the board to check if the trying move is allowed. If it is White's turn, and a 3x3 piece
         that is trying to be moved has a black piece, the move is not legal. Will then return False"""
         
         # if x and y are within board
-        if center.get_x() < 17 and center.get_x() < 1:
+        if center.get_x() > 18 or center.get_x() < 1:
             return False
-        if center.get_y() < 17 and center.get_y() < 1:
+        if center.get_y() > 18 or center.get_y() < 1:
             return False
-        if destination.get_x() < 17 and destination.get_x() < 1:
+        if destination.get_x() > 18 or destination.get_x() < 1:
             return False
-        if destination.get_y() < 17 and destination.get_y() < 1:
+        if destination.get_y() > 18 or destination.get_y() < 1:
             return False
         if footprint.validate_player_pieces(self._not_player_turn) is False:
             return False
-        
+
         # check center piece
         if_center = footprint.get_center_piece() == self._player_turn
         # check direction
@@ -63,13 +452,69 @@ class GessGame:
         if ring_pieces.get(direction) == "_":
             return False
         length = self.get_distance_length(center, destination, direction)
-        if if_center == "_" and length > 3:
+        if not if_center and length > 3:
             return False
         # check for obstruction
         if self.is_obstructed(direction, center, length, footprint) is False:
             return False
+        # a player may not break their own last ring
+        if self.keeps_ring(center, destination, footprint) is False:
+            return False
         return True
 
+    def keeps_ring(self, center, destination, footprint):
+        """Determines if the player still has at least one ring after the footprint moves to destination"""
+        black, white = self._board.get_planes()
+        black_pattern, white_pattern = self.get_footprint_patterns(footprint)
+        cleared = ~(place_pattern(FOOTPRINT_MASK, get_square(center)) |
+                    place_pattern(FOOTPRINT_MASK, get_square(destination)))
+        black = (black & cleared | place_pattern(black_pattern, get_square(destination))) & ~EDGE_MASK
+        white = (white & cleared | place_pattern(white_pattern, get_square(destination))) & ~EDGE_MASK
+        if self._player_turn == "B":
+            return ring_centers(black, black | white) != 0
+        return ring_centers(white, black | white) != 0
+
+    def get_footprint_patterns(self, footprint):
+        """Gets a footprint's black and white stones as 3x3 bit patterns"""
+        if isinstance(footprint, BitFootPrint):
+            return footprint.get_patterns()
+        black_pattern = 0
+        white_pattern = 0
+        if footprint.get_center_piece() == "B":
+            black_pattern |= CENTER_BIT
+        elif footprint.get_center_piece() == "W":
+            white_pattern |= CENTER_BIT
+        for direction, piece in footprint.get_footprint_coords().items():
+            if piece == "B":
+                black_pattern |= PATTERN_BITS[direction]
+            elif piece == "W":
+                white_pattern |= PATTERN_BITS[direction]
+        return black_pattern, white_pattern
+
+    def legal_moves(self, player):
+        """Yields every legal move for player as a (center, destination) pair of Index objects, taken from the
+        shared INDEXES so nothing is allocated per move"""
+        for origin, target in self.legal_move_squares(player):
+            yield INDEXES[origin], INDEXES[target]
+
+    def legal_move_squares(self, player):
+        """Yields every legal move for player as a (center, destination) pair of square numbers. The board is read
+        once as bitboards, and footprint_steps works out the allowed directions and move length once per footprint
+        from its ring stones and extends each ray one step at a time until a stone under the footprint stops it"""
+        black, white = self._board.get_planes()
+        if player == "B":
+            own, opposing = black, white
+        else:
+            own, opposing = white, black
+        rings = ring_centers(own, black | white)
+
+        for x in range(1, BOARD_SIZE - 1):
+            for y in range(1, BOARD_SIZE - 1):
+                square = x * BOARD_SIZE + y
+                for target, edge_mask, reach, safe_rings, legal in footprint_steps(own, opposing, rings, square):
+                    if legal:
+                        yield square, target
+
     def make_move(self, center, destination):
         """Takes game piece's current center, the center's destination, and call the convert method to convert the
         string input to an index on the board. It will use the move_allowed method to determine if the move is legal.
@@ -79,17 +524,59 @@ class GessGame:
         converted_index = self._board.convert_to_index(center)
         converted_destination = self._board.convert_to_index(destination)
         footprint = self._board.generate_footprint(converted_index)
-        
-        self.move_allowed(converted_destination, footprint, converted_index)
-        if self.get_game_state(footprint) == "BLACK_WON" or self.get_game_state(footprint) == "WHITE_WON":
+
+        if self.get_game_state() == "BLACK_WON" or self.get_game_state() == "WHITE_WON":
+            return False
+        if self.move_allowed(converted_destination, footprint, converted_index) is False:
             return False
-        self._board.make_move(center, destination)
-        if self.get_player_turn == "W":
+        self.push_move(converted_index, converted_destination, footprint)
+        return True
+
+    def push_move(self, center, destination, footprint=None):
+        """Makes a move that is already known to be legal, such as one from legal_moves, without checking it again.
+        Records the stones under the origin and destination footprints and whose turn it was on the undo stack,
+        so unmake_move can put them back"""
+        if footprint is None:
+            footprint = self._board.generate_footprint(center)
+        saved = self._board.save_footprints(center, destination)
+        self._undo_stack.append((saved, self._player_turn, self._game_state, center, destination))
+        self._board.update_board(destination, footprint)
+        if self.get_player_turn() == "W":
             self.set_player_turn("B")
         else:
             self.set_player_turn("W")
+
+    def unmake_move(self):
+        """Takes back the last move made, restoring the two footprints it touched and the turn. Returns False if
+        there is no move to take back. A resignation is final: once resign_game has been called this also returns
+        False and leaves the game as it is, rather than reopening the game by taking back the move before it"""
+        if not self._undo_stack or self._game_state != "UNFINISHED":
+            return False
+        saved, player_turn, game_state, center, destination = self._undo_stack.pop()
+        self._board.restore_footprints(saved)
+        self.set_player_turn(player_turn)
+        self._game_state = game_state
         return True
 
+    def fork(self):
+        """Returns an independent copy of the game for exploring a variation, built on Board.snapshot so the boards
+        share every column neither has changed. The copy keeps the move history, so it can take back moves made
+        before the fork"""
+        fork = GessGame(self._board.snapshot())
+        fork._player_turn = self._player_turn
+        fork._not_player_turn = self._not_player_turn
+        fork._undo_stack = list(self._undo_stack)
+        fork._game_state = self._game_state
+        return fork
+
+    def get_move_count(self):
+        """Gets the number of moves that can be taken back with unmake_move"""
+        return len(self._undo_stack)
+
+    def get_move_history(self):
+        """Gets the moves made so far, oldest first, as (center, destination) pairs of Index objects"""
+        return [(record[3], record[4]) for record in self._undo_stack]
+
     def move_north(self, center, destination):
         """Determines if footprint can move north"""
         if center.get_x() == destination.get_x():
@@ -253,131 +740,56 @@ class GessGame:
             return self.calculate_SW(center, destination)
 
     def is_obstructed(self, direction, center, length, footprint):
-        """Used to stop a piece when it moves into same space as another piece"""
-        if direction == "north":
-            return self.obstructed_north(direction, center, length, footprint)
-        if direction == "south":
-            return self.obstructed_south(direction, length, footprint)
-        if direction == "east":
-            return self.obstructed_east(direction, length, footprint)
-        if direction == "west":
-            return direction
-        if direction == "NE":
-            return self.obstructed_NE(direction, length, footprint)
-        if direction == "NW":
-            return self.obstructed_NW(direction, length, footprint)
-        if direction == "SE":
-            return self.obstructed_SE(direction, length, footprint)
-        if direction == "SW":
-            return self.obstructed_SW(direction, length, footprint)
+        """Used to stop a piece when it moves into same space as another piece. Returns False if any stone lies under
+        the footprint before it reaches its destination, otherwise True"""
+        if direction not in DIRECTION_INDEX:
+            return None
+        return self.obstructed_ray(center, length, DIRECTION_INDEX[direction])
+
+    def obstructed_ray(self, center, length, direction):
+        """Determines if the footprint slides length steps along the precomputed ray for direction without
+        overlapping a stone before its last step. Each step only checks its leading edge, as the rest was covered
+        by the step before, and nothing is allocated along the way"""
+        ray = get_rays()[get_square(center)][direction]
+        if length > len(ray):
+            return False
+        for i in range(length - 1):
+            target, edge_mask, edge_squares, region, reach = ray[i]
+            if self._board.has_stone(edge_squares, edge_mask):
+                return False
+        return True
 
-    def obstructed_north(self, direction, center, length, footprint):
+    def obstructed_north(self, center, length):
         """Determines if footprint can move to spot on board based on northern pieces"""
-        north_pieces = []
-        ring_pieces = footprint.get_footprint_coords()
-        if ring_pieces.get("north") != "_":
-            north_pieces.append(footprint.generate_piece_coord(direction, center))
-        if ring_pieces.get("NE") != "_":
-            north_pieces.append(footprint.generate_piece_coord("NE", center))
-        if ring_pieces.get("NW") != "_":
-            north_pieces.append(footprint.generate_piece_coord("NW", center))
-        for i in length - 1:
-            for pieces in north_pieces:
-                index = Index(pieces.get_x(), pieces.get_y() + i)
-                if self._board.get_board_piece(index) != "_":
-                    return False
-        return True
+        return self.obstructed_ray(center, length, DIRECTION_INDEX["north"])
 
-    def obstructed_south(self, direction, length, footprint):
+    def obstructed_south(self, center, length):
         """Determines if footprint can move to spot on board based on southern pieces"""
-        south_pieces = []
-        ring_pieces = footprint.get_footprint_coords()
-        if ring_pieces.get("south") != "_":
-            south_pieces.append(footprint.generate_piece_coord(direction))
-        if ring_pieces.get("SE") != "_":
-            south_pieces.append(footprint.generate_piece_coord("SE"))
-        if ring_pieces.get("SW") != "_":
-            south_pieces.append(footprint.generate_piece_coord("SW"))
-        for i in length - 1:
-            for pieces in south_pieces:
-                index = Index(pieces.get_x(), pieces.get_y() - i)
-                if self._board.get_board_piece(index) != "_":
-                    return False
-        return True
+        return self.obstructed_ray(center, length, DIRECTION_INDEX["south"])
 
-    def obstructed_west(self, direction, length, footprint):
+    def obstructed_west(self, center, length):
         """Determines if footprint can move to spot on board based on western pieces"""
-        west_pieces = []
-        ring_pieces = footprint.get_footprint_coords()
-        if ring_pieces.get("west") != "_":
-            west_pieces.append(footprint.generate_piece_coord(direction))
-        if ring_pieces.get("SW") != "_":
-            west_pieces.append(footprint.generate_piece_coord("SW"))
-        if ring_pieces.get("NW") != "_":
-            west_pieces.append(footprint.generate_piece_coord("NW"))
-        for i in length - 1:
-            for pieces in west_pieces:
-                index = Index(pieces.get_x() - i, pieces.get_y())
-                if self._board.get_board_piece(index) != "_":
-                    return False
-        return True
+        return self.obstructed_ray(center, length, DIRECTION_INDEX["west"])
 
-    def obstructed_east(self, direction, length, footprint):
+    def obstructed_east(self, center, length):
         """Determines if footprint can move to spot on board based on eastern pieces"""
-        east_pieces = []
-        ring_pieces = footprint.get_footprint_coords()
-        if ring_pieces.get("east") != "_":
-            east_pieces.append(footprint.generate_piece_coord(direction))
-        if ring_pieces.get("SE") != "_":
-            east_pieces.append(footprint.generate_piece_coord("SE"))
-        if ring_pieces.get("NE") != "_":
-            east_pieces.append(footprint.generate_piece_coord("NE"))
-        for i in length - 1:
-            for pieces in east_pieces:
-                index = Index(pieces.get_x() + i, pieces.get_y())
-                if self._board.get_board_piece(index) != "_":
-                    return False
-        return True
+        return self.obstructed_ray(center, length, DIRECTION_INDEX["east"])
 
-    def obstructed_NW(self, direction, length, footprint):
+    def obstructed_NW(self, center, length):
         """Determines if footprint can move to spot on board based on NW pieces"""
-        is_north = self.obstructed_north(direction, length, footprint)
-        is_west = self.obstructed_west(direction, length, footprint)
-        if is_north is False:
-            return False
-        if is_west is False:
-            return False
-        return True
+        return self.obstructed_ray(center, length, DIRECTION_INDEX["NW"])
 
-    def obstructed_NE(self, direction, length, footprint):
+    def obstructed_NE(self, center, length):
         """Determines if footprint can move to spot on board based on NE pieces"""
-        is_north = self.obstructed_north(direction, length, footprint)
-        is_east = self.obstructed_east(direction, length, footprint)
-        if is_north is False:
-            return False
-        if is_east is False:
-            return False
-        return True
+        return self.obstructed_ray(center, length, DIRECTION_INDEX["NE"])
 
-    def obstructed_SE(self, direction, length, footprint):
+    def obstructed_SE(self, center, length):
         """Determines if footprint can move to spot on board based on SE pieces"""
-        is_south = self.obstructed_south(direction, length, footprint)
-        is_east = self.obstructed_east(direction, length, footprint)
-        if is_south is False:
-            return False
-        if is_east is False:
-            return False
-        return True
+        return self.obstructed_ray(center, length, DIRECTION_INDEX["SE"])
 
-    def obstructed_SW(self, direction, length, footprint):
+    def obstructed_SW(self, center, length):
         """Determines if footprint can move to spot on board based on SW pieces"""
-        is_south = self.obstructed_south(direction, length, footprint)
-        is_west = self.obstructed_west(direction, length, footprint)
-        if is_south is False:
-            return False
-        if is_west is False:
-            return False
-        return True
+        return self.obstructed_ray(center, length, DIRECTION_INDEX["SW"])
 
 
 class Board:
@@ -387,14 +799,32 @@ class Board:
     Footprint class to get the footprint information, the Index class to get x and y coordinates, and the
     GessGame class to help the make move method."""
 
+    # The starting position every make_board copies, built the first time it is needed
+    _start_board = None
+
     def __init__(self):
         """Initializes the game board, rings, and a converter from string to index positions"""
         self._game_board = None
-        self._ring_location = None
+        self._shared_columns = 0
+        self._ring_location = {"B": 0, "W": 0}
+        self._hash = 0
         self._converter = {"a": 0, "b": 1, "c": 2, "d": 3, "e": 4, "f": 5, "g": 6, "h": 7, "i": 8, "j": 9, "k": 10,
                            "l": 11, "m": 12, "n": 13, "o": 14, "p": 15, "q": 16, "r": 17, "s": 18, "t": 19}
 
     def make_board(self):
+        """Sets up the starting position. The position is built once by build_start_position and kept on the class,
+        and each board after that shares its columns copy-on-write rather than building them again"""
+        start = Board._start_board
+        if start is None:
+            start = Board()
+            start.build_start_position()
+            Board._start_board = start
+        self._game_board = list(start._game_board)
+        self._shared_columns = start._shared_columns = (1 << BOARD_SIZE) - 1
+        self._ring_location = dict(start._ring_location)
+        self._hash = start._hash
+
+    def build_start_position(self):
         """Makes size of board, rows, columns"""
         self._game_board = \
             [["_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_"],
@@ -417,6 +847,9 @@ class Board:
              ["_", "B", "B", "B", "_", "_", "B", "_", "_", "_", "_", "_", "_", "W", "_", "_", "W", "W", "W", "_"],
              ["_", "_", "B", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "W", "_", "_"],
              ["_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_", "_"]]
+        self._shared_columns = 0
+        self._hash = hash_planes(*Board.get_planes(self))
+        self.update_rings(INTERIOR_MASK)
 
     def print_board(self):
         """Prints the board with current footprints"""
@@ -428,28 +861,166 @@ class Board:
         method communicates with the Index class to get x and y coordinates"""
         first_index = center[0]
         first_index = self._converter.get(first_index)
-        second_index = int(center[1]) - 1
-        return Index(first_index, second_index)
+        second_index = int(center[1:]) - 1
+        return index_at(first_index, second_index)
+
+    def convert_to_string(self, index):
+        """Converts an index on the board back to its string form, the reverse of convert_to_index"""
+        return "abcdefghijklmnopqrst"[index.get_x()] + str(index.get_y() + 1)
 
     def generate_footprint(self, converted_index):
         return FootPrint(converted_index, self._game_board)
 
+    def get_planes(self):
+        """Returns the black and white stones as a pair of 400-bit integers, one bit per square"""
+        black = 0
+        white = 0
+        for x in range(BOARD_SIZE):
+            column = self._game_board[x]
+            for y in range(BOARD_SIZE):
+                if column[y] == "B":
+                    black |= 1 << (x * BOARD_SIZE + y)
+                elif column[y] == "W":
+                    white |= 1 << (x * BOARD_SIZE + y)
+        return black, white
+
+    def to_array(self):
+        """Returns the board as a (20, 20) NumPy int8 array indexed [x][y], with 1 for black, -1 for white and 0 for
+        empty squares, for the vectorized analysis in FootprintAnalysis. Needs NumPy"""
+        from FootprintAnalysis import planes_to_array
+        return planes_to_array(*self.get_planes())
+
     def ring_location(self):
-        """Determines the location of black and white rings on the board. Will be used before a footprint move. If
-        a black or white ring is destroyed, it will determine the winner of the game"""
-        # if footprint_ring.values()== "W":
-        #   return get_ring_coord
-        # if footprint_ring.values == "B":
-        #   return get_ring_coord
+        """Determines the location of black and white rings on the board, as a dictionary of the ring centers
+        for each color. If a black or white ring is destroyed, it will determine the winner of the game"""
+        locations = {}
+        for player, centers in self._ring_location.items():
+            locations[player] = []
+            while centers:
+                lowest = centers & -centers
+                square = lowest.bit_length() - 1
+                locations[player].append(INDEXES[square])
+                centers ^= lowest
+        return locations
+
+    def get_hash(self):
+        """Gets the 64-bit Zobrist hash of the stones on the board, kept up to date as pieces are set"""
+        return self._hash
+
+    def get_ring_centers(self, player):
+        """Gets the centers of player's rings as a bit mask of squares"""
+        return self._ring_location[player]
+
+    def has_ring(self, player):
+        """Determines if player has at least one ring left on the board"""
+        return self._ring_location[player] != 0
+
+    def update_rings(self, changed):
+        """Re-examines only the ring centers whose footprint overlaps the changed squares, given as a bit mask,
+        and keeps every other ring as it was"""
+        candidates = dilate(changed) & INTERIOR_MASK
+        black_rings, white_rings = self.find_rings(candidates)
+        self._ring_location["B"] = self._ring_location["B"] & ~candidates | black_rings
+        self._ring_location["W"] = self._ring_location["W"] & ~candidates | white_rings
+
+    def find_rings(self, candidates):
+        """Checks each candidate center for a ring, returning the black and white ring centers as bit masks"""
+        black_rings = 0
+        white_rings = 0
+        while candidates:
+            lowest = candidates & -candidates
+            square = lowest.bit_length() - 1
+            candidates ^= lowest
+            x = square // BOARD_SIZE
+            y = square % BOARD_SIZE
+            if self._game_board[x][y] != "_":
+                continue
+            piece = self._game_board[x][y + 1]
+            if piece == "_":
+                continue
+            is_ring = True
+            for offset_x, offset_y in ((-1, -1), (-1, 0), (-1, 1), (0, -1), (1, -1), (1, 0), (1, 1)):
+                if self._game_board[x + offset_x][y + offset_y] != piece:
+                    is_ring = False
+                    break
+            if is_ring and piece == "B":
+                black_rings |= lowest
+            elif is_ring:
+                white_rings |= lowest
+        return black_rings, white_rings
 
     def get_board_piece(self, index):
         """Get method to get coordinates of a footprint through it's index"""
         piece = self._game_board[index.get_x()][index.get_y()]
         return piece
 
+    def has_stone(self, squares, mask):
+        """Determines if any of the given squares holds a stone. The squares are also given as a bit mask for
+        backends that can test them all at once"""
+        for square in squares:
+            if self._game_board[square // BOARD_SIZE][square % BOARD_SIZE] != "_":
+                return True
+        return False
+
+    def get_square_piece(self, square):
+        """Gets the piece on a square given by its number"""
+        return self._game_board[square // BOARD_SIZE][square % BOARD_SIZE]
+
     def set_board_piece(self, piece, index):
         """Sets the footprint that just made a move to its new coordinates"""
-        self._game_board[index.get_x()][index.get_y()] = piece
+        square = get_square(index)
+        self.write_square(piece, square)
+        self.update_rings(1 << square)
+
+    def write_piece(self, piece, index):
+        """Writes a piece to the board without updating the rings, for callers that update them once afterwards"""
+        self.write_square(piece, get_square(index))
+
+    def write_square(self, piece, square):
+        """Writes a piece to a square given by its number without updating the rings. A column still shared with a
+        snapshot is copied first"""
+        x = square // BOARD_SIZE
+        column = self._game_board[x]
+        if self._shared_columns >> x & 1:
+            column = self._game_board[x] = list(column)
+            self._shared_columns &= ~(1 << x)
+        old_piece = column[square % BOARD_SIZE]
+        if old_piece != "_":
+            self._hash ^= ZOBRIST_KEYS[old_piece][square]
+        if piece != "_":
+            self._hash ^= ZOBRIST_KEYS[piece][square]
+        column[square % BOARD_SIZE] = piece
+
+    def save_footprints(self, origin, destination):
+        """Returns the stones under the footprints centered on origin and destination, which covers every square
+        update_board can change, as a list of (x, y, piece)"""
+        saved = []
+        for center in (origin, destination):
+            for x in range(center.get_x() - 1, center.get_x() + 2):
+                for y in range(center.get_y() - 1, center.get_y() + 2):
+                    saved.append((x, y, self._game_board[x][y]))
+        return saved
+
+    def restore_footprints(self, saved):
+        """Puts back the stones returned by save_footprints, in reverse so overlapping footprints end up as they were"""
+        changed = 0
+        for x, y, piece in reversed(saved):
+            square = x * BOARD_SIZE + y
+            self.write_square(piece, square)
+            changed |= 1 << square
+        self.update_rings(changed)
+
+    def snapshot(self):
+        """Returns a copy of the board that shares its columns with this one. Whichever board writes to a shared
+        column first copies it, so a snapshot costs one list of 20 references and only the columns a later
+        update_board touches are ever copied"""
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone._ring_location = dict(self._ring_location)
+        if self._game_board is not None:
+            clone._game_board = list(self._game_board)
+            self._shared_columns = clone._shared_columns = (1 << BOARD_SIZE) - 1
+        return clone
 
     def make_move(self, center, destination):
         """Takes game piece's current center, the center's destination, and call the convert method to convert the
@@ -459,34 +1030,148 @@ class Board:
         
         converted_index = self.convert_to_index(center)
         converted_destination = self.convert_to_index(destination)
-        footprint = FootPrint(converted_index, self._game_board)
+        footprint = self.generate_footprint(converted_index)
         self.update_board(converted_destination, footprint)
         return True
 
     def update_board(self, destination, footprint):
         """Gets the center piece of the footprint, sets it to the new coordinates it moved, and changes new empty
-        spaces to blanks or player's piece"""
-        
-        center_piece = self.get_board_piece(footprint.get_center())
-        # delete 3x3 Block
-        old_footprint = footprint.generate_all_piece_coords()
-        for i in old_footprint:
-            self.set_board_piece("_", i)
-            
-        # re-insert piece
-        self.set_board_piece(center_piece, destination)
+        spaces to blanks or player's piece. Any stones already under the destination footprint are captured, and
+        stones that land on the outer edge of the board are removed"""
+
+        center_piece = footprint.get_center_piece()
         ring_piece = footprint.get_footprint_coords()
-        
-        # move to after deleting initial spots
+        origin = get_square(footprint.get_center())
+        target = get_square(destination)
+
+        # delete 3x3 Block
+        self.write_square("_", origin)
+        for direction in ring_piece:
+            self.write_square("_", origin + DIRECTION_OFFSETS[direction])
+
+        # re-insert piece, overwriting whatever was under it
+        self.write_square(center_piece, target)
         for direction, piece in ring_piece.items():
-            new_destination = footprint.generate_destination(direction, destination)
-            piece_at_location = self.get_board_piece(new_destination)
-            if piece_at_location == "_":
-                self.set_board_piece(piece, new_destination)
-            else:
-                if piece != "_":
-                    self.set_board_piece(piece, new_destination)
-            # self.set_board_piece("X", new_destination)
+            self.write_square(piece, target + DIRECTION_OFFSETS[direction])
+
+        # stones pushed onto the edge fall off the board
+        for square in (target, *(target + DIRECTION_OFFSETS[direction] for direction in ring_piece)):
+            if EDGE_MASK >> square & 1:
+                self.write_square("_", square)
+
+        self.update_rings(FOOTPRINT_REGIONS[origin] | FOOTPRINT_REGIONS[target])
+
+
+class BitBoard(Board):
+    """Represents the game board as two 400-bit integers, one for black stones and one for white, with square
+    x * 20 + y stored in bit x * 20 + y. Footprints are read out with a single shift and mask instead of nested
+    list lookups, so the same Board API works while footprint extraction and updates stay constant-time"""
+
+    def __init__(self):
+        """Initializes the black and white bitboards along with the converter inherited from Board"""
+        super().__init__()
+        self._black = 0
+        self._white = 0
+
+    # The starting position's black and white bitboards, read off the list-backed layout once
+    _start_planes = None
+
+    def make_board(self):
+        """Sets up the starting position from the same layout as the list-backed board"""
+        super().make_board()
+        if BitBoard._start_planes is None:
+            BitBoard._start_planes = super().get_planes()
+        self._black, self._white = BitBoard._start_planes
+        self._game_board = None
+        self._shared_columns = 0
+
+    def print_board(self):
+        """Prints the board with current footprints"""
+        for x in range(BOARD_SIZE):
+            print([self.get_square_piece(x * BOARD_SIZE + y) for y in range(BOARD_SIZE)])
+
+    def get_planes(self):
+        """Returns the black and white stones as a pair of 400-bit integers, one bit per square"""
+        return self._black, self._white
+
+    def set_planes(self, black, white):
+        """Replaces the whole position with the given black and white bitboards"""
+        self._black = black
+        self._white = white
+        self._hash = hash_planes(black, white)
+        self.update_rings(INTERIOR_MASK)
+
+    def generate_footprint(self, converted_index):
+        return BitFootPrint(converted_index, self._black, self._white)
+
+    def save_footprints(self, origin, destination):
+        """Returns the stones under the footprints centered on origin and destination as a mask and the masked
+        black and white bitboards"""
+        mask = place_pattern(FOOTPRINT_MASK, get_square(origin))
+        mask |= place_pattern(FOOTPRINT_MASK, get_square(destination))
+        return mask, self._black & mask, self._white & mask
+
+    def restore_footprints(self, saved):
+        """Puts back the stones returned by save_footprints"""
+        mask, black, white = saved
+        black = self._black & ~mask | black
+        white = self._white & ~mask | white
+        self._hash ^= hash_planes(self._black ^ black, self._white ^ white)
+        self._black = black
+        self._white = white
+        self.update_rings(mask)
+
+    def find_rings(self, candidates):
+        """Checks the candidate centers for rings. With bitboards every square is checked at once, so the full
+        board is examined and then cut down to the candidates"""
+        occupied = self._black | self._white
+        return ring_centers(self._black, occupied) & candidates, ring_centers(self._white, occupied) & candidates
+
+    def has_stone(self, squares, mask):
+        """Determines if any of the given squares holds a stone, testing them all at once with the bit mask"""
+        return (self._black | self._white) & mask != 0
+
+    def get_board_piece(self, index):
+        """Get method to get coordinates of a footprint through it's index"""
+        return self.get_square_piece(get_square(index))
+
+    def get_square_piece(self, square):
+        """Gets the piece on a square given by its number"""
+        if self._black >> square & 1:
+            return "B"
+        if self._white >> square & 1:
+            return "W"
+        return "_"
+
+    def write_square(self, piece, square):
+        """Writes a piece to a square given by its number without updating the rings"""
+        bit = 1 << square
+        if self._black & bit:
+            self._hash ^= ZOBRIST_KEYS["B"][square]
+        elif self._white & bit:
+            self._hash ^= ZOBRIST_KEYS["W"][square]
+        self._black &= ~bit
+        self._white &= ~bit
+        if piece == "B":
+            self._black |= bit
+            self._hash ^= ZOBRIST_KEYS["B"][square]
+        elif piece == "W":
+            self._white |= bit
+            self._hash ^= ZOBRIST_KEYS["W"][square]
+
+    def update_board(self, destination, footprint):
+        """Lifts the footprint off its origin, drops its pattern on the destination, capturing whatever was there,
+        and clears the edge. Each step is a mask over both bitboards"""
+        origin = get_square(footprint.get_center())
+        target = get_square(destination)
+        black_pattern, white_pattern = footprint.get_patterns()
+        changed = place_pattern(FOOTPRINT_MASK, origin) | place_pattern(FOOTPRINT_MASK, target)
+        black = (self._black & ~changed | place_pattern(black_pattern, target)) & ~EDGE_MASK
+        white = (self._white & ~changed | place_pattern(white_pattern, target)) & ~EDGE_MASK
+        self._hash ^= hash_planes(self._black ^ black, self._white ^ white)
+        self._black = black
+        self._white = white
+        self.update_rings(changed)
 
 
 class FootPrint:
@@ -498,8 +1183,7 @@ class FootPrint:
         self._center = center
         self._center_piece = game_board[center.get_x()][center.get_y()]
         self._footprint_ring = self._footprint_pieces(center, game_board)
-        self._direction_dict = {"north": [0, 1], "south": [0, -1], "east": [1, 0], "west": [-1, 0], "NW": [1, -1],
-                                "NE": [1, 1], "SW": [-1, -1], "SE": [-1, 1]}
+        self._direction_dict = FOOTPRINT_DIRECTIONS
 
     def get_center(self):
         """Gets the footprint's center coordinates"""
@@ -515,10 +1199,10 @@ class FootPrint:
         south = game_board[index.get_x()][index.get_y() - 1]
         east = game_board[index.get_x() + 1][index.get_y()]
         west = game_board[index.get_x() - 1][index.get_y()]
-        NW = game_board[index.get_x() + 1][index.get_y() - 1]
+        NW = game_board[index.get_x() - 1][index.get_y() + 1]
         NE = game_board[index.get_x() + 1][index.get_y() + 1]
         SW = game_board[index.get_x() - 1][index.get_y() - 1]
-        SE = game_board[index.get_x() - 1][index.get_y() + 1]
+        SE = game_board[index.get_x() + 1][index.get_y() - 1]
         footprint_r = {"north": north, "south": south, "east": east, "west": west, "NW": NW, "NE": NE,
                           "SW": SW, "SE": SE}
         return footprint_r
@@ -526,17 +1210,11 @@ class FootPrint:
     def generate_piece_coord(self, direction, center):
         """To get the coordinates of a footprint"""
         direction_list = self._direction_dict.get(direction)
-        x = center.get_x() + direction_list[0]
-        y = center.get_y() + direction_list[1]
-        index = Index(x, y)
-        return index
+        return index_at(center.get_x() + direction_list[0], center.get_y() + direction_list[1])
 
     def generate_destination(self, direction, destination):
         direction_list = self._direction_dict.get(direction)
-        x = destination.get_x() + direction_list[0]
-        y = destination.get_y() + direction_list[1]
-        index = Index(x, y)
-        return index
+        return index_at(destination.get_x() + direction_list[0], destination.get_y() + direction_list[1])
 
     def generate_all_piece_coords(self):
         coords_lst = []
@@ -561,6 +1239,49 @@ class FootPrint:
         return self._center.__str__()
 
 
+class BitFootPrint(FootPrint):
+    """Represents a game piece read from a BitBoard. The footprint is kept as a 3x3 black pattern and a 3x3 white
+    pattern, and the direction dictionary is the shared FOOTPRINT_DIRECTIONS"""
+
+    def __init__(self, center, black, white):
+        """Initializes the center position of a footprint and extracts its two patterns"""
+        square = get_square(center)
+        self._center = center
+        self._black_pattern = extract_pattern(black, square)
+        self._white_pattern = extract_pattern(white, square)
+        if self._black_pattern & CENTER_BIT:
+            self._center_piece = "B"
+        elif self._white_pattern & CENTER_BIT:
+            self._center_piece = "W"
+        else:
+            self._center_piece = "_"
+        self._footprint_ring = None
+        self._direction_dict = FOOTPRINT_DIRECTIONS
+
+    def get_patterns(self):
+        """Gets the black and white 3x3 patterns, with the footprint's corner at bit 0"""
+        return self._black_pattern, self._white_pattern
+
+    def validate_player_pieces(self, opposing_color):
+        if opposing_color == "B":
+            return self._black_pattern == 0
+        return self._white_pattern == 0
+
+    def get_footprint_coords(self):
+        """Used to get all coordinates of each piece in a footprint"""
+        if self._footprint_ring is None:
+            ring = {}
+            for direction, bit in PATTERN_BITS.items():
+                if self._black_pattern & bit:
+                    ring[direction] = "B"
+                elif self._white_pattern & bit:
+                    ring[direction] = "W"
+                else:
+                    ring[direction] = "_"
+            self._footprint_ring = ring
+        return self._footprint_ring
+
+
 class Player:
     """Represents a player by colors Black or White. Will communicate with the GessGame class to determine
     the player's turn, and allow the player to resign, and update game state"""
@@ -581,12 +1302,16 @@ class Player:
 
 class Index:
     """Represents the coordinates of a footprint. Will communicate with the Board class to give the coordinates
-    of each piece used. Set up as a class to use as an easy reference"""
+    of each piece used. Set up as a class to use as an easy reference. Inside the game squares are plain numbers
+    x * 20 + y, and every on-board Index handed out comes from the shared INDEXES, so no new ones are made"""
+
+    __slots__ = ("_x", "_y", "_square")
 
     def __init__(self, x, y):
         """Initializes the x and y coordinates"""
         self._x = x
         self._y = y
+        self._square = x * BOARD_SIZE + y
 
     def get_x(self):
         """Gets the footprint's x coordinate"""
@@ -596,6 +1321,26 @@ class Index:
         """Gets the footprint's y coordinate"""
         return self._y
 
+    def get_square(self):
+        """Gets the square number x * 20 + y"""
+        return self._square
+
+    def __eq__(self, other):
+        """Indexes are equal if they have the same coordinates"""
+        return isinstance(other, Index) and self._x == other._x and self._y == other._y
+
+    def __hash__(self):
+        """Hashes by coordinates, to match __eq__"""
+        return hash((self._x, self._y))
+
     def __str__(self):
         """To help convert coordinates to strings"""
-        return str(self._x) + " " + str(self._y)
\ No newline at end of file
+        return str(self._x) + " " + str(self._y)
+
+
+# One shared Index per square, indexed by square number
+INDEXES = tuple(Index(square // BOARD_SIZE, square % BOARD_SIZE) for square in range(BOARD_SIZE * BOARD_SIZE))
+
+# Time the make_move phases from the start when GESS_PROFILE is set, see Instrumentation
+if os.environ.get("GESS_PROFILE", "0") != "0":
+    import Instrumentation
@@ -0,0 +1,331 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from GessGame import GessGame, BitBoard, BOARD_SIZE, load_tables
+from GessEngine import GessEngine
+from GameReplay import SQUARES
+from ParallelSearch import encode_position, decode_position
+
+
+logger = logging.getLogger(__name__)
+
+
+def board_text(board):
+    """Writes a board as the 20 columns a through t separated by '/', each a string of 20 '_', 'B' or 'W' from row 1
+    up, the same layout Perft.parse_position reads"""
+    return "/".join("".join(board.get_square_piece(x * BOARD_SIZE + y) for y in range(BOARD_SIZE))
+                    for x in range(BOARD_SIZE))
+
+
+def _play_move(game, center, destination):
+    """Checks and plays a move on a hosted game, run on the server's thread pool"""
+    return game.make_move(center, destination)
+
+
+def _engine_move(position, time_limit):
+    """Searches a position in an engine worker process and returns its best move as notation"""
+    return GessEngine(time_limit=time_limit).search(decode_position(position))
+
+
+def _engine_context():
+    """Gets the multiprocessing context engine workers are started with. Forking the server once its event loop and
+    thread pool are running could copy a lock held by another thread into the child, so workers come from a fork
+    server that has already imported the engine, or are spawned where there is none"""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["GessEngine"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+class GameSession:
+    """Represents one hosted game: the GessGame, the connection sitting in each color's seat, and a lock so the
+    game's moves are checked and played one at a time"""
+
+    def __init__(self, game_id, engine=False):
+        """Initializes a game at the starting position. If engine is True the engine plays White"""
+        board = BitBoard()
+        board.make_board()
+        self._game_id = game_id
+        self._game = GessGame(board)
+        self._seats = {"B": None, "W": None}
+        self._engine = engine
+        self._lock = asyncio.Lock()
+
+    def get_game_id(self):
+        """Gets the game's id"""
+        return self._game_id
+
+    def get_game(self):
+        """Gets the hosted GessGame"""
+        return self._game
+
+    def get_lock(self):
+        """Gets the lock held while a move is checked and played"""
+        return self._lock
+
+    def get_seat(self, color):
+        """Gets the connection playing a color, or None if the seat is free"""
+        return self._seats[color]
+
+    def set_seat(self, color, writer):
+        """Seats a connection as a color, or frees the seat if writer is None"""
+        self._seats[color] = writer
+
+    def has_engine(self):
+        """Returns True if the engine plays White"""
+        return self._engine
+
+    def get_status(self):
+        """Gets the game's position, side to move and state as a message"""
+        game = self._game
+        return {"game": self._game_id, "turn": game.get_player_turn(), "state": game.get_game_state(),
+                "position": board_text(game.get_board())}
+
+
+class GessServer:
+    """Hosts many concurrent Gess games in one asyncio process. Clients send one JSON object per line over TCP and
+    get one JSON object per line back:
+
+    {"op": "new", "engine": false}                    create a game and sit as Black; with "engine" the engine is White
+    {"op": "join", "game": 1}                         sit as White in an open game
+    {"op": "move", "game": 1, "center": "c3", "destination": "c6"}
+    {"op": "resign", "game": 1}
+    {"op": "status", "game": 1}
+
+    Every move and resignation is broadcast to both seats as an "update" message with the new position. Requests may
+    carry an "id", which is echoed in the reply. Moves are checked and played on a thread pool and engine searches
+    run in worker processes, so a slow game never stalls the event loop"""
+
+    def __init__(self, host="127.0.0.1", port=8765, workers=4, engine_workers=1, engine_time=1.0):
+        """Initializes the server. workers is the size of the thread pool that plays moves, engine_workers the
+        number of processes searching engine moves, and engine_time the engine's time per move in seconds"""
+        self._host = host
+        self._port = port
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._engine_workers = engine_workers
+        self._engine_pool = None
+        self._engine_time = engine_time
+        self._sessions = {}
+        self._game_ids = itertools.count(1)
+        self._connections = {}
+        self._server = None
+        self._moves = 0
+        self._engine_tasks = set()
+
+    def get_port(self):
+        """Gets the port the server listens on, which is chosen by the system when it was created with port 0"""
+        return self._port
+
+    def get_game_count(self):
+        """Gets the number of hosted games, which leave once they finish or both seats are empty"""
+        return len(self._sessions)
+
+    def get_move_count(self):
+        """Gets the number of moves played on the server"""
+        return self._moves
+
+    async def start(self):
+        """Loads the move tables, so the first move played isn't kept waiting for them, sets up the engine workers
+        and starts listening for connections"""
+        load_tables()
+        if self._engine_pool is None:
+            self._engine_pool = ProcessPoolExecutor(max_workers=self._engine_workers, mp_context=_engine_context())
+        self._server = await asyncio.start_server(self._serve_client, self._host, self._port)
+        self._port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """Starts the server if needed and serves until cancelled"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Stops listening, cancels the engine replies still running and shuts down the thread pool and engine
+        workers"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        tasks = list(self._engine_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._executor.shutdown()
+        if self._engine_pool is not None:
+            self._engine_pool.shutdown()
+
+    async def _send(self, writer, message):
+        """Writes one message to a connection, ignoring a connection that has gone away"""
+        if writer is None or writer.is_closing():
+            return
+        writer.write(json.dumps(message).encode() + b"\n")
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _broadcast(self, session, message):
+        """Sends a message to both seats of a game"""
+        await asyncio.gather(self._send(session.get_seat("B"), message), self._send(session.get_seat("W"), message))
+
+    async def _serve_client(self, reader, writer):
+        """Reads requests from one connection until it closes, then frees its seats"""
+        self._connections[writer] = []
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ConnectionError:
+                    break
+                except (ValueError, asyncio.LimitOverrunError):
+                    # the rest of an overlong line can't be told apart from the next request, so hang up
+                    await self._send(writer, {"type": "error", "message": "request line too long"})
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = None
+                if not isinstance(request, dict):
+                    await self._send(writer, {"type": "error", "message": "requests must be JSON objects"})
+                    continue
+                try:
+                    reply = await self._dispatch(request, writer)
+                except (KeyError, TypeError) as error:
+                    reply = {"type": "error", "message": "bad request: missing or wrong field " + str(error)}
+                if "id" in request:
+                    reply["id"] = request["id"]
+                await self._send(writer, reply)
+        finally:
+            for session, color in self._connections.pop(writer):
+                if session.get_seat(color) is writer:
+                    session.set_seat(color, None)
+                    await self._broadcast(session, {"type": "left", "game": session.get_game_id(), "color": color})
+                    self._release_if_over(session)
+            writer.close()
+
+    async def _dispatch(self, request, writer):
+        """Handles one request and returns the reply to the connection that sent it"""
+        op = request["op"]
+        if op == "new":
+            session = GameSession(next(self._game_ids), bool(request.get("engine")))
+            self._sessions[session.get_game_id()] = session
+            session.set_seat("B", writer)
+            self._connections[writer].append((session, "B"))
+            return dict(session.get_status(), type="created", color="B")
+
+        session = self._sessions.get(request.get("game"))
+        if session is None:
+            return {"type": "error", "message": "no such game"}
+        if op == "status":
+            return dict(session.get_status(), type="status")
+        if op == "join":
+            if session.has_engine() or session.get_seat("W") is not None:
+                return {"type": "error", "message": "game is full"}
+            session.set_seat("W", writer)
+            self._connections[writer].append((session, "W"))
+            await self._send(session.get_seat("B"), {"type": "joined", "game": session.get_game_id(), "color": "W"})
+            return dict(session.get_status(), type="joined", color="W")
+        if op == "move":
+            return await self._move(session, writer, request["center"], request["destination"])
+        if op == "resign":
+            color = self._color_of(session, writer)
+            if color is None:
+                return {"type": "error", "message": "not a player in this game"}
+            async with session.get_lock():
+                game = session.get_game()
+                if game.get_game_state() == "UNFINISHED":
+                    game.resign_game(color)
+            await self._broadcast(session, dict(session.get_status(), type="update", resigned=color))
+            self._release_if_over(session)
+            return {"type": "ok"}
+        return {"type": "error", "message": "unknown op " + str(op)}
+
+    def _release_if_over(self, session):
+        """Stops hosting a game once it has finished or nobody is seated in it, so a long-running server doesn't keep
+        every game it ever hosted. An engine reply still running holds the session until it is done"""
+        finished = session.get_game().get_game_state() != "UNFINISHED"
+        if not finished and (session.get_seat("B") is not None or session.get_seat("W") is not None):
+            return
+        self._sessions.pop(session.get_game_id(), None)
+        for color in ("B", "W"):
+            seated = self._connections.get(session.get_seat(color))
+            if seated is not None and (session, color) in seated:
+                seated.remove((session, color))
+
+    def _color_of(self, session, writer):
+        """Gets the color a connection plays in a game, or None"""
+        for color in ("B", "W"):
+            if session.get_seat(color) is writer:
+                return color
+        return None
+
+    async def _move(self, session, writer, center, destination):
+        """Plays a move sent by a connection and broadcasts the new position"""
+        if center not in SQUARES or destination not in SQUARES:
+            return {"type": "error", "message": "unknown square"}
+        game = session.get_game()
+        async with session.get_lock():
+            color = game.get_player_turn()
+            if session.get_seat(color) is not writer:
+                return {"type": "error", "message": "not your turn"}
+            loop = asyncio.get_running_loop()
+            if not await loop.run_in_executor(self._executor, _play_move, game, center, destination):
+                return {"type": "error", "message": "illegal move"}
+            self._moves += 1
+            update = dict(session.get_status(), type="update", move=[center, destination], player=color)
+        await self._broadcast(session, update)
+        self._release_if_over(session)
+        if session.has_engine() and game.get_game_state() == "UNFINISHED":
+            # the server holds on to the task, so it isn't garbage collected while the engine is thinking
+            task = asyncio.create_task(self._engine_reply(session))
+            self._engine_tasks.add(task)
+            task.add_done_callback(self._engine_reply_done)
+        return {"type": "ok"}
+
+    def _engine_reply_done(self, task):
+        """Forgets a finished engine reply, logging the error it failed with, if any"""
+        self._engine_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("engine reply failed", exc_info=task.exception())
+
+    async def _engine_reply(self, session):
+        """Searches and plays the engine's move in an engine game"""
+        game = session.get_game()
+        loop = asyncio.get_running_loop()
+        async with session.get_lock():
+            position = encode_position(game)
+            move = await loop.run_in_executor(self._engine_pool, _engine_move, position, self._engine_time)
+            if move is None or not await loop.run_in_executor(self._executor, _play_move, game, *move):
+                return
+            self._moves += 1
+            update = dict(session.get_status(), type="update", move=list(move), player="W")
+        await self._broadcast(session, update)
+        self._release_if_over(session)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host Gess games over TCP with a JSON-lines protocol")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=4, help="threads that check and play moves")
+    parser.add_argument("--engine-workers", type=int, default=1, help="processes that search engine moves")
+    parser.add_argument("--engine-time", type=float, default=1.0, help="engine seconds per move")
+    args = parser.parse_args()
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(message)s")
+    server = GessServer(args.host, args.port, args.workers, args.engine_workers, args.engine_time)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
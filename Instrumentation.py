@@ -0,0 +1,197 @@
+import atexit
+import functools
+import json
+import multiprocessing
+import multiprocessing.util
+import os
+import sys
+import time
+
+import GessGame
+
+
+# The methods timed for each phase of GessGame.make_move, as (phase, class, method name). A method is wrapped on
+# every listed class that defines it, so BitBoard's overrides are timed as well as Board's
+PHASES = (("make_move", (GessGame.GessGame,), "make_move"),
+          ("convert_to_index", (GessGame.Board,), "convert_to_index"),
+          ("footprint", (GessGame.Board, GessGame.BitBoard), "generate_footprint"),
+          ("move_allowed", (GessGame.GessGame,), "move_allowed"),
+          ("is_obstructed", (GessGame.GessGame,), "is_obstructed"),
+          ("update_board", (GessGame.Board, GessGame.BitBoard), "update_board"),
+          ("game_state", (GessGame.GessGame,), "get_game_state"))
+
+# Latencies are counted in buckets by the bit length of their nanoseconds, so bucket n holds 2**(n-1) to 2**n - 1
+HISTOGRAM_BUCKETS = 48
+
+
+class PhaseStats:
+    """Represents the call count, total time and latency histogram of one phase"""
+
+    def __init__(self, phase):
+        """Initializes empty statistics"""
+        self._phase = phase
+        self.reset()
+
+    def reset(self):
+        """Clears the statistics"""
+        self._calls = 0
+        self._total = 0
+        self._max = 0
+        self._histogram = [0] * HISTOGRAM_BUCKETS
+
+    def record(self, elapsed):
+        """Records one call that took elapsed nanoseconds"""
+        self._calls += 1
+        self._total += elapsed
+        if elapsed > self._max:
+            self._max = elapsed
+        self._histogram[min(elapsed.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def get_calls(self):
+        """Gets the number of calls recorded"""
+        return self._calls
+
+    def get_percentile(self, fraction):
+        """Estimates the latency in nanoseconds below which the given fraction of calls fall, as the upper bound of
+        the histogram bucket it lands in"""
+        wanted = fraction * self._calls
+        seen = 0
+        for bucket, count in enumerate(self._histogram):
+            seen += count
+            if count and seen >= wanted:
+                return min((1 << bucket) - 1, self._max)
+        return self._max
+
+    def to_dict(self):
+        """Gets the statistics as a dictionary, with times in microseconds and the histogram keyed by each
+        bucket's upper bound in nanoseconds"""
+        return {"phase": self._phase, "calls": self._calls, "total_us": self._total / 1000,
+                "mean_us": self._total / self._calls / 1000 if self._calls else 0.0,
+                "p50_us": self.get_percentile(0.5) / 1000, "p99_us": self.get_percentile(0.99) / 1000,
+                "max_us": self._max / 1000,
+                "histogram": {str((1 << bucket) - 1): count for bucket, count in enumerate(self._histogram) if count}}
+
+
+_stats = {phase: PhaseStats(phase) for phase, classes, name in PHASES}
+_originals = []
+
+
+def _timed(method, stats):
+    """Wraps a method so every call's latency is recorded in stats"""
+    clock = time.perf_counter_ns
+
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        start = clock()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            stats.record(clock() - start)
+    return timed
+
+
+def is_enabled():
+    """Returns True if the phases are being timed"""
+    return bool(_originals)
+
+
+def enable():
+    """Starts timing the phases by wrapping their methods. While disabled the methods are the plain originals, so
+    instrumentation costs nothing when it is off"""
+    if _originals:
+        return
+    for phase, classes, name in PHASES:
+        for cls in classes:
+            if name in cls.__dict__:
+                method = cls.__dict__[name]
+                _originals.append((cls, name, method))
+                setattr(cls, name, _timed(method, _stats[phase]))
+
+
+def disable():
+    """Stops timing the phases, putting the original methods back. The statistics are kept"""
+    while _originals:
+        cls, name, method = _originals.pop()
+        setattr(cls, name, method)
+
+
+def reset():
+    """Clears the statistics of every phase"""
+    for stats in _stats.values():
+        stats.reset()
+
+
+def get_stats():
+    """Gets the statistics of every phase as a list of dictionaries"""
+    return [_stats[phase].to_dict() for phase, classes, name in PHASES]
+
+
+def report_text():
+    """Gets the statistics as a plain-text table"""
+    lines = ["%-17s %10s %12s %10s %10s %10s %10s" % ("phase", "calls", "total ms", "mean us", "p50 us", "p99 us",
+                                                      "max us")]
+    for stats in get_stats():
+        lines.append("%-17s %10d %12.3f %10.2f %10.2f %10.2f %10.2f" % (
+            stats["phase"], stats["calls"], stats["total_us"] / 1000, stats["mean_us"], stats["p50_us"],
+            stats["p99_us"], stats["max_us"]))
+    return "\n".join(lines)
+
+
+def report_json():
+    """Gets the statistics as a JSON string"""
+    return json.dumps(get_stats(), indent=2)
+
+
+def write_report(path):
+    """Writes the statistics to a file, as JSON if its name ends in .json and as a text table otherwise"""
+    with open(path, "w") as file:
+        if path.endswith(".json"):
+            file.write(report_json())
+        else:
+            file.write(report_text() + "\n")
+
+
+def get_report_path(path):
+    """Gets the file this process writes its report to. The process that enabled timing from the environment writes
+    to path itself; worker processes, which inherit the setting, put their process id before the extension, so the
+    reports of a pool's workers don't overwrite each other"""
+    main_pid = os.environ.get("GESS_PROFILE_PID")
+    if main_pid is None or int(main_pid) == os.getpid():
+        return path
+    root, extension = os.path.splitext(path)
+    return "%s.%d%s" % (root, os.getpid(), extension)
+
+
+def _write_process_report(path):
+    """Writes this process's report at exit, unless it never timed a call, like an idle worker"""
+    if any(stats.get_calls() for stats in _stats.values()):
+        write_report(get_report_path(path))
+
+
+def _register_report(path):
+    """Arranges for this process's report to be written when it exits"""
+    atexit.unregister(_write_process_report)
+    atexit.register(_write_process_report, path)
+    if get_report_path(path) != path:
+        # pool workers leave through os._exit, which skips atexit but runs multiprocessing's finalizers
+        multiprocessing.util.Finalize(None, _write_process_report, args=(path,), exitpriority=0)
+
+
+def enable_from_environment():
+    """Enables timing if the GESS_PROFILE environment variable is set. If it names a file rather than being "1",
+    the report is written there when the process exits, and each worker process it starts writes its own report
+    beside it, named with the worker's process id"""
+    setting = os.environ.get("GESS_PROFILE", "")
+    if not setting or setting == "0":
+        return
+    enable()
+    if setting != "1":
+        os.environ.setdefault("GESS_PROFILE_PID", str(os.getpid()))
+        _register_report(setting)
+        # a forked worker starts its statistics afresh rather than repeating the parent's. multiprocessing clears
+        # its finalizers in the children it forks, so they register again once it has
+        os.register_at_fork(after_in_child=lambda: (reset(), _register_report(setting)))
+        multiprocessing.util.register_after_fork(sys.modules[__name__], lambda module: _register_report(setting))
+
+
+enable_from_environment()
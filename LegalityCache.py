@@ -0,0 +1,151 @@
+from collections import OrderedDict
+
+from GessGame import BOARD_SIZE, FOOTPRINT_REGIONS, REACH_REGIONS, INDEXES, dilate, footprint_steps, get_square, \
+    ring_centers
+
+
+ALL_SQUARES = (1 << (BOARD_SIZE * BOARD_SIZE)) - 1
+
+
+def footprint_destinations(black, white, player, square):
+    """Finds every legal destination of player's footprint centered on square, from the same footprint_steps as
+    GessGame.legal_moves, and the squares the answer depends on. Returns (destinations, depends): a frozenset of
+    target squares and a bit mask such that the answer holds for any position that differs only outside the mask"""
+    if player == "B":
+        own, opposing = black, white
+    else:
+        own, opposing = white, black
+    depends = FOOTPRINT_REGIONS[square]
+    x, y = divmod(square, BOARD_SIZE)
+    if not (1 <= x <= BOARD_SIZE - 2 and 1 <= y <= BOARD_SIZE - 2):
+        return frozenset(), depends
+    rings = ring_centers(own, black | white)
+
+    destinations = []
+    for target, edge_mask, reach, safe_rings, legal in footprint_steps(own, opposing, rings, square):
+        if safe_rings:
+            # the move is legal as long as this ring, out of reach of the move, is still there
+            destinations.append(target)
+            depends |= FOOTPRINT_REGIONS[(safe_rings & -safe_rings).bit_length() - 1]
+        elif legal:
+            destinations.append(target)
+            depends |= dilate(REACH_REGIONS[square] | reach)
+        else:
+            # a ring made anywhere else on the board would make this move legal
+            depends = ALL_SQUARES
+        depends |= edge_mask
+    return frozenset(destinations), depends
+
+
+class LegalityCache:
+    """Answers repeated legality questions about a GessGame's position from a bounded LRU cache of each footprint's
+    legal destinations, keyed by the board's hash, the side to move and the footprint's center.
+
+    Each entry remembers the squares its answer depends on. When the board changes, by update_board or by taking a
+    move back, the cache works out the changed squares from the bitboards it last saw, and carries every entry of
+    the old position whose squares did not change over to the new one. Only the entries the change touched are
+    dropped"""
+
+    def __init__(self, game, max_entries=4096):
+        """Initializes an empty cache for game holding at most max_entries footprints"""
+        self._game = game
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._keys_by_hash = {}
+        board = game.get_board()
+        self._hash = board.get_hash()
+        self._black, self._white = board.get_planes()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._carried = 0
+        self._invalidated = 0
+
+    def __len__(self):
+        """Gets the number of cached footprints"""
+        return len(self._entries)
+
+    def get_stats(self):
+        """Gets the hit, miss, eviction, carried-over and invalidated counts"""
+        return {"hits": self._hits, "misses": self._misses, "evictions": self._evictions, "carried": self._carried,
+                "invalidated": self._invalidated, "entries": len(self._entries)}
+
+    def clear(self):
+        """Empties the cache and resets the counters"""
+        self._entries.clear()
+        self._keys_by_hash.clear()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._carried = 0
+        self._invalidated = 0
+
+    def _store(self, key, destinations, depends):
+        """Adds an entry, evicting the least recently used one if the cache is full"""
+        self._entries[key] = (destinations, depends)
+        self._keys_by_hash.setdefault(key[0], set()).add(key)
+        if len(self._entries) > self._max_entries:
+            old_key, old_entry = self._entries.popitem(last=False)
+            keys = self._keys_by_hash[old_key[0]]
+            keys.discard(old_key)
+            if not keys:
+                del self._keys_by_hash[old_key[0]]
+            self._evictions += 1
+
+    def _follow_board(self):
+        """Carries the entries of the last position seen over to the board's current one, if it has changed"""
+        board = self._game.get_board()
+        new_hash = board.get_hash()
+        if new_hash == self._hash:
+            return
+        black, white = board.get_planes()
+        changed = (black ^ self._black) | (white ^ self._white)
+        for key in list(self._keys_by_hash.get(self._hash, ())):
+            entry = self._entries.get(key)
+            if entry is None:
+                # evicted to make room for an entry carried over before it
+                continue
+            destinations, depends = entry
+            if depends & changed:
+                self._invalidated += 1
+                continue
+            new_key = (new_hash, key[1], key[2])
+            if new_key not in self._entries:
+                self._store(new_key, destinations, depends)
+                self._carried += 1
+        self._hash = new_hash
+        self._black = black
+        self._white = white
+
+    def get_destination_squares(self, square):
+        """Gets the legal destinations of the side to move's footprint centered on square as a frozenset of squares"""
+        self._follow_board()
+        key = (self._hash, self._game.get_player_turn(), square)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+        self._misses += 1
+        destinations, depends = footprint_destinations(self._black, self._white, key[1], square)
+        self._store(key, destinations, depends)
+        return destinations
+
+    def get_destinations(self, center):
+        """Gets the legal destinations of the footprint centered on center, such as "c3", as a list of strings"""
+        board = self._game.get_board()
+        squares = self.get_destination_squares(get_square(board.convert_to_index(center)))
+        return [board.convert_to_string(INDEXES[target]) for target in sorted(squares)]
+
+    def is_legal(self, center, destination):
+        """Returns True if make_move would accept moving the footprint centered on center to destination, such as
+        ("c3", "c6"), without changing the game"""
+        if self._game.get_game_state() != "UNFINISHED":
+            return False
+        board = self._game.get_board()
+        center_index = board.convert_to_index(center)
+        destination_index = board.convert_to_index(destination)
+        for index in (center_index, destination_index):
+            if not (0 <= index.get_x() < BOARD_SIZE and 0 <= index.get_y() < BOARD_SIZE):
+                return False
+        return get_square(destination_index) in self.get_destination_squares(get_square(center_index))
@@ -0,0 +1,126 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from GessGame import GessGame, BitBoard
+
+
+def build_script(moves=40, seed=1):
+    """Plays a seeded random game from the starting position and returns its moves as (center, destination)
+    notation pairs, so every simulated game can replay it without working out moves on the client"""
+    board = BitBoard()
+    board.make_board()
+    game = GessGame(board)
+    generator = random.Random(seed)
+    script = []
+    while len(script) < moves and game.get_game_state() == "UNFINISHED":
+        legal = list(game.legal_moves(game.get_player_turn()))
+        if not legal:
+            break
+        center, destination = generator.choice(legal)
+        script.append((board.convert_to_string(center), board.convert_to_string(destination)))
+        game.push_move(center, destination)
+    return script
+
+
+class _Connection:
+    """One client connection speaking the server's JSON-lines protocol"""
+
+    def __init__(self, reader, writer):
+        """Initializes the connection from an open stream pair"""
+        self._reader = reader
+        self._writer = writer
+
+    async def send(self, message):
+        """Sends one request"""
+        self._writer.write(json.dumps(message).encode() + b"\n")
+        await self._writer.drain()
+
+    async def receive(self, message_type):
+        """Reads messages until one of the given type arrives, and returns it"""
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                raise ConnectionError("server closed the connection")
+            message = json.loads(line)
+            if message["type"] == "error":
+                raise RuntimeError(message["message"])
+            if message["type"] == message_type:
+                return message
+
+    async def close(self):
+        """Closes the connection"""
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+async def _play_game(host, port, script, latencies):
+    """Plays the script as one game over two connections, one per color, recording for each move the seconds from
+    sending it to the mover receiving its update"""
+    black = _Connection(*await asyncio.open_connection(host, port))
+    white = _Connection(*await asyncio.open_connection(host, port))
+    try:
+        await black.send({"op": "new"})
+        game_id = (await black.receive("created"))["game"]
+        await white.send({"op": "join", "game": game_id})
+        await white.receive("joined")
+        for number, (center, destination) in enumerate(script):
+            if number % 2 == 0:
+                mover, other = black, white
+            else:
+                mover, other = white, black
+            start = time.perf_counter()
+            await mover.send({"op": "move", "game": game_id, "center": center, "destination": destination})
+            await mover.receive("update")
+            latencies.append(time.perf_counter() - start)
+            await other.receive("update")
+    finally:
+        await black.close()
+        await white.close()
+
+
+def _percentile(values, fraction):
+    """Gets the value below which the given fraction of the sorted values fall"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def run_load(host="127.0.0.1", port=8765, games=100, moves=40, concurrency=None, seed=1):
+    """Plays games simulated games against a running GessServer, at most concurrency of them at once (all of them by
+    default), and returns the moves/s and the median and p99 move latency in milliseconds"""
+    script = build_script(moves, seed)
+    limit = asyncio.Semaphore(concurrency or games)
+    latencies = []
+
+    async def limited():
+        async with limit:
+            await _play_game(host, port, script, latencies)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited() for game in range(games)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {"games": games, "moves": len(latencies), "seconds": elapsed,
+            "moves_per_second": len(latencies) / elapsed if elapsed > 0 else 0.0,
+            "p50_ms": _percentile(latencies, 0.5) * 1000, "p99_ms": _percentile(latencies, 0.99) * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure a GessServer's moves/s and move latency")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--games", type=int, default=100, help="games to play")
+    parser.add_argument("--moves", type=int, default=40, help="moves per game")
+    parser.add_argument("--concurrency", type=int, default=None, help="games in flight at once, defaults to all")
+    args = parser.parse_args()
+    report = asyncio.run(run_load(args.host, args.port, args.games, args.moves, args.concurrency))
+    print("%d games, %d moves in %.2fs: %.0f moves/s, p50 %.2f ms, p99 %.2f ms" % (
+        report["games"], report["moves"], report["seconds"], report["moves_per_second"], report["p50_ms"],
+        report["p99_ms"]))
+
+
+if __name__ == "__main__":
+    main()
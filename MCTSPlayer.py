@@ -0,0 +1,358 @@
+import math
+import random
+import time
+from array import array
+
+from GessGame import GessGame, BitBoard, INDEXES, BOARD_SIZE, CENTER_BIT, DIRECTION_BITS, FOOTPRINT_REGIONS, \
+    apply_move, extract_pattern, get_rays, ring_centers
+from TranspositionTable import encode_move, decode_move
+
+
+# Random footprints tried per playout move before the playout is cut short and scored as it stands
+PLAYOUT_TRIES = 64
+
+INTERIOR_SQUARES = tuple(x * BOARD_SIZE + y for x in range(1, BOARD_SIZE - 1) for y in range(1, BOARD_SIZE - 1))
+
+
+def _build_pattern_directions():
+    """Maps every 3x3 pattern that can appear under a footprint to the directions of DIRECTION_STEPS it has a stone
+    on, so a playout picks a direction without looping over all eight"""
+    patterns = {}
+    for bits in range(512):
+        pattern = 0
+        for cell in range(9):
+            if bits >> cell & 1:
+                pattern |= 1 << (cell // 3 * BOARD_SIZE + cell % 3)
+        patterns[pattern] = tuple(direction for direction, bit in enumerate(DIRECTION_BITS) if pattern & bit)
+    return patterns
+
+
+PATTERN_DIRECTIONS = _build_pattern_directions()
+
+
+def playout(black, white, player, generator, max_plies):
+    """Plays random moves from a position straight on the bitboards, without building any game objects, and
+    returns the result for player in half points: 2 for a win, 1 for a draw and 0 for a loss. Each move is a random
+    footprint of the mover's, a random direction it has a stone on and a random length, cut short at the first
+    stone in the way, which is where a real slide would stop. If max_plies pass, or no move is found after
+    PLAYOUT_TRIES footprints, the side with more rings, then more stones, wins"""
+    rays = get_rays()
+    mover = player
+    for ply in range(max_plies):
+        if mover == "B":
+            own, opposing = black, white
+        else:
+            own, opposing = white, black
+        occupied = black | white
+        for attempt in range(PLAYOUT_TRIES):
+            origin = generator.choice(INTERIOR_SQUARES)
+            own_pattern = extract_pattern(own, origin)
+            if not own_pattern or extract_pattern(opposing, origin):
+                continue
+            directions = PATTERN_DIRECTIONS[own_pattern]
+            if not directions:
+                continue
+            ray = rays[origin][generator.choice(directions)]
+            if not ray:
+                continue
+            if own_pattern & CENTER_BIT:
+                length = generator.randrange(len(ray))
+            else:
+                length = generator.randrange(min(3, len(ray)))
+            lifted = occupied & ~FOOTPRINT_REGIONS[origin]
+            step = 0
+            while step < length and not lifted & ray[step][1]:
+                step += 1
+            new_black, new_white = apply_move(black, white, origin, ray[step][0])
+            if mover == "B" and ring_centers(new_black, new_black | new_white):
+                break
+            if mover == "W" and ring_centers(new_white, new_black | new_white):
+                break
+        else:
+            break
+        black, white = new_black, new_white
+        if mover == "B":
+            mover = "W"
+            if not ring_centers(white, black | white):
+                return 2 if player == "B" else 0
+        else:
+            mover = "B"
+            if not ring_centers(black, black | white):
+                return 2 if player == "W" else 0
+
+    occupied = black | white
+    black_score = (ring_centers(black, occupied).bit_count(), black.bit_count())
+    white_score = (ring_centers(white, occupied).bit_count(), white.bit_count())
+    if black_score == white_score:
+        return 1
+    if (black_score > white_score) == (player == "B"):
+        return 2
+    return 0
+
+
+class MCTSPlayer:
+    """Plays Gess with Monte Carlo tree search: UCT picks a path down the tree, the leaf is expanded, a batch of
+    random playouts is run from it and the results are backed up the path. The move played is the root move with the
+    most visits.
+
+    A position has hundreds of moves, far more than a search can visit, so selection uses progressive widening: a
+    node's children are ordered by the material they win when it is expanded, and UCT only looks at the first
+    1 + widening * sqrt(iterations through the node) of them, so visits concentrate on a few moves and new ones are
+    let in as the node is searched more.
+
+    The tree is kept in parallel arrays rather than node objects, 18 bytes a node: visits, half-point wins for the
+    side that made the node's move, the move, and where the node's children start and how many there are. A node's
+    children sit next to each other. After a search the tree is kept, and the next search starts from the subtree
+    for the position it is given, if that position is up to two moves below the old root"""
+
+    def __init__(self, playouts=None, time_limit=1.0, batch=4, exploration=1.4, max_playout_plies=60, seed=None,
+                 widening=1.0):
+        """Initializes the search budgets. A search stops after playouts playouts or time_limit seconds, whichever
+        comes first, and either may be None for no limit. batch playouts are run from each new leaf, and widening
+        sets how quickly a node's later children are let into selection"""
+        if playouts is None and time_limit is None:
+            raise ValueError("set a playout budget, a time limit or both")
+        self._playout_limit = playouts
+        self._time_limit = time_limit
+        self._batch = batch
+        self._exploration = exploration
+        self._widening = widening
+        self._max_playout_plies = max_playout_plies
+        self._generator = random.Random(seed)
+        self._root_position = None
+        self._clear_tree()
+        self._playouts = 0
+        self._elapsed = 0.0
+        self._reused = 0
+
+    def _clear_tree(self):
+        """Empties the tree down to a single root node"""
+        self._visits = array("I", [0])
+        self._wins = array("I", [0])
+        self._moves = array("I", [0])
+        self._first_child = array("i", [0])
+        self._child_count = array("H", [0])
+
+    def get_node_count(self):
+        """Gets the number of nodes in the tree"""
+        return len(self._visits)
+
+    def get_bytes_per_node(self):
+        """Gets the bytes each node takes across the tree's arrays"""
+        return sum(column.itemsize for column in (self._visits, self._wins, self._moves, self._first_child,
+                                                  self._child_count))
+
+    def get_memory_bytes(self):
+        """Gets the bytes taken by the tree's nodes"""
+        return self.get_node_count() * self.get_bytes_per_node()
+
+    def get_playouts(self):
+        """Gets the number of playouts run by the last search"""
+        return self._playouts
+
+    def get_playouts_per_second(self):
+        """Gets the playout speed of the last search"""
+        if self._elapsed <= 0:
+            return 0.0
+        return self._playouts / self._elapsed
+
+    def get_report(self):
+        """Gets the statistics of the last search as a dictionary"""
+        return {"playouts": self._playouts, "seconds": self._elapsed,
+                "playouts_per_second": self.get_playouts_per_second(), "nodes": self.get_node_count(),
+                "reused_nodes": self._reused, "bytes_per_node": self.get_bytes_per_node(),
+                "memory_bytes": self.get_memory_bytes(), "root_visits": self._visits[0]}
+
+    def search(self, game):
+        """Searches the game's position and returns the best move as a (center, destination) pair of strings that
+        GessGame.make_move accepts, or None if the side to move has no legal move. The game is not changed"""
+        black, white = game.get_board().get_planes()
+        player = game.get_player_turn()
+        self._reuse_tree(black, white, player)
+        self._root_position = (black, white, player)
+        board = BitBoard()
+        board.set_planes(black, white)
+        work = GessGame(board)
+        work.set_player_turn(player)
+
+        start = time.perf_counter()
+        deadline = None
+        if self._time_limit is not None:
+            deadline = start + self._time_limit
+        self._playouts = 0
+        iterations = 0
+        while self._playout_limit is None or self._playouts < self._playout_limit:
+            if deadline is not None and iterations & 7 == 0 and time.perf_counter() >= deadline:
+                break
+            iterations += 1
+            if not self._iterate(work, board):
+                break
+        self._elapsed = time.perf_counter() - start
+
+        if not self._child_count[0]:
+            moves = list(work.legal_move_squares(player))
+            if not moves:
+                return None
+            origin, target = moves[0]
+        else:
+            first = self._first_child[0]
+            best = max(range(first, first + self._child_count[0]), key=self._visits.__getitem__)
+            origin, target = decode_move(self._moves[best])
+        return board.convert_to_string(INDEXES[origin]), board.convert_to_string(INDEXES[target])
+
+    def _iterate(self, game, board):
+        """Runs one selection, expansion, batch of playouts and backup. Returns False if the root has no moves"""
+        visits = self._visits
+        child_count = self._child_count
+        path = [0]
+        node = 0
+        while child_count[node]:
+            node = self._select(node)
+            origin, target = decode_move(self._moves[node])
+            game.push_move(INDEXES[origin], INDEXES[target])
+            path.append(node)
+
+        player = game.get_player_turn()
+        if not board.has_ring(player):
+            # the side to move has lost, so every playout from here is a loss for it
+            result = 0
+        else:
+            if node == 0 or visits[node]:
+                if self._expand(node, game, player):
+                    node = self._select(node)
+                    origin, target = decode_move(self._moves[node])
+                    game.push_move(INDEXES[origin], INDEXES[target])
+                    path.append(node)
+                    player = game.get_player_turn()
+                elif node == 0:
+                    return False
+            black, white = board.get_planes()
+            result = 0
+            if board.has_ring(player):
+                for playout_number in range(self._batch):
+                    result += playout(black, white, player, self._generator, self._max_playout_plies)
+        for move_number in range(len(path) - 1):
+            game.unmake_move()
+        self._playouts += self._batch
+
+        # result is in half points for the side to move at the leaf; each node scores for the side that moved into it
+        result = 2 * self._batch - result
+        wins = self._wins
+        for node in reversed(path):
+            visits[node] += self._batch
+            wins[node] += result
+            result = 2 * self._batch - result
+        return True
+
+    def _select(self, node):
+        """Picks the child of node with the best UCT score, or the first child not yet visited, from the children
+        progressive widening lets in"""
+        visits = self._visits
+        wins = self._wins
+        first = self._first_child[node]
+        scale = self._exploration * math.sqrt(math.log(max(1, visits[node])))
+        widened = 1 + int(self._widening * math.sqrt(visits[node] / self._batch))
+        best = first
+        best_score = -1.0
+        for child in range(first, first + min(widened, self._child_count[node])):
+            child_visits = visits[child]
+            if not child_visits:
+                return child
+            score = wins[child] / (2 * child_visits) + scale / math.sqrt(child_visits)
+            if score > best_score:
+                best_score = score
+                best = child
+        return best
+
+    def _expand(self, node, game, player):
+        """Adds a child for every legal move of node's position, ordered by the stones the mover is ahead by after
+        the move, with ties in random order, so progressive widening tries captures first. Returns False if there
+        are no legal moves"""
+        black, white = game.get_board().get_planes()
+        sign = 1 if player == "B" else -1
+        ordered = []
+        for origin, target in game.legal_move_squares(player):
+            new_black, new_white = apply_move(black, white, origin, target)
+            lead = sign * (new_black.bit_count() - new_white.bit_count())
+            ordered.append((-lead, self._generator.random(), encode_move(origin, target)))
+        if not ordered:
+            return False
+        ordered.sort()
+        moves = [move for lead, tie, move in ordered]
+        self._first_child[node] = len(self._visits)
+        self._child_count[node] = len(moves)
+        self._moves.extend(moves)
+        zeros = array("I", bytes(4 * len(moves)))
+        self._visits.extend(zeros)
+        self._wins.extend(zeros)
+        self._first_child.extend(array("i", bytes(4 * len(moves))))
+        self._child_count.extend(array("H", bytes(2 * len(moves))))
+        return True
+
+    def _reuse_tree(self, black, white, player):
+        """Keeps the subtree for the given position if it is the old root or up to two moves below it, copied to
+        the front of fresh arrays, and otherwise starts an empty tree"""
+        self._reused = 0
+        if self._root_position is None:
+            self._clear_tree()
+            return
+        old_black, old_white, old_player = self._root_position
+        found = None
+        if (old_black, old_white, old_player) == (black, white, player):
+            found = 0
+        candidates = [(0, old_black, old_white)]
+        if old_player == "B":
+            other_player = "W"
+        else:
+            other_player = "B"
+        for level, level_player in enumerate((other_player, old_player)):
+            if found is not None:
+                break
+            next_candidates = []
+            for node, node_black, node_white in candidates:
+                first = self._first_child[node]
+                for child in range(first, first + self._child_count[node]):
+                    if not self._visits[child]:
+                        continue
+                    origin, target = decode_move(self._moves[child])
+                    child_black, child_white = apply_move(node_black, node_white, origin, target)
+                    if (child_black, child_white) == (black, white) and player == level_player:
+                        found = child
+                        break
+                    next_candidates.append((child, child_black, child_white))
+                if found is not None:
+                    break
+            candidates = next_candidates
+        if found is None:
+            self._clear_tree()
+            return
+        self._copy_subtree(found)
+        self._reused = self.get_node_count()
+
+    def _copy_subtree(self, root):
+        """Rebuilds the arrays with only the subtree under root, root first and each node's children together"""
+        visits = array("I", [self._visits[root]])
+        wins = array("I", [self._wins[root]])
+        moves = array("I", [0])
+        first_child = array("i", [0])
+        child_count = array("H", [0])
+        queue = [(root, 0)]
+        for old, new in queue:
+            count = self._child_count[old]
+            if not count:
+                continue
+            first = self._first_child[old]
+            first_child[new] = len(visits)
+            child_count[new] = count
+            for child in range(first, first + count):
+                queue.append((child, len(visits)))
+                visits.append(self._visits[child])
+                wins.append(self._wins[child])
+                moves.append(self._moves[child])
+                first_child.append(0)
+                child_count.append(0)
+        self._visits = visits
+        self._wins = wins
+        self._moves = moves
+        self._first_child = first_child
+        self._child_count = child_count
@@ -0,0 +1,173 @@
+import argparse
+import mmap
+import struct
+
+from GessGame import INDEXES, SIDE_KEY, apply_move, check_move, hash_planes, ring_centers
+from GameReplay import SQUARES, START_POSITION, parse_record, read_records
+from RecordFile import GAME_MAGIC, GameRecordReader
+
+
+BOOK_MAGIC = b"GESSBOK1"
+
+# Header: magic, number of entries, number of bucket bits
+_HEADER = struct.Struct("<8sIB3x")
+# Entry: position hash, origin and target squares, times played, Black wins, White wins
+_ENTRY = struct.Struct("<QHHIII")
+
+
+def _position_hashes(moves, plies):
+    """Yields (hash, origin, target, player) for the first plies moves of a game played from the starting position,
+    stopping at the first illegal move or once a side has no ring left. The hash includes the side to move, as
+    GessGame.get_position_hash does"""
+    black, white = START_POSITION
+    position_hash = hash_planes(black, white)
+    player = "B"
+    for origin, target in moves[:plies]:
+        if not check_move(black, white, player, origin, target):
+            return
+        if player == "B":
+            yield position_hash, origin, target, player
+        else:
+            yield position_hash ^ SIDE_KEY, origin, target, player
+        new_black, new_white = apply_move(black, white, origin, target)
+        position_hash ^= hash_planes(black ^ new_black, white ^ new_white)
+        black, white = new_black, new_white
+        if not ring_centers(black, black | white) or not ring_centers(white, black | white):
+            return
+        if player == "B":
+            player = "W"
+        else:
+            player = "B"
+
+
+def build_book(games, plies=20):
+    """Counts every move played in the first plies moves of games, an iterable of (moves, result) where moves are
+    (origin, target) square pairs, as GameRecordReader yields them. Returns a dictionary from (hash, origin, target)
+    to [times played, Black wins, White wins]"""
+    counts = {}
+    for moves, result in games:
+        for position_hash, origin, target, player in _position_hashes(moves, plies):
+            entry = counts.get((position_hash, origin, target))
+            if entry is None:
+                entry = counts[(position_hash, origin, target)] = [0, 0, 0]
+            entry[0] += 1
+            if result == "BLACK_WON":
+                entry[1] += 1
+            elif result == "WHITE_WON":
+                entry[2] += 1
+    return counts
+
+
+def read_games(path):
+    """Yields (moves, result) for every game in an archive, either a GameRecordWriter file or a text file of records
+    as GameReplay reads them, whose results are unknown"""
+    with open(path, "rb") as file:
+        binary = file.read(len(GAME_MAGIC)) == GAME_MAGIC
+    if binary:
+        reader = GameRecordReader(path)
+        try:
+            for game in reader:
+                yield game
+        finally:
+            reader.close()
+        return
+    for number, record in enumerate(read_records(path), 1):
+        game_id, pairs = parse_record(record, number)
+        moves = []
+        for center, destination in pairs:
+            if center not in SQUARES or destination not in SQUARES:
+                break
+            moves.append((SQUARES[center], SQUARES[destination]))
+        yield moves, "UNFINISHED"
+
+
+def write_book(path, counts, min_count=1, bucket_bits=None):
+    """Writes counts from build_book to a book file, leaving out moves played fewer than min_count times. Entries are
+    sorted by hash, and a table of bucket_bits bits, by default about one bucket per entry, gives the first entry
+    for each value of the hash's top bits, so a lookup reads one bucket"""
+    entries = sorted((key, value) for key, value in counts.items() if value[0] >= min_count)
+    if bucket_bits is None:
+        bucket_bits = max(1, min(24, len(entries).bit_length()))
+    starts = [0] * ((1 << bucket_bits) + 1)
+    for (position_hash, origin, target), value in entries:
+        starts[(position_hash >> (64 - bucket_bits)) + 1] += 1
+    for bucket in range(1 << bucket_bits):
+        starts[bucket + 1] += starts[bucket]
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(BOOK_MAGIC, len(entries), bucket_bits))
+        file.write(struct.pack("<%dI" % len(starts), *starts))
+        for (position_hash, origin, target), (played, black_wins, white_wins) in entries:
+            file.write(_ENTRY.pack(position_hash, origin, target, played, black_wins, white_wins))
+    return len(entries)
+
+
+class OpeningBook:
+    """Reads a book file from write_book through a memory map, so opening it costs nothing however big it is. A
+    position's moves are found by reading its bucket's start and end from the table and scanning the few entries
+    between them"""
+
+    def __init__(self, path):
+        """Maps the book file"""
+        with open(path, "rb") as file:
+            self._mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, self._bucket_bits = _HEADER.unpack_from(self._mapped, 0)
+        if magic != BOOK_MAGIC:
+            self._mapped.close()
+            raise ValueError(path + " is not a Gess opening book")
+        view = memoryview(self._mapped)
+        table_end = _HEADER.size + ((1 << self._bucket_bits) + 1) * 4
+        self._starts = view[_HEADER.size:table_end].cast("I")
+        self._entries_offset = table_end
+
+    def __len__(self):
+        """Gets the number of entries, one per position and move"""
+        return self._count
+
+    def probe(self, key):
+        """Gets the book moves for a position hash as a list of (origin, target, times played, Black wins,
+        White wins), most played first"""
+        bucket = key >> (64 - self._bucket_bits)
+        moves = []
+        for entry in range(self._starts[bucket], self._starts[bucket + 1]):
+            position_hash, origin, target, played, black_wins, white_wins = _ENTRY.unpack_from(
+                self._mapped, self._entries_offset + entry * _ENTRY.size)
+            if position_hash == key:
+                moves.append((origin, target, played, black_wins, white_wins))
+        moves.sort(key=lambda move: move[2], reverse=True)
+        return moves
+
+    def get_moves(self, game):
+        """Gets the book moves for a GessGame's position as a list of (center, destination, times played,
+        Black wins, White wins) with the squares in notation, most played first"""
+        board = game.get_board()
+        return [(board.convert_to_string(INDEXES[origin]), board.convert_to_string(INDEXES[target]), played,
+                 black_wins, white_wins) for origin, target, played, black_wins, white_wins in
+                self.probe(game.get_position_hash())]
+
+    def get_best_move(self, game):
+        """Gets the most played book move for a GessGame's position as a (center, destination) pair of strings that
+        make_move accepts, or None if the position is not in the book"""
+        moves = self.get_moves(game)
+        if not moves:
+            return None
+        return moves[0][0], moves[0][1]
+
+    def close(self):
+        """Releases the mapping"""
+        self._starts.release()
+        self._mapped.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a Gess opening book from a game archive")
+    parser.add_argument("archive", help="game record file or text file of records")
+    parser.add_argument("book", help="book file to write")
+    parser.add_argument("--plies", type=int, default=20, help="moves from the start of each game to count")
+    parser.add_argument("--min-count", type=int, default=1, help="leave out moves played fewer times")
+    args = parser.parse_args()
+    entries = write_book(args.book, build_book(read_games(args.archive), args.plies), args.min_count)
+    print("%d entries written to %s" % (entries, args.book))
+
+
+if __name__ == "__main__":
+    main()
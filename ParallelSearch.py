@@ -0,0 +1,193 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from GessGame import GessGame
+from GessEngine import GessEngine, MATE_SCORE
+from RecordFile import game_from_position
+from TranspositionTable import TranspositionTable
+
+
+# Set in each worker process by _start_worker
+_worker_table = None
+_worker_memory = None
+
+
+def encode_position(game):
+    """Packs a game's position into the two bitboards and the side to move, which is all a worker needs and much
+    smaller to send than the Board, FootPrint and Index objects behind it"""
+    black, white = game.get_board().get_planes()
+    return black, white, game.get_player_turn()
+
+
+def decode_position(position):
+    """Rebuilds a BitBoard-backed game from encode_position's output"""
+    return game_from_position(*position)
+
+
+def _start_worker(memory_name):
+    """Attaches a worker process to the shared transposition table"""
+    global _worker_table, _worker_memory
+    _worker_memory = shared_memory.SharedMemory(name=memory_name)
+    _worker_table = TranspositionTable(buffer=_worker_memory.buf)
+
+
+def _search_in_worker(position, root_moves, max_depth, time_limit, node_limit, generation):
+    """Searches a position in a worker and returns (iterations, nodes), with iterations the (depth, score, move) of
+    every depth it finished. generation is the shared table's search generation, chosen by the parent so every
+    worker treats the same entries as current"""
+    engine = GessEngine(max_depth=max_depth, time_limit=time_limit, node_limit=node_limit, table=_worker_table)
+    engine.search(decode_position(position), root_moves, generation)
+    return engine.get_iterations(), engine.get_nodes()
+
+
+def choose_result(results, max_depth):
+    """Picks the best (depth, score, move) from each worker's list of finished iterations, or None if no worker
+    finished one. Depths are not comparable between workers, since a worker stops deepening once it finds a mate and
+    budgets cut workers off at different depths. So a forced win is taken first, the quickest one, and otherwise the
+    workers are compared at the deepest depth they all finished, leaving out workers whose moves all lose by force
+    unless every worker's do"""
+    finished = [iterations for iterations in results if iterations]
+    if not finished:
+        return None
+    last = [iterations[-1] for iterations in finished]
+    wins = [result for result in last if result[1] >= MATE_SCORE - max_depth]
+    if wins:
+        return max(wins, key=lambda result: result[1])
+    alive = [iterations for iterations in finished if iterations[-1][1] > -MATE_SCORE + max_depth]
+    if not alive:
+        return max(last, key=lambda result: result[1])
+    depth = min(iterations[-1][0] for iterations in alive)
+    return max(([result for result in iterations if result[0] <= depth][-1] for iterations in alive),
+               key=lambda result: result[1])
+
+
+class ParallelSearch:
+    """Searches a GessGame position on several worker processes, sidestepping the GIL. Workers get the position as
+    two integers and share one transposition table in shared memory.
+
+    In "root" mode the root moves are dealt out round-robin and each worker searches its share with iterative
+    deepening. In "lazy" mode (lazy SMP) every worker searches every root move, each starting from a different move,
+    and they help each other only through the shared table. Either way choose_result picks the move from the
+    workers' results"""
+
+    def __init__(self, workers=None, mode="root", table_bytes=64 * 1024 * 1024):
+        """Initializes the worker pool and the shared transposition table. workers defaults to the number of CPUs"""
+        if mode not in ("root", "lazy"):
+            raise ValueError("mode must be 'root' or 'lazy'")
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self._workers = workers
+        self._mode = mode
+        self._memory = shared_memory.SharedMemory(create=True, size=table_bytes)
+        self._pool = ProcessPoolExecutor(max_workers=workers, initializer=_start_worker,
+                                         initargs=(self._memory.name,))
+        self._generation = 0
+        self._nodes = 0
+        self._depth_reached = 0
+        self._score = 0
+        self._elapsed = 0.0
+
+    def get_workers(self):
+        """Gets the number of worker processes"""
+        return self._workers
+
+    def get_nodes(self):
+        """Gets the total positions visited by all workers in the last search"""
+        return self._nodes
+
+    def get_depth(self):
+        """Gets the depth of the move chosen by the last search"""
+        return self._depth_reached
+
+    def get_score(self):
+        """Gets the score of the move chosen by the last search"""
+        return self._score
+
+    def get_nodes_per_second(self):
+        """Gets the combined search speed of the last search"""
+        if self._elapsed <= 0:
+            return 0.0
+        return self._nodes / self._elapsed
+
+    def close(self):
+        """Shuts down the workers and frees the shared table"""
+        self._pool.shutdown()
+        self._memory.close()
+        self._memory.unlink()
+
+    def search(self, game, max_depth=64, time_limit=None, node_limit=None):
+        """Searches the game's position and returns the best move as a (center, destination) pair of strings, or
+        None if there is no legal move. node_limit is shared out between the workers"""
+        start = time.perf_counter()
+        position = encode_position(game)
+        board = game.get_board()
+        moves = [(board.convert_to_string(center), board.convert_to_string(destination))
+                 for center, destination in game.legal_moves(game.get_player_turn())]
+        if not moves:
+            return None
+        worker_nodes = None
+        if node_limit is not None:
+            worker_nodes = max(1, node_limit // self._workers)
+
+        jobs = []
+        for worker in range(min(self._workers, len(moves))):
+            if self._mode == "root":
+                jobs.append(moves[worker::self._workers])
+            else:
+                jobs.append(moves[worker:] + moves[:worker])
+        self._generation += 1
+        futures = [self._pool.submit(_search_in_worker, position, root_moves, max_depth, time_limit, worker_nodes,
+                                     self._generation) for root_moves in jobs]
+
+        results = []
+        self._nodes = 0
+        for future in futures:
+            iterations, nodes = future.result()
+            results.append(iterations)
+            self._nodes += nodes
+        best = choose_result(results, max_depth)
+        self._elapsed = time.perf_counter() - start
+        if best is None:
+            return moves[0]
+        self._depth_reached, self._score, move = best
+        return move
+
+
+def benchmark(max_workers=None, depth=3, mode="root", out=print):
+    """Searches the starting position to a fixed depth with 1 to max_workers workers, printing the time, nodes/s
+    and speedup over one worker for each"""
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    base_time = None
+    results = []
+    for workers in range(1, max_workers + 1):
+        searcher = ParallelSearch(workers, mode)
+        try:
+            start = time.perf_counter()
+            move = searcher.search(GessGame(), max_depth=depth)
+            elapsed = time.perf_counter() - start
+        finally:
+            searcher.close()
+        if base_time is None:
+            base_time = elapsed
+        speedup = base_time / elapsed if elapsed > 0 else 0.0
+        results.append((workers, elapsed, speedup))
+        out("%2d workers: %7.2fs %9.0f nodes/s speedup %.2fx move %s-%s" % (
+            workers, elapsed, searcher.get_nodes_per_second(), speedup, move[0], move[1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel Gess search from 1 to N workers")
+    parser.add_argument("--workers", type=int, default=None, help="largest worker count to try")
+    parser.add_argument("--depth", type=int, default=3, help="search depth")
+    parser.add_argument("--mode", choices=("root", "lazy"), default="root")
+    args = parser.parse_args()
+    benchmark(args.workers, args.depth, args.mode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+import argparse
+import time
+
+from GessGame import GessGame, BitBoard, INDEXES, BOARD_SIZE, DIRECTION_STEPS, apply_move, get_square, ring_centers
+
+
+# Leaf counts from the make_board starting position, Black to move
+REFERENCE_COUNTS = {1: 319, 2: 101761, 3: 31552410}
+
+
+class Perft:
+    """Counts the leaf positions reachable from a game position to a given depth. Used to benchmark move generation
+    and to regression-test it against stored reference counts. A game whose side to move has no ring left is over
+    and counts as a single leaf"""
+
+    def __init__(self, game):
+        """Initializes the counter on a BitBoard copy of the game's position, so the game itself is left untouched"""
+        self._board = BitBoard()
+        black, white = game.get_board().get_planes()
+        self._board.set_planes(black, white)
+        self._game = GessGame(self._board)
+        self._game.set_player_turn(game.get_player_turn())
+        self._nodes = 0
+        self._phase_times = {"footprint build": 0.0, "direction check": 0.0, "obstruction scan": 0.0,
+                             "board update": 0.0}
+        self._phase_calls = 0
+        self._mismatches = 0
+
+    def get_nodes(self):
+        """Gets the number of positions visited by the last count, including interior ones"""
+        return self._nodes
+
+    def get_phase_times(self):
+        """Gets the total seconds spent in each phase of the last timed count"""
+        return self._phase_times
+
+    def get_phase_calls(self):
+        """Gets the number of moves pushed through the phase timings"""
+        return self._phase_calls
+
+    def get_mismatches(self):
+        """Gets the number of moves on which move_allowed or make_move disagreed with the move generator in the last
+        timed count"""
+        return self._mismatches
+
+    def count(self, depth):
+        """Returns the number of leaf positions depth moves deep"""
+        self._nodes = 0
+        return self._count(depth, False)
+
+    def count_timed(self, depth):
+        """Same as count, but also pushes every generated move through the move_allowed phases one at a time,
+        timing the footprint build, direction check, obstruction scan and board update separately. Each generated
+        move is then checked with move_allowed and played with make_move and taken back, and every slide from the
+        root position that the generator left out is checked to be rejected by move_allowed. Disagreements are
+        counted by get_mismatches"""
+        self._nodes = 0
+        for phase in self._phase_times:
+            self._phase_times[phase] = 0.0
+        self._phase_calls = 0
+        self._mismatches = 0
+        self._check_rejections()
+        return self._count(depth, True)
+
+    def divide(self, depth):
+        """Returns the leaf count under each root move, keyed by the move's notation"""
+        self._nodes = 0
+        counts = {}
+        player = self._game.get_player_turn()
+        black, white = self._board.get_planes()
+        for center, destination in list(self._game.legal_moves(player)):
+            self._board.update_board(destination, self._board.generate_footprint(center))
+            self._game.set_player_turn(self._other(player))
+            move = self._board.convert_to_string(center) + "-" + self._board.convert_to_string(destination)
+            counts[move] = self._count(depth - 1, False)
+            self._board.set_planes(black, white)
+            self._game.set_player_turn(player)
+        return counts
+
+    def _other(self, player):
+        """Gets the color of the other player"""
+        if player == "B":
+            return "W"
+        return "B"
+
+    def _count(self, depth, timed):
+        """Walks the move tree, restoring the position from its two bitboards after each move"""
+        self._nodes += 1
+        player = self._game.get_player_turn()
+        black, white = self._board.get_planes()
+        if player == "B":
+            own = black
+        else:
+            own = white
+        if depth == 0 or not ring_centers(own, black | white):
+            return 1
+
+        leaves = 0
+        for center, destination in list(self._game.legal_moves(player)):
+            if timed:
+                self._time_phases(center, destination)
+            if depth == 1:
+                self._nodes += 1
+                leaves += 1
+                continue
+            self._board.update_board(destination, self._board.generate_footprint(center))
+            self._game.set_player_turn(self._other(player))
+            leaves += self._count(depth - 1, timed)
+            self._board.set_planes(black, white)
+            self._game.set_player_turn(player)
+        return leaves
+
+    def _time_phases(self, center, destination):
+        """Runs one generated move through the per-move validation path, timing each phase"""
+        game = self._game
+        board = self._board
+        black, white = board.get_planes()
+
+        start = time.perf_counter()
+        footprint = board.generate_footprint(center)
+        footprint.get_footprint_coords()
+        after_footprint = time.perf_counter()
+        direction = game.get_direction(center, destination)
+        length = game.get_distance_length(center, destination, direction)
+        after_direction = time.perf_counter()
+        clear = game.is_obstructed(direction, center, length, footprint)
+        after_obstruction = time.perf_counter()
+        board.update_board(destination, footprint)
+        after_update = time.perf_counter()
+        board.set_planes(black, white)
+
+        self._phase_times["footprint build"] += after_footprint - start
+        self._phase_times["direction check"] += after_direction - after_footprint
+        self._phase_times["obstruction scan"] += after_obstruction - after_direction
+        self._phase_times["board update"] += after_update - after_obstruction
+        self._phase_calls += 1
+        if direction == " " or clear is False or not self._plays_through(center, destination):
+            self._mismatches += 1
+
+    def _plays_through(self, center, destination):
+        """Determines if move_allowed accepts a generated move, and make_move plays it, leaves the same position as
+        apply_move and hands the turn over, and unmake_move then puts everything back"""
+        game = self._game
+        board = self._board
+        black, white = board.get_planes()
+        player = game.get_player_turn()
+        if not game.move_allowed(destination, board.generate_footprint(center), center):
+            return False
+        if not game.make_move(board.convert_to_string(center), board.convert_to_string(destination)):
+            return False
+        played = board.get_planes()
+        turn = game.get_player_turn()
+        game.unmake_move()
+        if played != apply_move(black, white, get_square(center), get_square(destination)) or turn == player:
+            return False
+        return board.get_planes() == (black, white) and game.get_player_turn() == player
+
+    def _check_rejections(self):
+        """Sends every slide from every interior center of the current position through move_allowed, and counts
+        a mismatch for each one it accepts that the generator left out. This covers the footprint, obstruction and
+        ring rules on the moves that must be refused"""
+        game = self._game
+        board = self._board
+        generated = set(game.legal_move_squares(game.get_player_turn()))
+        for x in range(1, BOARD_SIZE - 1):
+            for y in range(1, BOARD_SIZE - 1):
+                center = INDEXES[x * BOARD_SIZE + y]
+                for name, x_step, y_step in DIRECTION_STEPS:
+                    new_x, new_y = x + x_step, y + y_step
+                    while 1 <= new_x <= BOARD_SIZE - 2 and 1 <= new_y <= BOARD_SIZE - 2:
+                        destination = INDEXES[new_x * BOARD_SIZE + new_y]
+                        if (get_square(center), get_square(destination)) not in generated and \
+                                game.move_allowed(destination, board.generate_footprint(center), center):
+                            self._mismatches += 1
+                        new_x += x_step
+                        new_y += y_step
+
+
+def parse_position(line):
+    """Parses a position line into a game and its expected counts. A line holds the 20 board columns a through t
+    separated by '/', each a string of 20 '_', 'B' or 'W' from row 1 up, then the side to move, then any number of
+    depth:count pairs"""
+    fields = line.split()
+    columns = fields[0].split("/")
+    if len(columns) != BOARD_SIZE or any(len(column) != BOARD_SIZE for column in columns):
+        raise ValueError("position needs 20 columns of 20 squares: " + fields[0])
+    board = BitBoard()
+    for x in range(BOARD_SIZE):
+        for y in range(BOARD_SIZE):
+            if columns[x][y] != "_":
+                board.set_board_piece(columns[x][y], INDEXES[x * BOARD_SIZE + y])
+    game = GessGame(board)
+    if len(fields) > 1:
+        game.set_player_turn(fields[1])
+    expected = {}
+    for pair in fields[2:]:
+        depth, count = pair.split(":")
+        expected[int(depth)] = int(count)
+    return game, expected
+
+
+def run(game, depth, expected, timed, out=print):
+    """Counts leaves at every depth up to depth, printing throughput and comparing against expected counts.
+    Returns False if any count disagrees"""
+    passed = True
+    for current in range(1, depth + 1):
+        perft = Perft(game)
+        start = time.perf_counter()
+        if timed:
+            leaves = perft.count_timed(current)
+        else:
+            leaves = perft.count(current)
+        elapsed = time.perf_counter() - start
+        rate = perft.get_nodes() / elapsed if elapsed > 0 else 0.0
+        line = "depth %d: %d leaves, %d nodes in %.3fs (%.0f nodes/s)" % (current, leaves, perft.get_nodes(),
+                                                                          elapsed, rate)
+        reference = expected.get(current)
+        if reference:
+            if reference == leaves:
+                line += " ok"
+            else:
+                line += " MISMATCH, expected %d" % reference
+                passed = False
+        out(line)
+        if timed:
+            calls = perft.get_phase_calls()
+            for phase, seconds in perft.get_phase_times().items():
+                per_call = seconds / calls * 1e6 if calls else 0.0
+                out("  %-16s %8.3fs %8.2fus/move" % (phase, seconds, per_call))
+            if perft.get_mismatches():
+                out("  %d moves where move_allowed or make_move disagreed with the generator" %
+                    perft.get_mismatches())
+                passed = False
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count Gess move-generation leaf positions")
+    parser.add_argument("--depth", type=int, default=2, help="deepest ply to count")
+    parser.add_argument("--positions", help="file of positions, one per line, instead of the starting position")
+    parser.add_argument("--phases", action="store_true", help="time footprint, direction, obstruction and update")
+    parser.add_argument("--divide", action="store_true", help="print the leaf count under each root move")
+    args = parser.parse_args()
+
+    if args.positions:
+        positions = []
+        with open(args.positions) as file:
+            for line in file:
+                if line.strip() and not line.startswith("#"):
+                    positions.append(parse_position(line))
+    else:
+        positions = [(GessGame(), REFERENCE_COUNTS)]
+
+    passed = True
+    for game, expected in positions:
+        if args.divide:
+            for move, leaves in sorted(Perft(game).divide(args.depth).items()):
+                print(move, leaves)
+        if not run(game, args.depth, expected, args.phases):
+            passed = False
+    if not passed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import bisect
+import mmap
+import struct
+
+from GessGame import GessGame, BitBoard, INDEXES, apply_move, get_square
+
+
+PLANE_BYTES = 50
+POSITION_BYTES = 2 * PLANE_BYTES + 1
+MOVE_BYTES = 4
+POSITION_MAGIC = b"GESSPOS1"
+GAME_MAGIC = b"GESSGAM1"
+HEADER_BYTES = 8
+
+# A move entry with this origin marks the end of a game, and its target holds the result
+END_OF_GAME = 0xFFFF
+RESULTS = ("UNFINISHED", "BLACK_WON", "WHITE_WON")
+
+_MOVE = struct.Struct("<HH")
+
+
+def encode_position(black, white, player):
+    """Packs a position into 101 bytes: the black and white bitboards as 50 little-endian bytes each, then 0 if
+    Black is to move or 1 if White is"""
+    return (black.to_bytes(PLANE_BYTES, "little") + white.to_bytes(PLANE_BYTES, "little") +
+            (b"\x01" if player == "W" else b"\x00"))
+
+
+def decode_position(data):
+    """Unpacks 101 bytes from encode_position into (black, white, player). data may be a memoryview into a mapped
+    file, in which case nothing is copied before the integers are built"""
+    black = int.from_bytes(data[:PLANE_BYTES], "little")
+    white = int.from_bytes(data[PLANE_BYTES:2 * PLANE_BYTES], "little")
+    if data[2 * PLANE_BYTES]:
+        return black, white, "W"
+    return black, white, "B"
+
+
+def game_from_position(black, white, player):
+    """Builds a BitBoard-backed GessGame at the given position"""
+    board = BitBoard()
+    board.set_planes(black, white)
+    game = GessGame(board)
+    game.set_player_turn(player)
+    return game
+
+
+def _open_for_append(path, magic):
+    """Opens a record file for appending, writing its header first if the file is new"""
+    file = open(path, "ab")
+    if file.tell() == 0:
+        file.write(magic)
+    return file
+
+
+def _map_file(path, magic):
+    """Memory-maps a record file read-only after checking its header"""
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:HEADER_BYTES] != magic:
+        mapped.close()
+        raise ValueError(path + " is not a Gess record file of the expected kind")
+    return mapped
+
+
+class PositionWriter:
+    """Appends positions to a file of fixed-size 101-byte records"""
+
+    def __init__(self, path):
+        """Opens the file for appending, creating it if needed"""
+        self._file = _open_for_append(path, POSITION_MAGIC)
+
+    def write(self, black, white, player):
+        """Appends a position given as bitboards and the side to move"""
+        self._file.write(encode_position(black, white, player))
+
+    def write_game(self, game):
+        """Appends a GessGame's current position"""
+        black, white = game.get_board().get_planes()
+        self.write(black, white, game.get_player_turn())
+
+    def close(self):
+        """Flushes and closes the file"""
+        self._file.close()
+
+
+class PositionReader:
+    """Reads a position file through a memory map. Positions are decoded straight out of the mapping only when
+    asked for, and get_raw_range hands back any run of records as a memoryview, so large datasets can be sliced and
+    iterated without loading or copying them"""
+
+    def __init__(self, path):
+        """Maps the file"""
+        self._mapped = _map_file(path, POSITION_MAGIC)
+        self._view = memoryview(self._mapped)[HEADER_BYTES:]
+        self._count = len(self._view) // POSITION_BYTES
+
+    def __len__(self):
+        """Gets the number of positions in the file"""
+        return self._count
+
+    def get_raw(self, number):
+        """Gets a position's 101 bytes as a memoryview into the mapping"""
+        if number < 0:
+            number += self._count
+        if not 0 <= number < self._count:
+            raise IndexError("position number out of range")
+        return self._view[number * POSITION_BYTES:(number + 1) * POSITION_BYTES]
+
+    def get_raw_range(self, start, stop):
+        """Gets the records from start up to stop as one memoryview into the mapping, POSITION_BYTES per record"""
+        start, stop, step = slice(start, stop).indices(self._count)
+        return self._view[start * POSITION_BYTES:max(start, stop) * POSITION_BYTES]
+
+    def __getitem__(self, number):
+        """Gets a position as (black, white, player), or a list of them for a slice"""
+        if isinstance(number, slice):
+            return [self[i] for i in range(*number.indices(self._count))]
+        return decode_position(self.get_raw(number))
+
+    def __iter__(self):
+        """Iterates over every position in file order"""
+        for number in range(self._count):
+            yield decode_position(self._view[number * POSITION_BYTES:(number + 1) * POSITION_BYTES])
+
+    def load_game(self, number):
+        """Builds a GessGame at the position with the given number"""
+        return game_from_position(*self[number])
+
+    def close(self):
+        """Releases the mapping"""
+        self._view.release()
+        self._mapped.close()
+
+
+class GameRecordWriter:
+    """Appends games to a file of fixed-size 4-byte move entries. Each move is its origin and target squares as
+    little-endian 16-bit numbers, and each game ends with an END_OF_GAME entry holding its result. Games start from
+    the make_board starting position"""
+
+    def __init__(self, path):
+        """Opens the file for appending, creating it if needed"""
+        self._file = _open_for_append(path, GAME_MAGIC)
+
+    def write_moves(self, moves, result="UNFINISHED"):
+        """Appends a game given as (origin, target) square pairs"""
+        entries = bytearray()
+        for origin, target in moves:
+            entries += _MOVE.pack(origin, target)
+        entries += _MOVE.pack(END_OF_GAME, RESULTS.index(result))
+        self._file.write(entries)
+
+    def write_game(self, game):
+        """Appends a GessGame's moves and its current state. The game must have been played from the starting
+        position"""
+        moves = [(get_square(center), get_square(destination)) for center, destination in game.get_move_history()]
+        self.write_moves(moves, game.get_game_state())
+
+    def close(self):
+        """Flushes and closes the file"""
+        self._file.close()
+
+
+class GameRecordReader:
+    """Reads a game record file through a memory map. Entries are read as 16-bit numbers straight out of the
+    mapping, and the offset of each game is found by one scan the first time it is needed"""
+
+    def __init__(self, path):
+        """Maps the file"""
+        self._mapped = _map_file(path, GAME_MAGIC)
+        view = memoryview(self._mapped)[HEADER_BYTES:]
+        self._entries = view[:len(view) // MOVE_BYTES * MOVE_BYTES].cast("H")
+        self._game_starts = None
+        start = BitBoard()
+        start.make_board()
+        self._start = start.get_planes()
+
+    def get_entry_count(self):
+        """Gets the number of 4-byte entries, moves and end markers, in the file"""
+        return len(self._entries) // 2
+
+    def get_entry(self, offset):
+        """Gets the entry at offset as (origin, target). For an end marker the origin is END_OF_GAME"""
+        return self._entries[offset * 2], self._entries[offset * 2 + 1]
+
+    def _find_games(self):
+        """Finds the entry offset each game starts at, with one extra offset past the last game"""
+        if self._game_starts is None:
+            starts = [0]
+            entries = self._entries
+            for offset in range(0, len(entries), 2):
+                if entries[offset] == END_OF_GAME:
+                    starts.append(offset // 2 + 1)
+            self._game_starts = starts
+        return self._game_starts
+
+    def __len__(self):
+        """Gets the number of complete games in the file"""
+        return len(self._find_games()) - 1
+
+    def get_moves(self, number):
+        """Gets a game's moves as (origin, target) square pairs and its recorded result. Negative numbers count back
+        from the last game"""
+        starts = self._find_games()
+        if number < 0:
+            number += len(starts) - 1
+        if not 0 <= number < len(starts) - 1:
+            raise IndexError("game number out of range")
+        first, end = starts[number], starts[number + 1] - 1
+        moves = [self.get_entry(offset) for offset in range(first, end)]
+        return moves, RESULTS[self.get_entry(end)[1]]
+
+    def __iter__(self):
+        """Iterates over every game as (moves, result)"""
+        for number in range(len(self)):
+            yield self.get_moves(number)
+
+    def get_position(self, offset):
+        """Gets the position as (black, white, player) just after the entry at offset, by replaying from the start
+        of its game"""
+        if not 0 <= offset < self.get_entry_count():
+            raise IndexError("entry offset out of range")
+        starts = self._find_games()
+        first = starts[bisect.bisect_right(starts, offset) - 1]
+        black, white = self._start
+        player = "B"
+        for entry in range(first, offset + 1):
+            origin, target = self.get_entry(entry)
+            if origin == END_OF_GAME:
+                break
+            black, white = apply_move(black, white, origin, target)
+            if player == "B":
+                player = "W"
+            else:
+                player = "B"
+        return black, white, player
+
+    def load_position(self, offset):
+        """Builds a BitBoard-backed GessGame at the position just after the entry at offset"""
+        return game_from_position(*self.get_position(offset))
+
+    def load_game(self, number, moves=None):
+        """Builds a GessGame for a game, replaying its first moves moves or all of them, with its move history so
+        it can be taken back with unmake_move or written out again"""
+        board = BitBoard()
+        board.set_planes(*self._start)
+        game = GessGame(board)
+        played, result = self.get_moves(number)
+        if moves is not None:
+            played = played[:moves]
+        for origin, target in played:
+            game.push_move(INDEXES[origin], INDEXES[target])
+        return game
+
+    def close(self):
+        """Releases the mapping"""
+        self._entries.release()
+        self._mapped.close()
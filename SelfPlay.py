@@ -0,0 +1,233 @@
+import argparse
+import json
+import mmap
+import os
+import random
+import struct
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from GessGame import GessGame, BitBoard, INDEXES
+from GessEngine import GessEngine
+from RecordFile import POSITION_BYTES, encode_position, decode_position
+
+
+SHARD_MAGIC = b"GESSSPL1"
+SAMPLE_BYTES = POSITION_BYTES + 5
+
+# A sample is a position as RecordFile.encode_position packs it, the move played from it as origin and target
+# squares, and the game's outcome: 1 if Black won, -1 if White won, 0 if it was unfinished
+_MOVE_AND_OUTCOME = struct.Struct("<HHb")
+OUTCOMES = {"UNFINISHED": 0, "BLACK_WON": 1, "WHITE_WON": -1}
+
+
+class RandomPlayer:
+    """Plays a uniformly random legal move"""
+
+    def __init__(self, generator):
+        """Initializes the player with a random.Random"""
+        self._generator = generator
+
+    def choose(self, game):
+        """Returns a move as (origin, target) squares, or None if there is none"""
+        moves = list(game.legal_move_squares(game.get_player_turn()))
+        if not moves:
+            return None
+        return self._generator.choice(moves)
+
+
+class EnginePlayer:
+    """Plays the move GessEngine finds searching to a fixed depth"""
+
+    def __init__(self, depth):
+        """Initializes the player's engine"""
+        self._engine = GessEngine(max_depth=depth)
+
+    def choose(self, game):
+        """Returns a move as (origin, target) squares, or None if there is none"""
+        move = self._engine.search(game)
+        if move is None:
+            return None
+        board = game.get_board()
+        return board.convert_to_index(move[0]).get_square(), board.convert_to_index(move[1]).get_square()
+
+
+def make_player(spec, generator):
+    """Builds a player from its spec: "random", or "engine:N" for the engine searching N moves deep"""
+    if spec == "random":
+        return RandomPlayer(generator)
+    name, separator, depth = spec.partition(":")
+    if name == "engine" and depth.isdigit():
+        return EnginePlayer(int(depth))
+    raise ValueError("player must be 'random' or 'engine:N', not " + repr(spec))
+
+
+def play_game(black, white, generator, max_moves=200, random_plies=4):
+    """Plays one game from the starting position between two players and returns its samples as a list of
+    (black, white, player, origin, target) and its final state. The first random_plies moves are random so games
+    between deterministic players still differ"""
+    board = BitBoard()
+    board.make_board()
+    game = GessGame(board)
+    opening = RandomPlayer(generator)
+    samples = []
+    while len(samples) < max_moves and game.get_game_state() == "UNFINISHED":
+        player_turn = game.get_player_turn()
+        if len(samples) < random_plies:
+            move = opening.choose(game)
+        elif player_turn == "B":
+            move = black.choose(game)
+        else:
+            move = white.choose(game)
+        if move is None:
+            break
+        position = board.get_planes()
+        samples.append((position[0], position[1], player_turn, move[0], move[1]))
+        game.push_move(INDEXES[move[0]], INDEXES[move[1]])
+    return samples, game.get_game_state()
+
+
+def encode_sample(black, white, player, origin, target, outcome):
+    """Packs a sample into SAMPLE_BYTES bytes"""
+    return encode_position(black, white, player) + _MOVE_AND_OUTCOME.pack(origin, target, outcome)
+
+
+def shard_path(directory, shard):
+    """Gets the path of a numbered shard"""
+    return os.path.join(directory, "shard-%05d.bin" % shard)
+
+
+def manifest_path(directory):
+    """Gets the path of the file recording the settings a directory's shards were played with"""
+    return os.path.join(directory, "manifest.json")
+
+
+def prepare_directory(directory, games, settings):
+    """Checks that a directory's shards were played with the same settings as this run, as recorded in its manifest,
+    then records this run's settings and game count there. A run may ask for more games than the one before it, in
+    which case the old last shard is removed if it is short, so it is played again with its full count. A directory
+    with shards but no manifest, with different settings or with more games than asked for raises ValueError"""
+    os.makedirs(directory, exist_ok=True)
+    path = manifest_path(directory)
+    if os.path.exists(path):
+        with open(path) as file:
+            recorded = json.load(file)
+        old_games = recorded.pop("games")
+        if recorded != settings:
+            raise ValueError("%s was played with %s, not %s" % (directory, recorded, settings))
+        if old_games > games:
+            raise ValueError("%s already holds %d games, more than the %d asked for" % (directory, old_games, games))
+        games_per_shard = settings["games_per_shard"]
+        if old_games < games and old_games % games_per_shard:
+            short = shard_path(directory, old_games // games_per_shard)
+            if os.path.exists(short):
+                os.remove(short)
+    elif any(name.startswith("shard-") for name in os.listdir(directory)):
+        raise ValueError("%s holds shards but no manifest, so they can't be checked" % directory)
+    with open(path + ".tmp", "w") as file:
+        json.dump(dict(settings, games=games), file)
+    os.replace(path + ".tmp", path)
+
+
+def play_shard(directory, shard, games, black_spec, white_spec, max_moves, seed):
+    """Plays one shard's games and writes their samples to its file, first under a temporary name and then renamed
+    into place, so a shard file exists only once it is complete. Returns (shard, games, samples)"""
+    generator = random.Random(seed * 1000003 + shard)
+    black = make_player(black_spec, generator)
+    white = make_player(white_spec, generator)
+    data = bytearray(SHARD_MAGIC)
+    count = 0
+    for game_number in range(games):
+        samples, state = play_game(black, white, generator, max_moves)
+        outcome = OUTCOMES[state]
+        for sample in samples:
+            data += encode_sample(*sample, outcome)
+        count += len(samples)
+    path = shard_path(directory, shard)
+    with open(path + ".tmp", "wb") as file:
+        file.write(data)
+    os.replace(path + ".tmp", path)
+    return shard, games, count
+
+
+def run_selfplay(directory, games, black_spec="random", white_spec="random", games_per_shard=100, workers=None,
+                 max_moves=200, seed=1, out=print):
+    """Plays games self-play games on a process pool, games_per_shard to a shard file in directory. Each worker
+    writes its own shard, so nothing but counts comes back to this process and memory stays flat. Shards already on
+    disk are skipped, and every shard's games depend only on the settings and its number, so an interrupted run picks
+    up where it stopped and gives the same data. prepare_directory refuses a directory played with other settings.
+    Returns the games and samples written and the games/s"""
+    prepare_directory(directory, games, {"games_per_shard": games_per_shard, "black": black_spec,
+                                         "white": white_spec, "max_moves": max_moves, "seed": seed})
+    if workers is None:
+        workers = os.cpu_count() or 1
+    shards = []
+    for shard in range((games + games_per_shard - 1) // games_per_shard):
+        if not os.path.exists(shard_path(directory, shard)):
+            shards.append((shard, min(games_per_shard, games - shard * games_per_shard)))
+    if len(shards) < (games + games_per_shard - 1) // games_per_shard:
+        out("resuming: %d shards to go" % len(shards))
+
+    start = time.perf_counter()
+    totals = {"games": 0, "samples": 0}
+
+    def finish(future):
+        shard, games_done, samples_done = future.result()
+        totals["games"] += games_done
+        totals["samples"] += samples_done
+        elapsed = time.perf_counter() - start
+        out("shard %d: %d games, %d samples, %.1f games/s" % (
+            shard, totals["games"], totals["samples"], totals["games"] / elapsed if elapsed > 0 else 0.0))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for shard, count in shards:
+            pending.append(pool.submit(play_shard, directory, shard, count, black_spec, white_spec, max_moves, seed))
+            if len(pending) >= workers * 2:
+                finish(pending.popleft())
+        while pending:
+            finish(pending.popleft())
+    elapsed = time.perf_counter() - start
+    return {"games": totals["games"], "samples": totals["samples"], "seconds": elapsed,
+            "games_per_second": totals["games"] / elapsed if elapsed > 0 else 0.0}
+
+
+def read_shard(path):
+    """Yields every sample in a shard file as (black, white, player, origin, target, outcome), reading it through a
+    memory map"""
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        if mapped[:len(SHARD_MAGIC)] != SHARD_MAGIC:
+            raise ValueError(path + " is not a self-play shard")
+        for offset in range(len(SHARD_MAGIC), len(mapped) - SAMPLE_BYTES + 1, SAMPLE_BYTES):
+            black, white, player = decode_position(mapped[offset:offset + POSITION_BYTES])
+            origin, target, outcome = _MOVE_AND_OUTCOME.unpack_from(mapped, offset + POSITION_BYTES)
+            yield black, white, player, origin, target, outcome
+    finally:
+        mapped.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate (position, move, outcome) samples from Gess self-play")
+    parser.add_argument("directory", help="directory to write shards to; an existing one is resumed")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--black", default="random", help="'random' or 'engine:N'")
+    parser.add_argument("--white", default="random", help="'random' or 'engine:N'")
+    parser.add_argument("--games-per-shard", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, defaults to the CPU count")
+    parser.add_argument("--max-moves", type=int, default=200, help="moves before a game is left unfinished")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    try:
+        report = run_selfplay(args.directory, args.games, args.black, args.white, args.games_per_shard, args.workers,
+                              args.max_moves, args.seed)
+    except ValueError as error:
+        parser.error(str(error))
+    print("%d games, %d samples in %.2fs (%.1f games/s)" % (
+        report["games"], report["samples"], report["seconds"], report["games_per_second"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+
+# What each scenario runs in a fresh interpreter, timed from before its first import to the end
+SCENARIOS = (("import", "import GessGame"),
+             ("new game", "import GessGame\ngame = GessGame.GessGame()"),
+             ("first moves", "import GessGame\ngame = GessGame.GessGame()\nmoves = list(game.legal_move_squares('B'))"),
+             ("engine", "import GessEngine\nengine = GessEngine.GessEngine()"),
+             ("mcts", "import MCTSPlayer\nplayer = MCTSPlayer.MCTSPlayer()"),
+             ("cache", "import GessGame, LegalityCache\ncache = LegalityCache.LegalityCache(GessGame.GessGame())"))
+
+_TIMER = """import time
+start = time.perf_counter()
+%s
+print(time.perf_counter() - start)
+"""
+
+
+def time_scenario(code, cache_setting, runs=5):
+    """Runs code runs times, each in a new Python process started in this directory with GESS_TABLE_CACHE set to
+    cache_setting, and returns the seconds each run took, not counting the interpreter's own startup"""
+    environment = dict(os.environ, GESS_TABLE_CACHE=cache_setting)
+    directory = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    for run in range(runs):
+        output = subprocess.run([sys.executable, "-c", _TIMER % code], cwd=directory, env=environment,
+                                capture_output=True, text=True, check=True).stdout
+        times.append(float(output))
+    return times
+
+
+def benchmark(runs=5, out=print):
+    """Times every scenario with the table cache off and with a warm cache in a temporary file, printing the median
+    milliseconds of each, and returns the medians keyed by (scenario, cache)"""
+    out("%-12s %12s %12s" % ("scenario", "no cache ms", "cached ms"))
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        cache = os.path.join(directory, "gess_tables.bin")
+        time_scenario("import GessGame\nGessGame.load_tables()", cache, 1)
+        for name, code in SCENARIOS:
+            for setting, label in (("0", "none"), (cache, "warm")):
+                results[(name, label)] = statistics.median(time_scenario(code, setting, runs))
+            out("%-12s %12.2f %12.2f" % (name, results[(name, "none")] * 1000, results[(name, "warm")] * 1000))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time how long Gess takes to start up in a fresh process")
+    parser.add_argument("--runs", type=int, default=5, help="processes started for each timing")
+    args = parser.parse_args()
+    benchmark(args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from GessGame import GessGame, BitBoard, INDEXES, BOARD_SIZE, apply_move, ring_centers
+from GessEngine import get_engine
+from Evaluator import CENTER_PLANES, CENTER_VALUE, RING_VALUE, STONE_VALUE, center_control
+from GameReplay import SQUARES
+from RecordFile import game_from_position
+from SelfPlay import RandomPlayer, make_player
+
+
+# Score of a position where the side that just moved has taken the other side's last ring
+WIN_SCORE = 1000000
+
+
+def _build_square_weights():
+    """Gets the worth of a stone on each square for the greedy player, its STONE_VALUE plus its center weight"""
+    weights = []
+    for square in range(BOARD_SIZE * BOARD_SIZE):
+        weight = sum(1 << bit for bit in range(4) if CENTER_PLANES[bit] >> square & 1)
+        weights.append(STONE_VALUE + weight * CENTER_VALUE)
+    return weights
+
+
+SQUARE_WEIGHTS = _build_square_weights()
+
+
+def score_positions(blacks, whites):
+    """Scores many positions at once from Black's side by stones, their closeness to the middle and rings. With
+    NumPy the stone terms of every position are worked out together, by unpacking all the bitboards into one array
+    and taking a single product with the square weights; without it they are summed a plane at a time"""
+    if numpy is not None and blacks:
+        weights = numpy.array(SQUARE_WEIGHTS, numpy.int32)
+        scores = []
+        for planes in (blacks, whites):
+            data = numpy.frombuffer(b"".join(plane.to_bytes(50, "little") for plane in planes), numpy.uint8)
+            bits = numpy.unpackbits(data.reshape(len(planes), 50), axis=1, bitorder="little")[:, :BOARD_SIZE ** 2]
+            scores.append(bits.astype(numpy.int32) @ weights)
+        stone_scores = (scores[0] - scores[1]).tolist()
+    else:
+        stone_scores = [(black.bit_count() - white.bit_count()) * STONE_VALUE +
+                        (center_control(black) - center_control(white)) * CENTER_VALUE
+                        for black, white in zip(blacks, whites)]
+    results = []
+    for black, white, score in zip(blacks, whites, stone_scores):
+        occupied = black | white
+        black_rings = ring_centers(black, occupied).bit_count()
+        white_rings = ring_centers(white, occupied).bit_count()
+        if not white_rings:
+            score = WIN_SCORE
+        elif not black_rings:
+            score = -WIN_SCORE
+        else:
+            score += (black_rings - white_rings) * RING_VALUE
+        results.append(score)
+    return results
+
+
+class GreedyPlayer:
+    """Plays the legal move leading to the best scoring position, looking one move ahead. It chooses for a whole
+    batch of games at once, so every candidate position of every game is scored in one call to score_positions"""
+
+    def __init__(self, generator):
+        """Initializes the player with a random.Random to break ties"""
+        self._generator = generator
+
+    def choose(self, game):
+        """Returns a move as (origin, target) squares, or None if there is none"""
+        return self.choose_batch([game])[0]
+
+    def choose_batch(self, games):
+        """Returns a move for each game, or None for a game with no legal move"""
+        blacks = []
+        whites = []
+        candidates = []
+        for game in games:
+            black, white = game.get_board().get_planes()
+            moves = list(game.legal_move_squares(game.get_player_turn()))
+            candidates.append((len(blacks), moves))
+            for origin, target in moves:
+                child_black, child_white = apply_move(black, white, origin, target)
+                blacks.append(child_black)
+                whites.append(child_white)
+        scores = score_positions(blacks, whites)
+
+        chosen = []
+        for game, (first, moves) in zip(games, candidates):
+            if not moves:
+                chosen.append(None)
+                continue
+            sign = 1 if game.get_player_turn() == "B" else -1
+            best = max(sign * scores[first + number] for number in range(len(moves)))
+            best_moves = [move for number, move in enumerate(moves) if sign * scores[first + number] == best]
+            chosen.append(self._generator.choice(best_moves))
+        return chosen
+
+
+def _search_chunk(positions, depth):
+    """Searches a list of (black, white, player) positions with this process's engine for depth, returning a move
+    as (origin, target) squares, or None, for each"""
+    moves = []
+    for position in positions:
+        move = get_engine(depth).search(game_from_position(*position))
+        if move is None:
+            moves.append(None)
+        else:
+            moves.append((SQUARES[move[0]], SQUARES[move[1]]))
+    return moves
+
+
+class BatchEnginePlayer:
+    """Plays the move GessEngine finds searching to a fixed depth, choosing for a whole batch of games at once. The
+    searches themselves can't be vectorized, so the batch's positions are split into chunks searched in parallel by
+    worker processes that live for the whole tournament. Each reuses one engine from GessEngine.get_engine, which
+    empties its table before every search, so a move doesn't depend on how the batch was split"""
+
+    def __init__(self, depth, workers=None):
+        """Initializes the player. workers is the number of processes searching, defaulting to the CPU count, and
+        workers=1 searches in this process"""
+        self._depth = depth
+        self._workers = workers or os.cpu_count() or 1
+        self._pool = None
+
+    def choose(self, game):
+        """Returns a move as (origin, target) squares, or None if there is none"""
+        return self.choose_batch([game])[0]
+
+    def choose_batch(self, games):
+        """Returns a move for each game, or None for a game with no legal move"""
+        positions = [game.get_board().get_planes() + (game.get_player_turn(),) for game in games]
+        if self._workers == 1:
+            return _search_chunk(positions, self._depth)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self._workers)
+        # a few chunks per worker, so one slow search doesn't leave the others idle
+        size = max(1, -(-len(positions) // (self._workers * 4)))
+        chunks = [positions[start:start + size] for start in range(0, len(positions), size)]
+        moves = []
+        for chunk_moves in self._pool.map(_search_chunk, chunks, itertools.repeat(self._depth)):
+            moves.extend(chunk_moves)
+        return moves
+
+    def close(self):
+        """Shuts down the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def make_tournament_player(spec, generator, workers=None):
+    """Builds a player from its spec: "random", "greedy", or "engine:N" for the engine searching N moves deep,
+    spread over workers processes"""
+    if spec == "greedy":
+        return GreedyPlayer(generator)
+    name, separator, depth = spec.partition(":")
+    if name == "engine" and depth.isdigit():
+        return BatchEnginePlayer(int(depth), workers)
+    return make_player(spec, generator)
+
+
+def compute_elo(players, results, iterations=200):
+    """Fits Elo ratings to a list of (black, white, score for Black) results by repeatedly moving each rating toward
+    the score it actually made against the ratings it played, with the average rating held at 0. Every player also
+    gets one virtual draw against a 0-rated player, which keeps a perfect or zero score finite"""
+    ratings = dict.fromkeys(players, 0.0)
+    for iteration in range(iterations):
+        for player in players:
+            expected = 1 / (1 + 10 ** (-ratings[player] / 400))
+            actual = 0.5
+            games = 1
+            for first, second, score in results:
+                if player == first:
+                    opponent, points = second, score
+                elif player == second:
+                    opponent, points = first, 1 - score
+                else:
+                    continue
+                expected += 1 / (1 + 10 ** ((ratings[opponent] - ratings[player]) / 400))
+                actual += points
+                games += 1
+            ratings[player] += 400 * (actual - expected) / games
+        mean = sum(ratings.values()) / len(ratings)
+        for player in players:
+            ratings[player] -= mean
+    return ratings
+
+
+class _Match:
+    """One game of a tournament in progress"""
+
+    def __init__(self, black, white, game):
+        """Initializes the match between the players with these specs"""
+        self.black = black
+        self.white = white
+        self.game = game
+        self.plies = 0
+
+
+def run_tournament(specs, games_per_pair=10, max_moves=200, random_plies=4, seed=1, workers=None):
+    """Plays a round robin between the players with the given specs, games_per_pair games for each pair with
+    colors alternating. Every game is played at once in lockstep: each round collects the games waiting on each
+    player, asks that player for all their moves in one batch, plays them and retires the games that have ended.
+    The greedy player scores a batch with one vectorized call, engine players search a batch across workers
+    processes, and random players choose game by game. Unfinished games after max_moves count as draws. Returns
+    the results table, sorted by Elo, and the speed"""
+    generator = random.Random(seed)
+    players = {spec: make_tournament_player(spec, generator, workers) for spec in specs}
+    try:
+        return _run_matches(specs, players, generator, games_per_pair, max_moves, random_plies)
+    finally:
+        for player in players.values():
+            if hasattr(player, "close"):
+                player.close()
+
+
+def _run_matches(specs, players, generator, games_per_pair, max_moves, random_plies):
+    """Plays the games of run_tournament with the players built for it"""
+    opening = RandomPlayer(generator)
+    active = []
+    for first, second in itertools.combinations(specs, 2):
+        for number in range(games_per_pair):
+            board = BitBoard()
+            board.make_board()
+            if number % 2:
+                active.append(_Match(second, first, GessGame(board)))
+            else:
+                active.append(_Match(first, second, GessGame(board)))
+
+    results = []
+    total_games = len(active)
+    moves_played = 0
+    start = time.perf_counter()
+    while active:
+        waiting = {}
+        for match in active:
+            if match.plies < random_plies:
+                spec = None
+            elif match.game.get_player_turn() == "B":
+                spec = match.black
+            else:
+                spec = match.white
+            waiting.setdefault(spec, []).append(match)
+
+        still_active = []
+        for spec, matches in waiting.items():
+            player = opening if spec is None else players[spec]
+            games = [match.game for match in matches]
+            if hasattr(player, "choose_batch"):
+                moves = player.choose_batch(games)
+            else:
+                moves = [player.choose(game) for game in games]
+            for match, move in zip(matches, moves):
+                game = match.game
+                if move is not None:
+                    game.push_move(INDEXES[move[0]], INDEXES[move[1]])
+                    match.plies += 1
+                    moves_played += 1
+                state = game.get_game_state()
+                if move is None or state != "UNFINISHED" or match.plies >= max_moves:
+                    if state == "BLACK_WON":
+                        results.append((match.black, match.white, 1.0))
+                    elif state == "WHITE_WON":
+                        results.append((match.black, match.white, 0.0))
+                    elif move is None:
+                        # the side to move is stuck and loses
+                        score = 0.0 if game.get_player_turn() == "B" else 1.0
+                        results.append((match.black, match.white, score))
+                    else:
+                        results.append((match.black, match.white, 0.5))
+                else:
+                    still_active.append(match)
+        active = still_active
+    elapsed = time.perf_counter() - start
+
+    ratings = compute_elo(list(specs), results)
+    table = []
+    for spec in specs:
+        wins = draws = losses = 0
+        for black, white, score in results:
+            if spec == black:
+                points = score
+            elif spec == white:
+                points = 1 - score
+            else:
+                continue
+            if points == 1:
+                wins += 1
+            elif points == 0:
+                losses += 1
+            else:
+                draws += 1
+        played = wins + draws + losses
+        table.append({"player": spec, "games": played, "wins": wins, "draws": draws, "losses": losses,
+                      "score": (wins + draws / 2) / played if played else 0.0, "elo": ratings[spec]})
+    table.sort(key=lambda row: row["elo"], reverse=True)
+    return {"table": table, "games": total_games, "moves": moves_played, "seconds": elapsed,
+            "games_per_second": total_games / elapsed if elapsed > 0 else 0.0,
+            "moves_per_second": moves_played / elapsed if elapsed > 0 else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a round-robin Gess tournament with all games in lockstep")
+    parser.add_argument("players", nargs="+", help="player specs: 'random', 'greedy' or 'engine:N'")
+    parser.add_argument("--games", type=int, default=10, help="games per pair of players")
+    parser.add_argument("--max-moves", type=int, default=200, help="moves before a game is drawn")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=None, help="processes searching for engine players")
+    args = parser.parse_args()
+    if len(set(args.players)) < 2:
+        parser.error("a tournament needs at least two different players")
+    report = run_tournament(list(dict.fromkeys(args.players)), args.games, args.max_moves, seed=args.seed,
+                            workers=args.workers)
+    print("%-12s %6s %5s %5s %6s %6s %7s" % ("player", "games", "wins", "draws", "losses", "score", "elo"))
+    for row in report["table"]:
+        print("%-12s %6d %5d %5d %6d %5.1f%% %7.0f" % (row["player"], row["games"], row["wins"], row["draws"],
+                                                      row["losses"], row["score"] * 100, row["elo"]))
+    print("%d games, %d moves in %.2fs (%.1f games/s, %.0f moves/s)" % (
+        report["games"], report["moves"], report["seconds"], report["games_per_second"], report["moves_per_second"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+from array import array
+
+
+# What an entry's score means
+EXACT = 1
+LOWER = 2
+UPPER = 3
+EVAL = 4
+
+# Exclusive-or'd into a position's hash to file its static evaluation, so an EVAL entry never takes the place of the
+# same position's search result
+EVAL_KEY = 0x9E3779B97F4A7C15
+
+# Bytes taken by one entry, a 64-bit key and a 64-bit packed data word
+ENTRY_BYTES = 16
+
+_SCORE_BITS = 24
+_SCORE_OFFSET = 1 << (_SCORE_BITS - 1)
+_DEPTH_SHIFT = _SCORE_BITS
+_FLAG_SHIFT = _DEPTH_SHIFT + 8
+_MOVE_SHIFT = _FLAG_SHIFT + 3
+_GENERATION_SHIFT = _MOVE_SHIFT + 18
+
+
+def encode_move(origin, target):
+    """Packs a move's origin and target squares into 18 bits. Square 0 is never a footprint center, so 0 means no
+    move"""
+    return origin << 9 | target
+
+
+def decode_move(move):
+    """Unpacks a move from encode_move into its origin and target squares"""
+    return move >> 9, move & 511
+
+
+class TranspositionTable:
+    """Represents a fixed-size table of results keyed by a position's Zobrist hash, shared across repeated positions
+    during analysis. It holds search bounds (EXACT, LOWER, UPPER) and static evaluations (EVAL), the latter stored
+    under the position's hash exclusive-or'd with EVAL_KEY. Entries live in buckets of two: the first slot keeps the
+    deepest result, the second is always replaced, so deep results survive while recent shallow ones still get
+    cached.
+
+    The table can sit on top of a shared memory buffer so several processes use the same entries. Each key is stored
+    exclusive-or'd with its data, so an entry torn by two processes writing at once no longer matches its key and
+    reads as a miss instead of a wrong result"""
+
+    def __init__(self, memory_bytes=16 * 1024 * 1024, buffer=None):
+        """Initializes the table with as many buckets as fit in memory_bytes, rounded down to a power of two. If a
+        buffer such as SharedMemory.buf is given, the entries are kept in it and memory_bytes defaults to its size"""
+        if buffer is not None:
+            memory_bytes = len(buffer)
+        buckets = 1
+        while buckets * 4 * ENTRY_BYTES <= memory_bytes:
+            buckets *= 2
+        self._buckets = buckets
+        self._bucket_mask = buckets - 1
+        if buffer is None:
+            self._slots = array("Q", bytes(buckets * 2 * ENTRY_BYTES))
+            self._bytes = memoryview(self._slots).cast("B")
+        else:
+            self._bytes = memoryview(buffer)[:buckets * 2 * ENTRY_BYTES]
+            self._slots = self._bytes.cast("Q")
+        self._generation = 0
+        self._probes = 0
+        self._hits = 0
+        self._stores = 0
+
+    def get_size(self):
+        """Gets the number of entries the table can hold"""
+        return self._buckets * 2
+
+    def get_memory_bytes(self):
+        """Gets the number of bytes used by the entries"""
+        return self._buckets * 2 * ENTRY_BYTES
+
+    def get_stats(self):
+        """Gets the number of probes, hits and stores since the table was made or cleared"""
+        return {"probes": self._probes, "hits": self._hits, "stores": self._stores}
+
+    def clear(self):
+        """Empties every entry and resets the counters"""
+        self._bytes[:] = bytes(len(self._bytes))
+        self._generation = 0
+        self._probes = 0
+        self._hits = 0
+        self._stores = 0
+
+    def new_search(self, generation=None):
+        """Marks the start of a new search, so entries from older searches are replaced first. Processes sharing one
+        buffer must agree on which search is current, so they pass in the generation their parent chose instead of
+        counting their own"""
+        if generation is None:
+            generation = self._generation + 1
+        self._generation = generation & 63
+
+    def probe(self, key):
+        """Looks up a position by its hash. Returns (depth, flag, score, move) or None if it is not in the table"""
+        self._probes += 1
+        slot = (key & self._bucket_mask) * 4
+        slots = self._slots
+        if slots[slot + 1] and slots[slot] ^ slots[slot + 1] == key:
+            data = slots[slot + 1]
+        elif slots[slot + 3] and slots[slot + 2] ^ slots[slot + 3] == key:
+            data = slots[slot + 3]
+        else:
+            return None
+        self._hits += 1
+        return ((data >> _DEPTH_SHIFT) & 255, (data >> _FLAG_SHIFT) & 7,
+                (data & ((1 << _SCORE_BITS) - 1)) - _SCORE_OFFSET, (data >> _MOVE_SHIFT) & 0x3ffff)
+
+    def store(self, key, depth, flag, score, move=0):
+        """Stores a result for a position. The depth-preferred slot takes it if the position is already there, if
+        the new result is at least as deep, or if the slot is left over from an older search. Otherwise it goes in
+        the always-replace slot"""
+        self._stores += 1
+        score = max(-_SCORE_OFFSET, min(_SCORE_OFFSET - 1, score))
+        data = (self._generation << _GENERATION_SHIFT | move << _MOVE_SHIFT | flag << _FLAG_SHIFT |
+                min(depth, 255) << _DEPTH_SHIFT | score + _SCORE_OFFSET)
+        slot = (key & self._bucket_mask) * 4
+        slots = self._slots
+        kept = slots[slot + 1]
+        same_key = slots[slot] ^ kept == key
+        if (same_key or not kept or depth >= (kept >> _DEPTH_SHIFT) & 255 or
+                kept >> _GENERATION_SHIFT != self._generation):
+            if same_key and not move:
+                # keep the best move found by an earlier search of this position
+                data |= kept & (0x3ffff << _MOVE_SHIFT)
+            slots[slot] = key ^ data
+            slots[slot + 1] = data
+        else:
+            slots[slot + 2] = key ^ data
+            slots[slot + 3] = data
+
+    def get_hashfull(self):
+        """Gets how many of the first thousand entries are in use by the current search, a cheap fill estimate"""
+        used = 0
+        sampled = min(1000, self._buckets * 2)
+        for entry in range(sampled):
+            data = self._slots[entry * 2 + 1]
+            if data and data >> _GENERATION_SHIFT == self._generation:
+                used += 1
+        return used * 1000 // sampled
@@ -0,0 +1,26 @@
+import random
+
+from GessGame import GessGame, BitBoard
+from BulkAnalysis import analyze
+
+
+def _positions(plies, seed):
+    """Gets the position after each of plies random moves from the start as read_items position items"""
+    generator = random.Random(seed)
+    board = BitBoard()
+    board.make_board()
+    game = GessGame(board)
+    items = []
+    for ply in range(plies):
+        center, destination = generator.choice(list(game.legal_moves(game.get_player_turn())))
+        game.push_move(center, destination)
+        items.append(("position", ply, board.get_planes() + (game.get_player_turn(),)))
+    return items
+
+
+def test_engine_results_do_not_depend_on_what_the_process_analyzed_before():
+    items = _positions(4, 3)
+    together = list(analyze(items, 2, workers=1))
+    for item, result in zip(items, together):
+        assert list(analyze([item], 2, workers=1)) == [result]
+    assert list(analyze(list(reversed(items)), 2, workers=1)) == list(reversed(together))
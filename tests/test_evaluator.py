@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from GessGame import GessGame, BitBoard, INDEXES
+from Evaluator import Evaluator, FULL_UPDATE_SQUARES, compute_terms
+
+
+def _bit_game():
+    """Builds a BitBoard-backed game at the starting position"""
+    board = BitBoard()
+    board.make_board()
+    return GessGame(board)
+
+
+def _play_random(game, generator):
+    """Plays a random legal move. Returns False if the game is over or the side to move has none"""
+    if game.get_game_state() != "UNFINISHED":
+        return False
+    moves = list(game.legal_move_squares(game.get_player_turn()))
+    if not moves:
+        return False
+    origin, target = generator.choice(moves)
+    game.push_move(INDEXES[origin], INDEXES[target])
+    return True
+
+
+def _assert_matches(evaluator, board):
+    """Updates the evaluator and checks it against the full recompute"""
+    evaluator.update(board)
+    assert evaluator.get_terms() == compute_terms(*board.get_planes())
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_update_matches_full_recompute_every_ply(seed):
+    generator = random.Random(seed)
+    game = _bit_game()
+    board = game.get_board()
+    evaluator = Evaluator(board)
+    for ply in range(60):
+        if not _play_random(game, generator):
+            break
+        _assert_matches(evaluator, board)
+        if generator.random() < 0.3:
+            # take back a few plies, updating only once at the end
+            for take_back in range(generator.randint(1, 4)):
+                game.unmake_move()
+            _assert_matches(evaluator, board)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_update_after_several_moves_at_once(seed):
+    generator = random.Random(100 + seed)
+    game = _bit_game()
+    board = game.get_board()
+    evaluator = Evaluator(board)
+    for burst in range(10):
+        for ply in range(generator.randint(2, 5)):
+            if not _play_random(game, generator):
+                break
+        _assert_matches(evaluator, board)
+
+
+def test_update_after_jumps_larger_than_full_update_squares():
+    generator = random.Random(7)
+    game = _bit_game()
+    board = game.get_board()
+    evaluator = Evaluator(board)
+    positions = [board.get_planes()]
+    for ply in range(40):
+        if not _play_random(game, generator):
+            break
+        positions.append(board.get_planes())
+    start_black, start_white = positions[0]
+    end_black, end_white = positions[-1]
+    assert ((start_black ^ end_black) | (start_white ^ end_white)).bit_count() > FULL_UPDATE_SQUARES
+
+    # jump between distant positions, and take back every move at once
+    _assert_matches(evaluator, board)
+    board.set_planes(*positions[0])
+    _assert_matches(evaluator, board)
+    board.set_planes(*positions[-1])
+    _assert_matches(evaluator, board)
+    while game.unmake_move():
+        pass
+    _assert_matches(evaluator, board)
+    assert board.get_planes() == positions[0]
@@ -0,0 +1,121 @@
+import random
+
+import pytest
+
+from GessGame import GessGame, Board, BitBoard, hash_planes
+
+
+def _new_game(backend):
+    """Builds a game at the starting position on the given board class"""
+    board = backend()
+    board.make_board()
+    return GessGame(board)
+
+
+def _play_random(game, moves, generator):
+    """Plays up to moves random legal moves and returns them as notation pairs"""
+    board = game.get_board()
+    played = []
+    for move in range(moves):
+        if game.get_game_state() != "UNFINISHED":
+            break
+        legal = list(game.legal_moves(game.get_player_turn()))
+        center, destination = generator.choice(legal)
+        notation = (board.convert_to_string(center), board.convert_to_string(destination))
+        assert game.make_move(*notation)
+        played.append(notation)
+    return played
+
+
+def _position(game):
+    """Gets what must stay independent between a game and its fork"""
+    board = game.get_board()
+    return (board.get_planes(), board.get_hash(), game.get_position_hash(), game.get_player_turn(),
+            game.get_game_state(), game.get_move_count())
+
+
+def _replayed(backend, moves):
+    """Gets the position reached by playing moves from the start on a fresh game"""
+    game = _new_game(backend)
+    for move in moves:
+        assert game.make_move(*move)
+    return _position(game)
+
+
+def _check_hash(game):
+    """Checks the incrementally kept hash against one computed from the stones"""
+    assert game.get_board().get_hash() == hash_planes(*game.get_board().get_planes())
+
+
+@pytest.mark.parametrize("backend", [Board, BitBoard])
+@pytest.mark.parametrize("seed", range(4))
+def test_fork_and_original_play_and_unmake_independently(backend, seed):
+    start = _position(_new_game(backend))
+    generator = random.Random(seed)
+    game = _new_game(backend)
+    before = _play_random(game, 4, generator)
+    fork = game.fork()
+    assert _position(fork) == _position(game)
+
+    original_line = before + _play_random(game, 6, generator)
+    fork_line = before + _play_random(fork, 6, generator)
+    assert _position(game) == _replayed(backend, original_line)
+    assert _position(fork) == _replayed(backend, fork_line)
+    _check_hash(game)
+    _check_hash(fork)
+
+    # take the fork back past the point it was made, leaving the original where it is
+    while fork.unmake_move():
+        fork_line.pop()
+        assert _position(fork) == _replayed(backend, fork_line)
+        assert _position(game) == _replayed(backend, original_line)
+    assert _position(fork) == start
+    _check_hash(fork)
+
+    # the original can still take back the moves it shares with the fork
+    for move in range(len(original_line) - len(before) + 2):
+        assert game.unmake_move()
+        original_line.pop()
+    assert _position(game) == _replayed(backend, original_line)
+    _check_hash(game)
+    assert _position(_new_game(backend)) == start
+
+
+@pytest.mark.parametrize("backend", [Board, BitBoard])
+def test_forks_of_forks_stay_independent(backend):
+    start = _position(_new_game(backend))
+    generator = random.Random(11)
+    game = _new_game(backend)
+    lines = [_play_random(game, 2, generator)]
+    games = [game]
+    for depth in range(3):
+        fork = games[-1].fork()
+        lines.append(lines[-1] + _play_random(fork, 2, generator))
+        games.append(fork)
+    for game, line in zip(games, lines):
+        assert _position(game) == _replayed(backend, line)
+        _check_hash(game)
+    for game in games:
+        while game.unmake_move():
+            pass
+        assert _position(game) == start
+    assert _position(_new_game(backend)) == start
+
+
+@pytest.mark.parametrize("backend", [Board, BitBoard])
+def test_snapshot_shares_columns_until_written(backend):
+    board = backend()
+    board.make_board()
+    planes = board.get_planes()
+    copy = board.snapshot()
+    copy.write_square("B", 9 * 20 + 9)
+    board.write_square("W", 10 * 20 + 10)
+    assert copy.get_square_piece(9 * 20 + 9) == "B"
+    assert copy.get_square_piece(10 * 20 + 10) == "_"
+    assert board.get_square_piece(9 * 20 + 9) == "_"
+    assert board.get_square_piece(10 * 20 + 10) == "W"
+    assert copy.get_hash() == hash_planes(*copy.get_planes())
+    assert board.get_hash() == hash_planes(*board.get_planes())
+    fresh = backend()
+    fresh.make_board()
+    assert fresh.get_planes() == planes
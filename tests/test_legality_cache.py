@@ -0,0 +1,64 @@
+import random
+
+from GessGame import GessGame, BitBoard, INDEXES, BOARD_SIZE, DIRECTION_STEPS
+from LegalityCache import LegalityCache
+
+
+def _bit_game():
+    """Builds a BitBoard-backed game at the starting position"""
+    board = BitBoard()
+    board.make_board()
+    return GessGame(board)
+
+
+def _allowed_destinations(game, square):
+    """Gets every destination move_allowed accepts for the footprint centered on square, trying every slide"""
+    board = game.get_board()
+    center = INDEXES[square]
+    x, y = divmod(square, BOARD_SIZE)
+    allowed = set()
+    for name, x_step, y_step in DIRECTION_STEPS:
+        new_x, new_y = x + x_step, y + y_step
+        while 1 <= new_x <= BOARD_SIZE - 2 and 1 <= new_y <= BOARD_SIZE - 2:
+            destination = INDEXES[new_x * BOARD_SIZE + new_y]
+            if game.move_allowed(destination, board.generate_footprint(center), center):
+                allowed.add(destination.get_square())
+            new_x += x_step
+            new_y += y_step
+    return allowed
+
+
+def test_cached_destinations_agree_with_move_allowed_as_the_board_changes():
+    generator = random.Random(3)
+    game = _bit_game()
+    cache = LegalityCache(game, max_entries=256)
+    interior = [x * BOARD_SIZE + y for x in range(1, BOARD_SIZE - 1) for y in range(1, BOARD_SIZE - 1)]
+    watched = generator.sample(interior, 30)
+    for ply in range(24):
+        for square in watched + generator.sample(interior, 10):
+            assert cache.get_destination_squares(square) == _allowed_destinations(game, square)
+        moves = list(game.legal_move_squares(game.get_player_turn()))
+        if game.get_game_state() != "UNFINISHED" or not moves:
+            break
+        origin, target = generator.choice(moves)
+        game.push_move(INDEXES[origin], INDEXES[target])
+        if ply % 5 == 4:
+            # take back two moves, so entries are followed back to an earlier position
+            game.unmake_move()
+            game.unmake_move()
+    stats = cache.get_stats()
+    assert stats["hits"] and stats["carried"] and stats["invalidated"]
+
+
+def test_cache_matches_legal_move_squares():
+    generator = random.Random(11)
+    game = _bit_game()
+    cache = LegalityCache(game)
+    for ply in range(12):
+        player = game.get_player_turn()
+        moves = set(game.legal_move_squares(player))
+        cached = {(origin, target) for origin in range(BOARD_SIZE * BOARD_SIZE)
+                  for target in cache.get_destination_squares(origin)}
+        assert cached == moves
+        origin, target = generator.choice(sorted(moves))
+        game.push_move(INDEXES[origin], INDEXES[target])
@@ -0,0 +1,85 @@
+import random
+
+from GessGame import GessGame, BitBoard, BOARD_SIZE, INDEXES
+from MCTSPlayer import MCTSPlayer, playout
+from TranspositionTable import decode_move
+
+
+def _start_planes():
+    board = BitBoard()
+    board.make_board()
+    return board.get_planes()
+
+
+def test_playout_scores_in_half_points_for_the_player_asked_about():
+    black, white = _start_planes()
+    generator = random.Random(1)
+    # with no plies to play the position is scored as it stands, and the start is symmetric
+    assert playout(black, white, "B", generator, 0) == 1
+    assert playout(black, white, "W", generator, 0) == 1
+    # White keeps only its stones in columns a to j, which breaks its ring and leaves it fewer stones
+    white &= (1 << (10 * BOARD_SIZE)) - 1
+    assert playout(black, white, "B", generator, 0) == 2
+    assert playout(black, white, "W", generator, 0) == 0
+
+
+def test_playout_results_are_wins_draws_or_losses():
+    black, white = _start_planes()
+    generator = random.Random(2)
+    for player in ("B", "W"):
+        for number in range(20):
+            assert playout(black, white, player, generator, 30) in (0, 1, 2)
+
+
+def _most_visited_child(player, node):
+    first = player._first_child[node]
+    return max(range(first, first + player._child_count[node]), key=player._visits.__getitem__)
+
+
+def _move_notation(player, node):
+    board = BitBoard()
+    origin, target = decode_move(player._moves[node])
+    return board.convert_to_string(INDEXES[origin]), board.convert_to_string(INDEXES[target])
+
+
+def test_tree_is_reused_for_positions_up_to_two_moves_below_the_old_root():
+    player = MCTSPlayer(playouts=400, time_limit=None, seed=3)
+    game = GessGame()
+    move = player.search(game)
+    assert player.get_report()["reused_nodes"] == 0
+    nodes = player.get_node_count()
+
+    # one move below the old root keeps that move's subtree and its visits
+    child = _most_visited_child(player, 0)
+    child_visits = player._visits[child]
+    assert _move_notation(player, child) == move
+    assert game.make_move(*move)
+    player.search(game)
+    reused = player.get_report()["reused_nodes"]
+    assert 0 < reused < nodes
+    assert player.get_report()["root_visits"] == child_visits + 400
+
+    # two moves below
+    child = _most_visited_child(player, 0)
+    assert game.make_move(*_move_notation(player, child))
+    grandchild = _most_visited_child(player, child)
+    assert game.make_move(*_move_notation(player, grandchild))
+    grandchild_visits = player._visits[grandchild]
+    player.search(game)
+    assert player.get_report()["reused_nodes"] > 0
+    assert player.get_report()["root_visits"] == grandchild_visits + 400
+
+    # a position that isn't in the tree starts a new one
+    player.search(GessGame())
+    assert player.get_report()["reused_nodes"] == 0
+
+
+def test_visits_concentrate_on_a_few_root_moves():
+    player = MCTSPlayer(playouts=800, time_limit=None, seed=4)
+    player.search(GessGame())
+    report = player.get_report()
+    first = player._first_child[0]
+    visited = [player._visits[child] for child in range(first, first + player._child_count[0])
+               if player._visits[child]]
+    assert len(visited) < 40
+    assert max(visited) >= report["root_visits"] // 20
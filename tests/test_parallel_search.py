@@ -0,0 +1,41 @@
+from GessEngine import GessEngine, MATE_SCORE
+from GessGame import GessGame
+from ParallelSearch import choose_result
+
+
+def test_a_shallow_forced_win_beats_a_deeper_ordinary_score():
+    win = [(1, 15, ("c3", "c4")), (2, MATE_SCORE - 3, ("c3", "c6"))]
+    deep = [(depth, 40, ("l3", "l4")) for depth in range(1, 6)]
+    assert choose_result([deep, win], 64) == (2, MATE_SCORE - 3, ("c3", "c6"))
+
+
+def test_the_quickest_forced_win_is_taken():
+    slow = [(1, 0, ("c3", "c4")), (2, 0, ("c3", "c4")), (3, MATE_SCORE - 5, ("c3", "c4"))]
+    quick = [(1, MATE_SCORE - 1, ("l3", "l4"))]
+    assert choose_result([slow, quick], 64)[2] == ("l3", "l4")
+
+
+def test_workers_are_compared_at_the_deepest_depth_they_all_finished():
+    deeper = [(1, 10, ("c3", "c4")), (2, 5, ("c3", "c4")), (3, 90, ("c3", "c5"))]
+    shallower = [(1, 0, ("l3", "l4")), (2, 20, ("l3", "l5"))]
+    assert choose_result([deeper, shallower], 64) == (2, 20, ("l3", "l5"))
+
+
+def test_a_worker_whose_moves_all_lose_is_left_out_unless_they_all_do():
+    lost = [(1, -MATE_SCORE + 2, ("c3", "c4"))]
+    playing = [(1, -30, ("l3", "l4")), (2, -40, ("l3", "l5"))]
+    assert choose_result([lost, playing], 64) == (2, -40, ("l3", "l5"))
+    longer = [(1, 0, ("l3", "l4")), (2, -MATE_SCORE + 4, ("l3", "l5"))]
+    assert choose_result([lost, longer], 64) == (2, -MATE_SCORE + 4, ("l3", "l5"))
+
+
+def test_no_finished_iteration_gives_none():
+    assert choose_result([[], []], 64) is None
+
+
+def test_engine_reports_every_finished_depth():
+    engine = GessEngine(max_depth=2)
+    move = engine.search(GessGame())
+    iterations = engine.get_iterations()
+    assert [depth for depth, score, best in iterations] == [1, 2]
+    assert iterations[-1] == (engine.get_depth(), engine.get_score(), move)
@@ -0,0 +1,60 @@
+import pytest
+
+from GessGame import GessGame, BOARD_SIZE
+from Perft import Perft, REFERENCE_COUNTS, parse_position
+
+
+def _start_columns():
+    """Gets the starting position as 20 column strings, a through t, each from row 1 up"""
+    board = GessGame().get_board()
+    return ["".join(board.get_square_piece(x * BOARD_SIZE + y) for y in range(BOARD_SIZE)) for x in range(BOARD_SIZE)]
+
+
+def _mirrored_left_right():
+    """The starting position reflected across the middle of the board, Black to move. The rules are the same in a
+    mirror, so the counts match the starting position's"""
+    return "/".join(reversed(_start_columns())) + " B"
+
+
+def _colors_swapped():
+    """The starting position turned upside down with the colors swapped, White to move, which is the starting
+    position seen from White's side"""
+    swap = {"B": "W", "W": "B", "_": "_"}
+    return "/".join("".join(swap[piece] for piece in reversed(column)) for column in _start_columns()) + " W"
+
+
+@pytest.mark.parametrize("depth", [1, 2])
+def test_start_position_counts(depth):
+    assert Perft(GessGame()).count(depth) == REFERENCE_COUNTS[depth]
+
+
+@pytest.mark.parametrize("line", [_mirrored_left_right(), _colors_swapped()])
+@pytest.mark.parametrize("depth", [1, 2])
+def test_custom_position_counts(line, depth):
+    game, expected = parse_position(line)
+    assert Perft(game).count(depth) == REFERENCE_COUNTS[depth]
+
+
+def test_parse_position_reads_expected_counts():
+    game, expected = parse_position(_mirrored_left_right() + " 1:319 2:101761")
+    assert game.get_player_turn() == "B"
+    assert expected == {1: 319, 2: 101761}
+
+
+@pytest.mark.parametrize("line", [None, _colors_swapped()])
+def test_generated_moves_agree_with_move_allowed_and_make_move(line):
+    if line is None:
+        game = GessGame()
+    else:
+        game, expected = parse_position(line)
+    perft = Perft(game)
+    assert perft.count_timed(1) == REFERENCE_COUNTS[1]
+    assert perft.get_phase_calls() == REFERENCE_COUNTS[1]
+    assert perft.get_mismatches() == 0
+
+
+def test_mismatches_catch_a_missing_ring_check(monkeypatch):
+    monkeypatch.setattr(GessGame, "keeps_ring", lambda self, center, destination, footprint: True)
+    perft = Perft(GessGame())
+    perft.count_timed(1)
+    assert perft.get_mismatches() > 0
@@ -0,0 +1,118 @@
+import random
+
+import pytest
+
+from GessGame import GessGame, BitBoard, INDEXES, get_square
+from RecordFile import (END_OF_GAME, GameRecordReader, GameRecordWriter, PositionReader, PositionWriter,
+                        decode_position, encode_position)
+
+
+def _random_game(seed, moves):
+    """Plays up to moves random legal moves on a BitBoard game from the start"""
+    generator = random.Random(seed)
+    board = BitBoard()
+    board.make_board()
+    game = GessGame(board)
+    for move in range(moves):
+        if game.get_game_state() != "UNFINISHED":
+            break
+        center, destination = generator.choice(list(game.legal_moves(game.get_player_turn())))
+        game.push_move(center, destination)
+    return game
+
+
+def _position(game):
+    return game.get_board().get_planes() + (game.get_player_turn(),)
+
+
+def test_position_encoding_round_trips():
+    for seed in range(3):
+        position = _position(_random_game(seed, 7))
+        assert decode_position(encode_position(*position)) == position
+        assert decode_position(memoryview(encode_position(*position))) == position
+
+
+def test_position_file_round_trips_and_appends(tmp_path):
+    path = str(tmp_path / "positions.bin")
+    positions = [_position(_random_game(seed, seed)) for seed in range(6)]
+    writer = PositionWriter(path)
+    for position in positions[:4]:
+        writer.write(*position)
+    writer.close()
+    # reopening appends after the existing records instead of writing a second header
+    writer = PositionWriter(path)
+    for seed in (4, 5):
+        writer.write_game(_random_game(seed, seed))
+    writer.close()
+
+    reader = PositionReader(path)
+    try:
+        assert len(reader) == 6
+        assert list(reader) == positions
+        assert reader[-1] == positions[-1]
+        assert reader[1:4] == positions[1:4]
+        assert bytes(reader.get_raw_range(2, 4)) == b"".join(encode_position(*p) for p in positions[2:4])
+        assert _position(reader.load_game(3)) == positions[3]
+        with pytest.raises(IndexError):
+            reader[6]
+        with pytest.raises(IndexError):
+            reader[-7]
+    finally:
+        reader.close()
+
+
+def test_game_file_round_trips_moves_results_and_positions(tmp_path):
+    path = str(tmp_path / "games.bin")
+    games = [_random_game(seed, 5 + seed) for seed in range(3)]
+    games[1].resign_game("W")
+    writer = GameRecordWriter(path)
+    for game in games:
+        writer.write_game(game)
+    writer.write_moves([], "WHITE_WON")
+    writer.close()
+
+    reader = GameRecordReader(path)
+    try:
+        assert len(reader) == 4
+        records = list(reader)
+        for game, (moves, result) in zip(games, records):
+            assert moves == [(get_square(center), get_square(destination))
+                             for center, destination in game.get_move_history()]
+            assert result == game.get_game_state()
+        assert records[1][1] == "BLACK_WON"
+        assert records[3] == ([], "WHITE_WON")
+        assert reader.get_moves(-1) == records[3]
+        assert reader.get_entry_count() == sum(len(moves) + 1 for moves, result in records)
+
+        # every game ends with an end-of-game marker, and the position after each entry replays from its game's start
+        offset = 0
+        for number, (game, (moves, result)) in enumerate(zip(games, records)):
+            replay = _random_game(0, 0)
+            for origin, target in moves:
+                assert reader.get_entry(offset) == (origin, target)
+                replay.push_move(INDEXES[origin], INDEXES[target])
+                assert reader.get_position(offset) == _position(replay)
+                offset += 1
+            assert reader.get_entry(offset)[0] == END_OF_GAME
+            assert reader.get_position(offset) == _position(replay)
+            offset += 1
+            assert _position(reader.load_game(number)) == _position(game)
+        assert reader.load_game(2, 2).get_move_count() == 2
+
+        for number in (4, -5):
+            with pytest.raises(IndexError):
+                reader.get_moves(number)
+        for offset in (-1, reader.get_entry_count()):
+            with pytest.raises(IndexError):
+                reader.get_position(offset)
+    finally:
+        reader.close()
+
+
+def test_readers_refuse_the_other_kind_of_file(tmp_path):
+    path = str(tmp_path / "positions.bin")
+    writer = PositionWriter(path)
+    writer.write(*_position(_random_game(0, 0)))
+    writer.close()
+    with pytest.raises(ValueError):
+        GameRecordReader(path)
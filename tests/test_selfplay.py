@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from SelfPlay import run_selfplay, shard_path, manifest_path
+
+
+def _run(directory, games, **settings):
+    settings = dict({"games_per_shard": 2, "workers": 2, "max_moves": 8, "seed": 5}, **settings)
+    return run_selfplay(str(directory), games, out=lambda line: None, **settings)
+
+
+def _shards(directory):
+    return {name: open(os.path.join(directory, name), "rb").read()
+            for name in sorted(os.listdir(directory)) if name.startswith("shard-")}
+
+
+def test_growing_a_run_replays_its_short_last_shard(tmp_path):
+    _run(tmp_path / "grown", 5)
+    report = _run(tmp_path / "grown", 6)
+    assert report["games"] == 2
+    _run(tmp_path / "fresh", 6)
+    assert _shards(tmp_path / "grown") == _shards(tmp_path / "fresh")
+
+
+def test_resuming_skips_finished_shards(tmp_path):
+    _run(tmp_path, 6)
+    os.remove(shard_path(str(tmp_path), 1))
+    assert _run(tmp_path, 6)["games"] == 2
+    assert _run(tmp_path, 6)["games"] == 0
+
+
+@pytest.mark.parametrize("change", [{"seed": 6}, {"games_per_shard": 3}, {"max_moves": 9},
+                                    {"black_spec": "engine:1"}])
+def test_resuming_with_other_settings_is_refused(tmp_path, change):
+    _run(tmp_path, 4)
+    before = _shards(tmp_path)
+    with pytest.raises(ValueError):
+        _run(tmp_path, 4, **change)
+    assert _shards(tmp_path) == before
+
+
+def test_asking_for_fewer_games_is_refused(tmp_path):
+    _run(tmp_path, 4)
+    with pytest.raises(ValueError):
+        _run(tmp_path, 3)
+
+
+def test_shards_without_a_manifest_are_refused(tmp_path):
+    _run(tmp_path, 2)
+    os.remove(manifest_path(str(tmp_path)))
+    with pytest.raises(ValueError):
+        _run(tmp_path, 2)
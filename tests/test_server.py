@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+from GessServer import GessServer
+
+
+class _Client:
+    """A connection to a test server that keeps the messages it has not been asked for yet"""
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+
+    async def request(self, message):
+        self._writer.write(json.dumps(message).encode() + b"\n")
+        await self._writer.drain()
+
+    async def receive(self, kind):
+        while True:
+            message = json.loads(await asyncio.wait_for(self._reader.readline(), 10))
+            if message["type"] == kind:
+                return message
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+async def _connect(server):
+    return _Client(*await asyncio.open_connection("127.0.0.1", server.get_port()))
+
+
+def _run(test):
+    async def serve():
+        server = GessServer(port=0, workers=1, engine_time=0.1)
+        await server.start()
+        try:
+            await test(server)
+        finally:
+            await server.close()
+    asyncio.run(serve())
+
+
+async def _new_game(server):
+    black = await _connect(server)
+    white = await _connect(server)
+    await black.request({"op": "new"})
+    game_id = (await black.receive("created"))["game"]
+    await white.request({"op": "join", "game": game_id})
+    await white.receive("joined")
+    return game_id, black, white
+
+
+def test_resigning_out_of_turn_keeps_the_side_to_move():
+    async def test(server):
+        game_id, black, white = await _new_game(server)
+        await white.request({"op": "resign", "game": game_id})
+        update = await black.receive("update")
+        assert update["resigned"] == "W"
+        assert update["state"] == "BLACK_WON"
+        assert update["turn"] == "B"
+        await black.close()
+        await white.close()
+    _run(test)
+
+
+def test_games_are_released_when_both_players_leave_or_the_game_ends():
+    async def test(server):
+        game_id, black, white = await _new_game(server)
+        await black.request({"op": "move", "game": game_id, "center": "c3", "destination": "c6"})
+        await white.receive("update")
+        assert server.get_game_count() == 1
+        await black.close()
+        await white.receive("left")
+        assert server.get_game_count() == 1
+        await white.close()
+        for attempt in range(100):
+            if server.get_game_count() == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert server.get_game_count() == 0
+
+        game_id, black, white = await _new_game(server)
+        await black.request({"op": "resign", "game": game_id})
+        await black.receive("ok")
+        assert server.get_game_count() == 0
+        await black.request({"op": "status", "game": game_id})
+        assert (await black.receive("error"))["message"] == "no such game"
+        await black.close()
+        await white.close()
+    _run(test)
+
+
+def test_an_engine_game_is_released_when_its_player_leaves():
+    async def test(server):
+        black = await _connect(server)
+        await black.request({"op": "new", "engine": True})
+        game_id = (await black.receive("created"))["game"]
+        await black.request({"op": "move", "game": game_id, "center": "c3", "destination": "c6"})
+        await black.receive("ok")
+        reply = await black.receive("update")
+        while reply["player"] != "W":
+            reply = await black.receive("update")
+        assert server.get_game_count() == 1
+        await black.close()
+        for attempt in range(100):
+            if server.get_game_count() == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert server.get_game_count() == 0
+    _run(test)
@@ -0,0 +1,29 @@
+from TranspositionTable import TranspositionTable, EXACT, LOWER
+
+
+def test_tables_sharing_a_buffer_keep_each_others_entries_from_the_same_search():
+    buffer = bytearray(64 * 1024)
+    first = TranspositionTable(buffer=buffer)
+    second = TranspositionTable(buffer=buffer)
+    # the second worker has already run more searches of its own than the first
+    for search in range(3):
+        second.new_search()
+    first.new_search(7)
+    second.new_search(7)
+    size = first.get_size() // 2
+    first.store(5, 6, EXACT, 40, 123)
+    second.store(5 + size, 2, LOWER, -10, 456)
+    assert first.probe(5) == (6, EXACT, 40, 123)
+    assert second.probe(5 + size) == (2, LOWER, -10, 456)
+
+
+def test_entries_from_an_older_generation_give_way():
+    table = TranspositionTable(64 * 1024)
+    table.new_search(1)
+    table.store(5, 6, EXACT, 40, 123)
+    table.new_search(2)
+    size = table.get_size() // 2
+    table.store(5 + size, 2, LOWER, -10, 456)
+    table.store(5 + 2 * size, 1, LOWER, -20, 789)
+    assert table.probe(5) is None
+    assert table.probe(5 + size) == (2, LOWER, -10, 456)
@@ -0,0 +1,43 @@
+from GessGame import GessGame, BitBoard
+
+
+def _bit_game():
+    """Builds a BitBoard-backed game at the starting position"""
+    board = BitBoard()
+    board.make_board()
+    return GessGame(board)
+
+
+def test_unmake_move_restores_position_and_turn():
+    game = _bit_game()
+    board = game.get_board()
+    planes = board.get_planes()
+    position_hash = game.get_position_hash()
+    assert game.make_move("c3", "c6")
+    assert game.make_move("r18", "r15")
+    assert game.unmake_move()
+    assert game.unmake_move()
+    assert not game.unmake_move()
+    assert board.get_planes() == planes
+    assert game.get_position_hash() == position_hash
+    assert game.get_player_turn() == "B"
+
+
+def test_unmake_move_refuses_after_resignation():
+    game = _bit_game()
+    assert game.make_move("c3", "c6")
+    assert game.resign_game() == "BLACK_WON"
+    planes = game.get_board().get_planes()
+    assert not game.unmake_move()
+    assert game.get_game_state() == "BLACK_WON"
+    assert game.get_board().get_planes() == planes
+    assert game.get_move_count() == 1
+
+
+def test_resign_game_by_either_player_keeps_the_turn():
+    game = _bit_game()
+    assert game.resign_game("W") == "BLACK_WON"
+    assert game.get_player_turn() == "B"
+    game = _bit_game()
+    assert game.resign_game("B") == "WHITE_WON"
+    assert game.get_player_turn() == "B"